@@ -2,7 +2,7 @@
 from flask import Blueprint, request, jsonify
 import jwt
 import hashlib
-from storage.users import add_user, get_user_by_username, get_users_by_role, get_users_by_role_and_status, update_user_status
+from storage.users import add_user, get_user_by_username, get_users_by_role, get_users_by_role_and_status, get_users_page, update_user_status
 from middleware import token_required, JWT_SECRET
 
 bp = Blueprint('auth', __name__)
@@ -54,6 +54,19 @@ def login():
 def validate_token():
     return jsonify({'user_id': request.user_id, 'role': request.role, 'status': request.status}), 200
 
+@bp.route('/users', methods=['GET'])
+@token_required
+def list_users():
+    if request.role != 'admin':
+        return jsonify({'error': 'Access restricted to admins'}), 403
+    role = request.args.get('role')
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    if (limit is not None and limit <= 0) or offset < 0:
+        return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+    users, total = get_users_page(role, limit, offset)
+    return jsonify({'users': users, 'total': total}), 200
+
 @bp.route('/cfa/pending', methods=['GET'])
 @token_required
 def get_pending_cfas():
@@ -80,3 +80,23 @@ def update_user_status(user_id, status):
     user = dict(cursor.fetchone()) if cursor.rowcount > 0 else None
     conn.close()
     return user
+
+def get_users_page(role=None, limit=None, offset=0):
+    """
+    List users (without password hashes) ordered by id, optionally filtered by role.
+    Returns (users, total).
+    """
+    where = ' WHERE role = ?' if role else ''
+    params = [role] if role else []
+    conn = get_db_connection(None, 'users.db')
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT COUNT(*) FROM users{where}', params)
+    total = cursor.fetchone()[0]
+    query = f'SELECT id, username, role, status FROM users{where} ORDER BY id'
+    if limit is not None:
+        query += ' LIMIT ? OFFSET ?'
+        params = params + [limit, offset]
+    cursor.execute(query, params)
+    users = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return users, total
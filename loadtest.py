@@ -0,0 +1,141 @@
+# loadtest.py
+"""
+Load-test a service under the Flask dev server (what `python app.py` runs) and under serve.py,
+and print throughput and latency for each.
+
+Usage (from the repository root):
+    python loadtest.py main-backend --path /api/expenses --concurrency 32 --duration 15
+    python loadtest.py ai-backend --path /health --workers 4 --threads 8
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from serve import ROOT, SERVICES
+
+# Admission control and per-request logging would dominate what's being measured
+SERVER_ENV = {'ADMISSION_CONTROL': '0', 'ACCESS_LOG_SAMPLE_RATE': '0'}
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start listening on port {port}")
+
+def start_server(kind, args):
+    env = dict(os.environ, **SERVER_ENV)
+    if kind == 'dev':
+        # app.py's app.run(debug=True), minus the reloader so the server is one process we can stop
+        command = [sys.executable, '-c', f"from app import app; app.run(host='127.0.0.1', port={args.port}, debug=True, use_reloader=False)"]
+        cwd = os.path.join(ROOT, args.service)
+    else:
+        command = [sys.executable, os.path.join(ROOT, 'serve.py'), args.service, '--host', '127.0.0.1', '--port', str(args.port),
+                   '--workers', str(args.workers), '--threads', str(args.threads), '--max-requests', '0']
+        cwd = ROOT
+    server = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    wait_for_port(args.port)
+    return server
+
+def stop_server(server):
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+
+def client_process(port, path, headers, threads, duration):
+    # One keep-alive connection per thread, requesting path back to back until the deadline
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def run():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        failed = 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+                else:
+                    local.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies, errors[0]
+
+def run_load(args, headers):
+    processes = max(1, min(args.client_processes, args.concurrency))
+    threads = [args.concurrency // processes + (1 if i < args.concurrency % processes else 0) for i in range(processes)]
+    started = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(client_process, [(args.port, args.path, headers, n, args.duration) for n in threads])
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+    return latencies, errors, elapsed
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Flask dev server with serve.py under load.")
+    parser.add_argument('service', choices=sorted(SERVICES))
+    parser.add_argument('--path', required=True, help="GET path to request, e.g. /api/expenses")
+    parser.add_argument('--user-id', type=int, default=1, help="Send a bearer token for this user (main-backend; default: 1)")
+    parser.add_argument('--port', type=int, default=5099, help="Port the servers under test listen on (default: 5099)")
+    parser.add_argument('--concurrency', type=int, default=32, help="Concurrent client connections (default: 32)")
+    parser.add_argument('--duration', type=float, default=10, help="Seconds of load per server (default: 10)")
+    parser.add_argument('--client-processes', type=int, default=os.cpu_count() or 1, help="Processes the clients run in (default: CPU count)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="serve.py worker processes (default: CPU count)")
+    parser.add_argument('--threads', type=int, default=8, help="serve.py threads per worker (default: 8)")
+    args = parser.parse_args()
+
+    headers = {}
+    if args.service == 'main-backend':
+        import jwt
+        token = jwt.encode({'user_id': args.user_id, 'role': 'user', 'exp': int(time.time()) + 3600},
+                           os.getenv('JWT_SECRET', 'my_secret_key_123'), algorithm='HS256')
+        headers['Authorization'] = f'Bearer {token}'
+
+    print(f"{args.service} GET {args.path}: {args.concurrency} connections for {args.duration:g}s; "
+          f"serve.py with {args.workers} workers x {args.threads} threads")
+    print(f"{'server':<10} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for kind in ('dev', 'serve.py'):
+        server = start_server(kind, args)
+        try:
+            latencies, errors, elapsed = run_load(args, headers)
+        finally:
+            stop_server(server)
+        print(f"{kind:<10} {len(latencies):>9} {len(latencies) / elapsed:>9.1f} {percentile(latencies, 0.5):>8.1f} "
+              f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f} {errors:>7}")
+
+if __name__ == '__main__':
+    main()
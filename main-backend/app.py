@@ -1,6 +1,15 @@
 # main-backend/app.py
-from flask import Flask, request
+from flask import Flask
 from flask_cors import CORS
+from utils.access_log import init_access_log, restart_logging
+from utils.json_provider import FastJSONProvider
+from utils.compression import init_compression, compression_stats
+from utils.admission import init_admission, reset_admission
+from utils.events import change_broker
+from middleware import token_cache
+from storage.portfolio import reset_summary_cache
+from storage.cohorts import reset_cohort_cache
+from storage.price_history import reset_history_maps
 from routes.budgets import bp as budgets_bp
 from routes.debts import bp as debts_bp
 from routes.investments import bp as investments_bp
@@ -8,34 +17,41 @@ from routes.goals import bp as goals_bp
 from routes.expenses import bp as expenses_bp
 from routes.income import bp as income_bp
 from routes.insurance import bp as insurance_bp
+from routes.summary import bp as summary_bp
+from routes.sync import bp as sync_bp
+from routes.events import bp as events_bp
+from routes.batch import bp as batch_bp
+from routes.admin import bp as admin_bp
+from routes.cfa import bp as cfa_bp
+from routes.advisories import bp as advisories_bp
 
 app = Flask(__name__)
+# orjson-backed jsonify (stdlib fallback when orjson isn't installed)
+app.json_provider_class = FastJSONProvider
+app.json = FastJSONProvider(app)
 
 # Configure CORS using Flask-CORS
 CORS(app, supports_credentials=True, resources={
     r"/*": {
         "origins": "http://localhost:3000",
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "expose_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "Last-Event-ID"],
+        "expose_headers": ["Content-Type", "Authorization", "ETag", "Retry-After"]
     }
 })
 
-# Debug: Log requests and responses
-@app.before_request
-def before_request():
-    print(f"Request received: {request.method} {request.path}")
-    print(f"Origin: {request.headers.get('Origin')}")
-    print(f"Headers: {request.headers}")
+# Structured JSON access log (route, status, latency, DB time, bytes); headers only with DEBUG_LOGGING=1
+init_access_log(app)
+# Per-user and global read/write token buckets; over-budget requests queue briefly, then get 429
+init_admission(app)
 
 # Manually add CORS headers to all responses
 @app.after_request
 def after_request(response):
     response.headers['Access-Control-Allow-Origin'] = 'http://localhost:3000'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-    response.headers['Access-Control-Expose-Headers'] = 'Content-Type, Authorization'
-    print(f"Response headers: {response.headers}")
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, If-None-Match, Last-Event-ID'
+    response.headers['Access-Control-Expose-Headers'] = 'Content-Type, Authorization, ETag, Retry-After'
     return response
 
 # Register blueprints
@@ -46,6 +62,30 @@ app.register_blueprint(goals_bp, url_prefix='/api/goals')
 app.register_blueprint(expenses_bp, url_prefix='/api/expenses')
 app.register_blueprint(income_bp, url_prefix='/api/income')
 app.register_blueprint(insurance_bp, url_prefix='/api/insurance')
+app.register_blueprint(summary_bp, url_prefix='/api/summary')
+app.register_blueprint(sync_bp, url_prefix='/api/sync')
+app.register_blueprint(events_bp, url_prefix='/api/events')
+app.register_blueprint(batch_bp, url_prefix='/api/batch')
+app.register_blueprint(admin_bp, url_prefix='/api/admin')
+app.register_blueprint(cfa_bp, url_prefix='/api/cfa')
+app.register_blueprint(advisories_bp, url_prefix='/api/advisories')
+
+# gzip/brotli negotiated via Accept-Encoding; registered last so it runs before the other after_request hooks
+init_compression(app)
+
+def init_worker():
+    # Called by serve.py in each worker process after fork. Process-wide state copied from the
+    # master starts over, so no worker shares its entries, subscriptions or a lock that was held
+    # at fork. Database connections are opened per request (and lazily per process by the
+    # file admission buckets), so none are inherited.
+    restart_logging()
+    token_cache.reset()
+    change_broker.reset()
+    reset_summary_cache()
+    reset_cohort_cache()
+    reset_history_maps()
+    reset_admission()
+    compression_stats.reset()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
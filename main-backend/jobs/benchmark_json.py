@@ -0,0 +1,151 @@
+# main-backend/jobs/benchmark_json.py
+#
+# Compare the standard library encoder with FastJSONProvider on representative payloads:
+# encode time (best of several runs) and peak memory allocated while encoding. Also times
+# whole listings (fetch + encode) read as sqlite3.Row + dict(row) against utils.db.fetch_dicts.
+#
+# Usage (from main-backend/):
+#   python -m jobs.benchmark_json [--scale 1] [--repeat 5]
+import argparse
+import json
+import random
+import sqlite3
+import time
+import tracemalloc
+from datetime import date, timedelta
+from flask import Flask
+from utils.db import fetch_dicts
+from utils.json_provider import FastJSONProvider, orjson
+
+def make_debts(count):
+    start = date(2020, 1, 1)
+    debts = []
+    for i in range(count):
+        debts.append({
+            'id': i + 1,
+            'user_id': 1,
+            'amount': 500000.0,
+            'creditor': f'Bank {i % 7}',
+            'interest_rate': 8.5,
+            'term': '240',
+            'date': '2020-01-15',
+            'category': 'home',
+            'debt_type': 'Home Loan',
+            'remaining_balance': round(random.uniform(1000, 500000), 2),
+            'payment_history': [
+                {'date': (start + timedelta(days=30 * m)).isoformat(), 'amount': round(random.uniform(3000, 6000), 2)}
+                for m in range(60)
+            ],
+            'interest_rate_history': [{'date': '2022-04-01', 'interest_rate': 9.1}],
+            'details': {'account': f'HL-{i:06d}', 'branch': 'Main'},
+            'emi': 4339.12,
+            'months_remaining': 180
+        })
+    return debts
+
+def make_schedule(months):
+    return [
+        {
+            'month': m + 1,
+            'date': (date(2020, 1, 15) + timedelta(days=30 * m)).isoformat(),
+            'payment': 4339.12,
+            'principal_payment': round(1000 + m * 3.1, 2),
+            'interest_payment': round(3339.12 - m * 3.1, 2),
+            'remaining_principal': round(500000 - m * 1500, 2),
+            'total_interest_paid': round(m * 3000.5, 2)
+        }
+        for m in range(months)
+    ]
+
+def make_admin_payload(users):
+    payload = []
+    for user_id in range(1, users + 1):
+        payload.append({
+            'user_id': user_id,
+            'income': [{'id': i, 'name': 'Salary', 'amount': 90000.0, 'term': 'monthly', 'date': '2024-01-01'} for i in range(3)],
+            'expenses': [
+                {'id': i, 'amount': round(random.uniform(50, 5000), 2), 'category': random.choice(['food', 'rent', 'travel']), 'date': '2024-03-02', 'description': None}
+                for i in range(200)
+            ],
+            'debts': make_debts(2),
+            'investments': [{'id': i, 'name': 'Index Fund', 'type': 'Mutual Funds', 'details': {'nav': 10.5, 'units': 1000, 'current_nav': 14.2}} for i in range(10)],
+            'goals': [{'id': 1, 'name': 'House', 'target_amount': 2000000.0, 'current_amount': 350000.0, 'allocations': []}],
+            'budget': {'categories': {'food': 12000, 'rent': 30000}, 'total_income': 90000}
+        })
+    return payload
+
+def make_expense_db(count):
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE expenses (id INTEGER PRIMARY KEY, amount REAL, category TEXT, date TEXT, description TEXT)')
+    conn.executemany(
+        'INSERT INTO expenses (amount, category, date, description) VALUES (?, ?, ?, ?)',
+        [(round(random.uniform(50, 5000), 2), 'food', '2024-03-02', 'groceries') for _ in range(count)]
+    )
+    return conn
+
+def make_rows(count):
+    return make_expense_db(count).execute('SELECT * FROM expenses').fetchall()
+
+def measure(encode, payload, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encoded = encode(payload)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    encode(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(encoded)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON encoding of typical API payloads.')
+    parser.add_argument('--scale', type=int, default=1, help='Multiply payload sizes')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per encoder (best is reported)')
+    args = parser.parse_args()
+
+    random.seed(0)
+    provider = FastJSONProvider(Flask(__name__))
+    payloads = {
+        'debts list': make_debts(200 * args.scale),
+        'amortization schedule': make_schedule(360 * args.scale),
+        'admin all-users': make_admin_payload(100 * args.scale),
+        'expense rows (sqlite3.Row)': make_rows(20000 * args.scale)
+    }
+    encoders = {
+        # What jsonify did before: stdlib encoder, rows converted to dicts first
+        'stdlib': lambda payload: json.dumps(
+            [dict(row) for row in payload] if payload and isinstance(payload[0], sqlite3.Row) else payload,
+            sort_keys=True
+        ).encode(),
+        'provider': provider.dumps_bytes
+    }
+
+    # Listing path: query to encoded bytes, the way storage listings are served
+    listing_db = make_expense_db(20000 * args.scale)
+    listing_sql = 'SELECT * FROM expenses'
+    listings = {
+        'sqlite3.Row + dict(row)': lambda conn: provider.dumps_bytes([dict(row) for row in conn.execute(listing_sql).fetchall()]),
+        'fetch_dicts': lambda conn: provider.dumps_bytes(fetch_dicts(conn, listing_sql))
+    }
+
+    print(f"FastJSONProvider backend: {'orjson ' + orjson.__version__ if orjson else 'stdlib'}")
+    print(f"{'payload':<28}{'encoder':<10}{'time ms':>10}{'peak KiB':>11}{'bytes':>11}{'speedup':>9}")
+    for name, payload in payloads.items():
+        baseline = None
+        for encoder_name, encode in encoders.items():
+            seconds, peak, size = measure(encode, payload, args.repeat)
+            baseline = baseline or seconds
+            print(f"{name:<28}{encoder_name:<10}{seconds * 1000:>10.2f}{peak / 1024:>11.1f}{size:>11}{baseline / seconds:>8.1f}x")
+
+    print()
+    print(f"{'expense listing (fetch + encode)':<36}{'time ms':>10}{'peak KiB':>11}{'bytes':>11}{'speedup':>9}")
+    baseline = None
+    for name, serve in listings.items():
+        seconds, peak, size = measure(serve, listing_db, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:<36}{seconds * 1000:>10.2f}{peak / 1024:>11.1f}{size:>11}{baseline / seconds:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# main-backend/jobs/check_data_quality.py
+#
+# Report suspicious rows across every user database, a few SQL passes per check.
+#
+# Usage (from main-backend/):
+#   python -m jobs.check_data_quality [--users 1 2 3] [--workers 4]
+import argparse
+import sqlite3
+import time
+from datetime import date
+from utils.db import list_user_ids
+from utils.multidb import query_users
+
+CHECKS = {
+    'negative_or_zero_expenses':
+        "SELECT {user_id} AS user_id, id, amount FROM {db}.expenses WHERE amount <= 0",
+    'negative_or_zero_income':
+        "SELECT {user_id} AS user_id, id, amount FROM {db}.income WHERE amount <= 0",
+    'debt_balance_above_principal':
+        "SELECT {user_id} AS user_id, id, amount, remaining_balance FROM {db}.debts WHERE remaining_balance > amount",
+    'lapsed_policies_marked_active':
+        "SELECT {user_id} AS user_id, id, name, end_date FROM {db}.insurance WHERE is_active = 1 AND end_date < :today",
+    'goals_past_target_date':
+        "SELECT {user_id} AS user_id, id, name, target_date FROM {db}.goals WHERE current_amount < target_amount AND target_date < :today"
+}
+
+def main():
+    parser = argparse.ArgumentParser(description='Report suspicious rows across all user databases.')
+    parser.add_argument('--users', type=int, nargs='*', help='Only check these user ids')
+    parser.add_argument('--workers', type=int, help='Number of worker processes')
+    args = parser.parse_args()
+
+    user_ids = args.users or list_user_ids()
+    params = {'today': date.today().isoformat()}
+    start = time.perf_counter()
+    for name, template in CHECKS.items():
+        try:
+            rows = query_users(template, user_ids, params, workers=args.workers)
+            columns = next(rows, None)
+            findings = list(rows)
+        except sqlite3.Error as e:
+            print(f"{name}: could not run ({e})")
+            continue
+        print(f"{name}: {len(findings)} row(s)")
+        for row in findings:
+            print('  ' + ', '.join(f'{column}={value}' for column, value in zip(columns, row)))
+    print(f"Checked {len(user_ids)} users in {time.perf_counter() - start:.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+# main-backend/jobs/load_price_history.py
+#
+# Append daily closing prices from CSV files to the per-instrument price history store.
+#
+# Usage (from main-backend/):
+#   python -m jobs.load_price_history history/funds.csv history/stocks.csv
+import argparse
+import time
+from collections import defaultdict
+from storage.prices import read_price_csv
+from storage.price_history import append_prices
+
+def main():
+    parser = argparse.ArgumentParser(description='Append daily prices from CSV to the price history store.')
+    parser.add_argument('csv_files', nargs='+', help='CSV files with a symbol,price,date header')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows_by_symbol = defaultdict(list)
+    for path in args.csv_files:
+        for symbol, price, price_date in read_price_csv(path):
+            rows_by_symbol[symbol].append((price_date, price))
+
+    days_written = 0
+    for symbol, rows in rows_by_symbol.items():
+        days_written += append_prices(symbol, rows)
+    print(f"Appended {days_written} days across {len(rows_by_symbol)} symbols in {time.perf_counter() - start:.2f}s")
+
+if __name__ == '__main__':
+    main()
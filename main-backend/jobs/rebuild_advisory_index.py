@@ -0,0 +1,38 @@
+# main-backend/jobs/rebuild_advisory_index.py
+#
+# Rebuild the shared advisory index from the advisories stored in every user database.
+#
+# Usage (from main-backend/):
+#   python -m jobs.rebuild_advisory_index [--users 1 2 3]
+import argparse
+import time
+from utils.db import list_user_ids
+from utils.parallel import map_users
+from storage.resources import initialize_db
+from storage.advisories import get_advisories_for_user, reindex_user_advisories
+
+def read_user_advisories(user_id):
+    # Older user databases may predate the advisories table
+    initialize_db(user_id)
+    return get_advisories_for_user(user_id)
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the shared advisory index from per-user databases.')
+    parser.add_argument('--users', type=int, nargs='*', help='Only re-index these user ids')
+    parser.add_argument('--workers', type=int, help='Number of reader threads')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    indexed = 0
+    users = 0
+    # Reads fan out across user databases; writes to the shared index stay on this thread
+    for user_id, advisories, error in map_users(read_user_advisories, args.users or list_user_ids(), args.workers):
+        if error is not None:
+            print(f"Skipping user_id {user_id}: {error}")
+            continue
+        indexed += reindex_user_advisories(user_id, advisories)
+        users += 1
+    print(f"Indexed {indexed} advisories for {users} users in {time.perf_counter() - start:.2f}s")
+
+if __name__ == '__main__':
+    main()
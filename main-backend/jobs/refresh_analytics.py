@@ -0,0 +1,31 @@
+# main-backend/jobs/refresh_analytics.py
+#
+# Incrementally copy changes from every user database into the shared analytics database.
+# Intended to run nightly; only rows changed since the previous run are read.
+#
+# Usage (from main-backend/):
+#   python -m jobs.refresh_analytics [--users 1 2 3] [--full]
+import argparse
+import time
+from utils.db import list_user_ids
+from storage.analytics import refresh_analytics
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh the cross-user analytics database from per-user change logs.')
+    parser.add_argument('--users', type=int, nargs='*', help='Only refresh these user ids')
+    parser.add_argument('--full', action='store_true', help='Discard the analytics database and reload every row')
+    parser.add_argument('--workers', type=int, help='Number of reader threads')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = refresh_analytics(args.users or list_user_ids(), full=args.full, max_workers=args.workers)
+    for user_id, error in summary['failures'].items():
+        print(f"Skipping user_id {user_id}: {error}")
+    print(
+        f"Refreshed {summary['users_refreshed']} users ({summary['users_skipped']} unchanged): "
+        f"{summary['rows_upserted']} rows upserted, {summary['rows_deleted']} deleted "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+if __name__ == '__main__':
+    main()
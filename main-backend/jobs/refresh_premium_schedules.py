@@ -0,0 +1,41 @@
+# main-backend/jobs/refresh_premium_schedules.py
+#
+# Roll every user's precomputed insurance premium schedule forward: next_due_date for policies
+# whose due date has passed, and annualized_premium for rows that predate it. Run daily (and
+# once after upgrading older databases); reads such as the premium calendar never write.
+#
+# Usage (from main-backend/):
+#   python -m jobs.refresh_premium_schedules [--users 1 2 3]
+import argparse
+import time
+from utils.db import list_user_ids, get_db_connection
+from utils.parallel import map_users
+from storage.resources import initialize_db
+from storage.insurance import refresh_premium_schedule
+
+def refresh_user(user_id):
+    # Older user databases may predate the schedule columns
+    initialize_db(user_id)
+    conn = get_db_connection(user_id)
+    try:
+        refresh_premium_schedule(conn, user_id)
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh the precomputed insurance premium schedules.')
+    parser.add_argument('--users', type=int, nargs='*', help='Only refresh these user ids')
+    parser.add_argument('--workers', type=int, help='Number of worker threads')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    refreshed = 0
+    for user_id, _, error in map_users(refresh_user, args.users or list_user_ids(), args.workers):
+        if error is not None:
+            print(f"Skipping user_id {user_id}: {error}")
+            continue
+        refreshed += 1
+    print(f"Refreshed premium schedules for {refreshed} users in {time.perf_counter() - start:.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# main-backend/jobs/revalue_investments.py
+#
+# Load instrument prices from CSV into the shared price store, then update the current-value
+# fields of every matching holding in every user database.
+#
+# Usage (from main-backend/):
+#   python -m jobs.revalue_investments prices/funds.csv prices/stocks.csv --workers 8
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.db import list_user_ids
+from storage.resources import initialize_db
+from storage.prices import load_prices_from_csv, price_db_path
+from storage.portfolio import revalue_holdings
+
+def revalue_user(user_id, prices_path):
+    # Runs in a worker process; make sure the generated symbol column exists before the UPDATE
+    initialize_db(user_id)
+    return user_id, revalue_holdings(user_id, prices_path)
+
+def revalue_all_users(user_ids, prices_path, workers):
+    """
+    Revalue holdings for the given users in parallel, one user database per task.
+    Returns (holdings_updated, users_processed, failures).
+    """
+    holdings_updated = 0
+    users_processed = 0
+    failures = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(revalue_user, user_id, prices_path): user_id for user_id in user_ids}
+        for future in as_completed(futures):
+            user_id = futures[future]
+            try:
+                _, updated = future.result()
+                holdings_updated += updated
+                users_processed += 1
+            except Exception as e:
+                failures[user_id] = str(e)
+    return holdings_updated, users_processed, failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Load prices from CSV and revalue holdings across all user databases.')
+    parser.add_argument('csv_files', nargs='*', help='CSV files with a symbol,price[,date] header')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes')
+    parser.add_argument('--users', type=int, nargs='*', help='Only revalue these user ids')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.csv_files:
+        loaded = load_prices_from_csv(args.csv_files)
+        print(f"Loaded {loaded} prices from {len(args.csv_files)} file(s) in {time.perf_counter() - start:.2f}s")
+
+    user_ids = args.users or list_user_ids()
+    start = time.perf_counter()
+    holdings_updated, users_processed, failures = revalue_all_users(user_ids, price_db_path(), args.workers)
+    elapsed = time.perf_counter() - start
+
+    for user_id, error in sorted(failures.items()):
+        print(f"Failed to revalue user_id {user_id}: {error}")
+    print(
+        f"Revalued {holdings_updated} holdings across {users_processed} user databases in {elapsed:.2f}s "
+        f"({users_processed / elapsed if elapsed else 0:.1f} users/s, "
+        f"{holdings_updated / elapsed if elapsed else 0:.1f} holdings/s, {args.workers} workers, "
+        f"{len(failures)} failures)"
+    )
+
+if __name__ == '__main__':
+    main()
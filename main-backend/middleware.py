@@ -1,57 +1,273 @@
 # main-backend/middleware.py
+from collections import OrderedDict
 from functools import wraps
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timezone
 import jwt
-from flask import request, jsonify
+from flask import g, request, jsonify, make_response
+from storage.resources import initialize_db, get_user_data_version
+from storage.price_history import get_price_history_version
+from storage.idempotency import MAX_IDEMPOTENCY_KEY_LENGTH, get_stored_response, store_response
+from utils.db import shared_connection
 
-def token_required(f):
-    print(f"Applying token_required to function: {f}")  # Debug: Log the function
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        if request.method == 'OPTIONS':
-            return f(*args, **kwargs)
+logger = logging.getLogger(__name__)
+
+JWT_SECRET = os.getenv('JWT_SECRET', 'my_secret_key_123')
+# Verified tokens are reused for at most this long (and never past their own exp claim)
+TOKEN_CACHE_TTL = float(os.getenv('TOKEN_CACHE_TTL', '300'))
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+
+class TokenCache:
+    """
+    Bounded LRU of verified token claims keyed by the token's SHA-256 digest, so repeat
+    requests skip the HMAC check. Entries expire after the TTL or the token's exp, whichever
+    comes first.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.reset()
+
+    def reset(self):
+        # Empty the cache with a fresh lock (also in forked workers, see app.init_worker)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-        token = None
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]
+    def get(self, digest):
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self.entries[digest]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(digest)
+            self.hits += 1
+            return entry[1]
 
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
+    def put(self, digest, claims):
+        expires_at = time.monotonic() + self.ttl
+        if 'exp' in claims:
+            expires_at = min(expires_at, time.monotonic() + claims['exp'] - time.time())
+        with self.lock:
+            self.entries[digest] = (expires_at, claims)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
 
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+def set_request_claims(claims):
+    request.user_id = claims['user_id']
+    request.role = claims['role']
+    request.status = claims['status']
+
+def resolve_claims():
+    """
+    Verify the request's bearer token once per request (and once per TTL across requests)
+    and set request.user_id, request.role and request.status.
+    Returns (claims, None) or (None, error response).
+    """
+    if 'claims' in g:
+        # Also reached by batch sub-requests, which share the batch's g but not its request
+        set_request_claims(g.claims)
+        return g.claims, None
+
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) != 2 or not parts[1]:
+        return None, (jsonify({'error': 'Token is missing'}), 401)
+    token = parts[1]
+
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(digest)
+    if claims is None:
         try:
-            data = jwt.decode(token, 'my_secret_key_123', algorithms=["HS256"])
-            request.user_id = data['user_id']
+            data = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+            claims = {
+                'user_id': data['user_id'],
+                'role': data.get('role', 'user'),
+                # auth-service treats tokens without a status as approved
+                'status': data.get('status', 'approved')
+            }
+            if 'exp' in data:
+                claims['exp'] = data['exp']
         except Exception as e:
-            print(f"Token validation error: {str(e)}")
-            return jsonify({'error': 'Token is invalid'}), 401
+            logger.info(f"Token validation error: {str(e)}")
+            return None, (jsonify({'error': 'Token is invalid'}), 401)
+        token_cache.put(digest, claims)
 
-        return f(*args, **kwargs)
-    return decorated
+    g.claims = claims
+    set_request_claims(claims)
+    return claims, None
+
+def roles_required(*roles):
+    """
+    Require a valid token and, if roles are given, one of those roles with an approved account.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if request.method == 'OPTIONS':
+                return f(*args, **kwargs)
+            claims, error = resolve_claims()
+            if error:
+                return error
+            if roles and claims['role'] not in roles:
+                return jsonify({'error': 'Unauthorized access'}), 403
+            if roles and claims['status'] != 'approved':
+                return jsonify({'error': 'Account is not approved'}), 403
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+def token_required(f):
+    return roles_required()(f)
 
 def user_or_cfa_required(f):
-    print(f"Applying user_or_cfa_required to function: {f}")  # Debug: Log the function
-    if f is None:
-        raise ValueError("Function to decorate is None")
+    return roles_required('user', 'CFA')(f)
+
+def cfa_required(f):
+    return roles_required('CFA')(f)
+
+def admin_required(f):
+    return roles_required('admin')(f)
+
+def conditional_get(*tables, per_day=False, prices=False, version=None):
+    """
+    Answer GETs with ETag/Last-Modified from the user's data version for the given tables (all
+    tracked tables if none), and with 304 when the client's copy is current, before the view
+    runs. The user is the route's user_id argument, else the authenticated user. per_day adds
+    today's date for views whose output also depends on the date (accruals, due dates, prices).
+    prices adds the price history version for views valued from the price history files.
+    Views over shared or several users' data pass version instead: a function called with the
+    view's arguments that returns (version, changed_at), or None to skip validation.
+    If-Modified-Since is only used without If-None-Match, and Last-Modified is left out while
+    the latest change is in the current second. Apply below the auth decorator.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if request.method != 'GET':
+                return f(*args, **kwargs)
+            user_id = kwargs.get('user_id', getattr(request, 'user_id', None))
+
+            def current_validators():
+                try:
+                    if version is not None:
+                        current = version(**kwargs)
+                        if current is None:
+                            return None, None
+                        tag, changed_at = current
+                    else:
+                        seq, changed_at = get_user_data_version(user_id, tables)
+                        tag = f"{user_id}.{seq}"
+                except sqlite3.OperationalError:
+                    # Database not initialised yet; the view will create it
+                    return None, None
+                changes = [changed_at]
+                if prices:
+                    price_version, prices_changed_at = get_price_history_version()
+                    tag += f".p{price_version}"
+                    changes.append(prices_changed_at)
+                changed_at = max((change for change in changes if change), default=None)
+                today = date.today()
+                etag = tag + (f".{today.isoformat()}" if per_day else '')
+                last_modified = datetime.strptime(changed_at, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc) if changed_at else None
+                if per_day:
+                    midnight = datetime.combine(today, datetime.min.time()).astimezone(timezone.utc)
+                    last_modified = max(last_modified, midnight) if last_modified else midnight
+                if last_modified and last_modified >= datetime.now(timezone.utc).replace(microsecond=0):
+                    # Changed this second: a second change within it would keep the same
+                    # Last-Modified, so only the ETag can validate
+                    last_modified = None
+                return etag, last_modified
+
+            etag, last_modified = current_validators()
+            if etag is not None:
+                if request.if_none_match:
+                    not_modified = request.if_none_match.contains_weak(etag)
+                else:
+                    not_modified = bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+                if not_modified:
+                    response = make_response('', 304)
+                    response.set_etag(etag)
+                    return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and 'ETag' not in response.headers:
+                # Re-read: the view itself may have written (e.g. debt balance updates)
+                etag, last_modified = current_validators()
+                if etag is not None:
+                    response.set_etag(etag)
+                    if last_modified:
+                        response.last_modified = last_modified
+                    response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated
+    return decorator
+
+def idempotent(f):
+    """
+    Honour an Idempotency-Key header on POSTs. The first request with a key runs the view and
+    its response is stored under the key (per user, for IDEMPOTENCY_KEY_TTL); repeats of the
+    same request get the stored response back without the view running again. The view's
+    writes and the stored response commit in one transaction that takes the user's write lock
+    up front, so a simultaneous duplicate waits for the first to finish and then replays it.
+    5xx responses are not stored. Apply below the auth decorator.
+    """
     @wraps(f)
     def decorated(*args, **kwargs):
-        if request.method == 'OPTIONS':
+        key = request.headers.get('Idempotency-Key')
+        if request.method != 'POST' or key is None:
             return f(*args, **kwargs)
+        if not key or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({'error': f'Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters'}), 400
+        request_hash = hashlib.sha256(request.full_path.encode() + b'\n' + request.get_data()).hexdigest()
 
-        token = None
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]
-
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
+        initialize_db(request.user_id)
+        with shared_connection(request.user_id, atomic=True) as conn:
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+            except sqlite3.OperationalError:
+                # Busy timeout ran out while another request held the lock
+                return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
 
-        try:
-            data = jwt.decode(token, 'my_secret_key_123', algorithms=["HS256"])
-            request.user_id = data['user_id']
-            role = data.get('role', 'user')
-            if role not in ['user', 'cfa']:
-                return jsonify({'error': 'Unauthorized access'}), 403
-        except Exception as e:
-            print(f"Token validation error: {str(e)}")
-            return jsonify({'error': 'Token is invalid'}), 401
+            stored = get_stored_response(conn, key)
+            if stored is not None:
+                if stored['request_hash'] != request_hash:
+                    return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+                response = make_response(stored['body'], stored['status'])
+                response.content_type = stored['content_type']
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
 
-        return f(*args, **kwargs)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code >= 500:
+                conn.rollback()
+                return response
+            store_response(conn, key, request_hash, response.status_code, response.content_type, response.get_data())
+            return response
     return decorated
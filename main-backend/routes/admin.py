@@ -1,64 +1,182 @@
 # main-backend/routes/admin.py
-from flask import Blueprint, jsonify
-from storage.resources import initialize_db
+from datetime import datetime
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from utils.db import list_user_ids, user_db_exists
+from utils.parallel import map_users
+from utils.auth_client import fetch_users, AuthServiceError
+from storage.resources import initialize_db, parse_user_ids, get_users_data_version
 from storage.income import get_all_income
 from storage.expenses import get_all_expenses
 from storage.debts import get_all_debts
 from storage.investments import get_all_investments
-from storage.insurance import get_all_insurance
+from storage.insurance import get_all_insurance, scan_expiring_policies
 from storage.goals import get_all_goals
 from storage.budgets import get_budget, get_budget_variance
 from storage.advisories import get_advisories_for_user
-from middleware import admin_required
+from storage.analytics import get_platform_summary, get_spending_distribution, get_analytics_version
+from storage.cohorts import get_cohort_statistics
+from utils.compression import compression_stats
+from utils.admission import admission_stats
+from middleware import admin_required, conditional_get, token_cache
 
 bp = Blueprint('admin', __name__)
 
-@bp.route('/users', methods=['GET'], endpoint='get_all_users', strict_slashes=False)
-@admin_required
-def get_all_users():
-    # Since admins have global access, we use a dummy user_id
-    initialize_db(0)
-    # This is a simplified approach; in a real system, you'd query the auth-service for user data
-    # For now, we'll simulate by accessing financial data for all user_ids
-    users = []
-    for user_id in range(1, 10):  # Assuming user IDs 1-9 for testing
-        financials = {
-            'user_id': user_id,
-            'income': get_all_income(user_id),
-            'expenses': get_all_expenses(user_id),
-            'debts': get_all_debts(user_id),
-            'investments': get_all_investments(user_id),
-            'insurance': get_all_insurance(user_id),
-            'goals': get_all_goals(user_id),
-            'budget': get_budget(user_id),
-            'advisories': get_advisories_for_user(user_id)
-        }
-        if any(len(financials[key]) > 0 for key in ['income', 'expenses', 'debts', 'investments', 'insurance', 'goals']) or financials['budget']:
-            users.append(financials)
-    return jsonify(users), 200
+DEFAULT_USERS_PAGE_SIZE = 100
+MAX_USERS_PAGE_SIZE = 1000
 
-@bp.route('/users/<int:user_id>/financials', methods=['GET'], endpoint='get_user_financials', strict_slashes=False)
-@admin_required
-def get_user_financials(user_id):
-    initialize_db(user_id)
-    financials = {
+def platform_version(*tables):
+    # Conditional GET version for views over ?user_ids= or, by default, every user
+    def version(**kwargs):
+        try:
+            user_ids = parse_user_ids(request.args.get('user_ids'))
+        except ValueError:
+            return None
+        users_version, changed_at = get_users_data_version(user_ids or list_user_ids(), tables)
+        return f"platform.{users_version}", changed_at
+    return version
+
+def analytics_version(**kwargs):
+    analytics_data_version, refreshed_at = get_analytics_version()
+    return f"analytics.{analytics_data_version}", refreshed_at
+
+def load_user_financials(user_id):
+    return {
         'user_id': user_id,
         'income': get_all_income(user_id),
         'expenses': get_all_expenses(user_id),
-        'debts': get_all_debts(user_id),
+        'debts': get_all_debts(user_id, update_balances=False),
         'investments': get_all_investments(user_id),
         'insurance': get_all_insurance(user_id),
         'goals': get_all_goals(user_id),
         'budget': get_budget(user_id),
         'advisories': get_advisories_for_user(user_id)
     }
-    return jsonify(financials), 200
+
+def has_financials(financials):
+    return any(len(financials[key]) > 0 for key in ['income', 'expenses', 'debts', 'investments', 'insurance', 'goals']) or financials['budget']
+
+@bp.route('/users', methods=['GET'], endpoint='get_all_users', strict_slashes=False)
+@admin_required
+def get_all_users():
+    """
+    Stream every user's financials as NDJSON (one JSON object per line), loading users
+    concurrently. Users come from auth-service; paginate with ?limit=&offset=. Not a
+    conditional GET: the page depends on auth-service's user list and is streamed as it loads.
+    """
+    limit = request.args.get('limit', default=DEFAULT_USERS_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    if limit is None or limit <= 0 or offset < 0:
+        return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+    try:
+        users, total = fetch_users(request.headers['Authorization'], role='user', limit=min(limit, MAX_USERS_PAGE_SIZE), offset=offset)
+    except AuthServiceError as e:
+        return jsonify({'error': str(e)}), 502
+    # Users who never opened the app have no database and nothing to report
+    user_ids = [user['id'] for user in users]
+    loaded_ids = [user_id for user_id in user_ids if user_db_exists(user_id)]
+
+    def generate():
+        for user_id, financials, error in map_users(load_user_financials, loaded_ids):
+            if error is not None:
+                yield current_app.json.dumps({'user_id': user_id, 'error': str(error)}) + '\n'
+            elif has_financials(financials):
+                yield current_app.json.dumps(financials) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Total-Count'] = str(total)
+    if offset + len(user_ids) < total:
+        response.headers['X-Next-Offset'] = str(offset + len(user_ids))
+    return response
+
+@bp.route('/users/<int:user_id>/financials', methods=['GET'], endpoint='get_user_financials', strict_slashes=False)
+@admin_required
+@conditional_get(per_day=True)
+def get_user_financials(user_id):
+    initialize_db(user_id)
+    return jsonify(load_user_financials(user_id)), 200
 
 @bp.route('/users/<int:user_id>/variance/<month>', methods=['GET'], endpoint='get_user_variance', strict_slashes=False)
 @admin_required
+@conditional_get('budgets', 'expenses', 'goals')
 def get_user_variance(user_id, month):
     initialize_db(user_id)
     variance = get_budget_variance(user_id, month)
     if variance:
         return jsonify(variance), 200
     return jsonify({'error': 'Budget not found'}), 404
+
+@bp.route('/insurance/expiring', methods=['GET'], endpoint='get_expiring_policies', strict_slashes=False)
+@admin_required
+@conditional_get(per_day=True, version=platform_version('insurance'))
+def get_expiring_policies():
+    days = request.args.get('days', default=30, type=int)
+    if days is None or days < 0:
+        return jsonify({'error': 'days must be a non-negative integer'}), 400
+    expiring, failures = scan_expiring_policies(list_user_ids(), days)
+    return jsonify({
+        'days': days,
+        'users': [{'user_id': user_id, 'policies': policies} for user_id, policies in sorted(expiring.items())],
+        'failures': {str(user_id): error for user_id, error in failures.items()}
+    }), 200
+
+def parse_month(value):
+    month = value or datetime.now().strftime('%Y-%m')
+    try:
+        datetime.strptime(month, '%Y-%m')
+    except ValueError:
+        raise ValueError("month must be in YYYY-MM format")
+    return month
+
+@bp.route('/analytics/summary', methods=['GET'], endpoint='get_analytics_summary', strict_slashes=False)
+@admin_required
+@conditional_get(per_day=True, version=analytics_version)
+def get_analytics_summary():
+    """
+    Platform-wide totals from the analytics database (as of its last refresh).
+    """
+    try:
+        month = parse_month(request.args.get('month'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(get_platform_summary(month)), 200
+
+@bp.route('/analytics/spending', methods=['GET'], endpoint='get_analytics_spending', strict_slashes=False)
+@admin_required
+@conditional_get(per_day=True, version=analytics_version)
+def get_analytics_spending():
+    try:
+        month = parse_month(request.args.get('month'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(get_spending_distribution(month)), 200
+
+@bp.route('/cohorts/statistics', methods=['GET'], endpoint='get_cohort_statistics', strict_slashes=False)
+@admin_required
+@conditional_get(per_day=True, version=platform_version())
+def get_cohort_statistics_route():
+    # Whole platform by default, or a cohort given as ?user_ids=1,2,3
+    try:
+        user_ids = parse_user_ids(request.args.get('user_ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        month = parse_month(request.args.get('month'))
+        return jsonify(get_cohort_statistics(user_ids or list_user_ids(), month)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+# Live process counters below: never cached, so no conditional GET
+@bp.route('/auth/token-cache', methods=['GET'], endpoint='get_token_cache_stats', strict_slashes=False)
+@admin_required
+def get_token_cache_stats():
+    return jsonify(token_cache.stats()), 200
+
+@bp.route('/compression', methods=['GET'], endpoint='get_compression_stats', strict_slashes=False)
+@admin_required
+def get_compression_stats():
+    return jsonify(compression_stats.snapshot()), 200
+
+@bp.route('/admission', methods=['GET'], endpoint='get_admission_stats', strict_slashes=False)
+@admin_required
+def get_admission_stats():
+    return jsonify(admission_stats.snapshot()), 200
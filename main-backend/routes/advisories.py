@@ -1,26 +1,47 @@
 # main-backend/routes/advisories.py
 from flask import Blueprint, request, jsonify
-from storage.resources import initialize_db
-from storage.advisories import get_advisories_for_user, get_advisories_by_cfa, add_advisory, delete_advisory
-from middleware import token_required, cfa_required, user_or_cfa_required
+from storage.resources import initialize_db, parse_fields
+from storage.advisories import get_advisories_for_user, get_advisories_by_cfa, count_advisories_by_cfa, get_cfa_index_version, add_advisory, delete_advisory
+from middleware import token_required, cfa_required, user_or_cfa_required, conditional_get
 
 bp = Blueprint('advisories', __name__)
 
+MAX_PAGE_SIZE = 500
+
 @bp.route('/user/<int:user_id>', methods=['GET'], endpoint='get_advisories_for_user')
 @user_or_cfa_required
+@conditional_get('advisories')
 def get_advisories_for_user_route(user_id):
     initialize_db(user_id)
-    advisories = get_advisories_for_user(user_id)
-    return jsonify(advisories), 200
+    try:
+        advisories = get_advisories_for_user(user_id, fields=parse_fields(request.args.get('fields')))
+        return jsonify(advisories), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+def cfa_index_version(cfa_id):
+    # The listing comes from the shared index, so it is versioned per CFA there, not per user
+    if request.user_id != cfa_id:
+        return None
+    version, changed_at = get_cfa_index_version(cfa_id)
+    return f"cfa{cfa_id}.{version}", changed_at
 
 @bp.route('/cfa/<int:cfa_id>', methods=['GET'], endpoint='get_advisories_by_cfa')
 @cfa_required
+@conditional_get(version=cfa_index_version)
 def get_advisories_by_cfa_route(cfa_id):
     if request.user_id != cfa_id:
         return jsonify({'error': 'CFAs can only access their own advisories'}), 403
-    initialize_db(0)  # CFAs have global access
-    advisories = get_advisories_by_cfa(cfa_id)
-    return jsonify(advisories), 200
+    # Served from the shared advisory index; paginate with ?limit=&offset=
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    if (limit is not None and limit <= 0) or offset < 0:
+        return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+    advisories = get_advisories_by_cfa(cfa_id, limit=min(limit, MAX_PAGE_SIZE) if limit else None, offset=offset)
+    response = jsonify(advisories)
+    if limit is not None:
+        response.headers['X-Total-Count'] = str(count_advisories_by_cfa(cfa_id))
+    return response, 200
 
 @bp.route('/user/<int:user_id>', methods=['POST'], endpoint='add_advisory')
 @cfa_required
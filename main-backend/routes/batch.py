@@ -0,0 +1,105 @@
+# main-backend/routes/batch.py
+import logging
+import os
+from flask import Blueprint, current_app, request, jsonify
+from werkzeug.exceptions import HTTPException
+from storage.resources import initialize_db
+from storage.advisories import attach_advisory_index
+from utils.db import shared_connection
+from middleware import token_required
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('batch', __name__)
+
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '50'))
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+# Sub-response headers passed back to the client
+BATCH_RESPONSE_HEADERS = ('ETag', 'Last-Modified', 'Location')
+# Blueprints whose responses never end (server-sent events) and so can't be collected
+STREAMING_BLUEPRINTS = ('events',)
+
+def validate_batch(data):
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list) or not data['requests']:
+        raise ValueError("Body must be an object with a non-empty 'requests' list")
+    if len(data['requests']) > MAX_BATCH_SIZE:
+        raise ValueError(f"A batch may contain at most {MAX_BATCH_SIZE} requests")
+    for i, sub in enumerate(data['requests']):
+        if not isinstance(sub, dict) or not isinstance(sub.get('path'), str) or not sub['path'].startswith('/api/'):
+            raise ValueError(f"Request {i}: path must be a string starting with /api/")
+        if str(sub.get('method', 'GET')).upper() not in BATCH_METHODS:
+            raise ValueError(f"Request {i}: method must be one of {list(BATCH_METHODS)}")
+
+def dispatch(sub, authorization):
+    """
+    Run one sub-request through the app's URL map in its own request context and return its
+    response. The context shares the batch's app context, so the verified claims in g are reused.
+    """
+    method = str(sub.get('method', 'GET')).upper()
+    with current_app.test_request_context(sub['path'], method=method, json=sub.get('body'), headers={'Authorization': authorization}):
+        try:
+            if request.routing_exception is not None:
+                raise request.routing_exception
+            if request.blueprint == bp.name:
+                return jsonify({'error': 'Batches cannot be nested'}), 400
+            if request.blueprint in STREAMING_BLUEPRINTS:
+                return jsonify({'error': 'Event streams cannot be batched'}), 400
+            view = current_app.view_functions[request.url_rule.endpoint]
+            return current_app.make_response(view(**request.view_args))
+        except HTTPException as e:
+            return jsonify({'error': e.description}), e.code
+        except Exception:
+            logger.exception(f"Batch sub-request {method} {sub['path']} failed")
+            return jsonify({'error': 'Internal server error'}), 500
+
+def sub_response(response):
+    response = current_app.make_response(response)
+    if response.mimetype == 'text/event-stream':
+        # Reading an event stream would block forever; close it unread
+        response.close()
+        return {'status': 400, 'body': {'error': 'Event streams cannot be batched'}}
+    try:
+        body = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+    finally:
+        response.close()
+    result = {'status': response.status_code, 'body': body}
+    headers = {name: response.headers[name] for name in BATCH_RESPONSE_HEADERS if name in response.headers}
+    if headers:
+        result['headers'] = headers
+    return result
+
+@bp.route('', methods=['POST'], endpoint='run_batch', strict_slashes=False)
+@token_required
+def run_batch_route():
+    """
+    Run {"requests": [{"method", "path", "body"}, ...], "atomic": false} in order and return the
+    list of {"status", "body", "headers"} sub-responses. Sub-requests are authorised with the
+    batch's token and share one connection to the caller's database. With "atomic": true the
+    first sub-request answering 4xx/5xx stops the batch and rolls back the caller's writes; the
+    response is then 409 with the sub-responses up to and including the failed one.
+    """
+    data = request.get_json(silent=True)
+    try:
+        validate_batch(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    atomic = bool(data.get('atomic', False))
+    authorization = request.headers.get('Authorization')
+
+    initialize_db(request.user_id)
+    responses = []
+    with shared_connection(request.user_id, atomic=atomic) as conn:
+        if atomic and any(sub['path'].startswith('/api/advisories/') for sub in data['requests']):
+            # Advisory writes ATTACH the shared index, which SQLite refuses once the batch's
+            # transaction is open, so attach it before the first sub-request
+            attach_advisory_index(conn)
+        for sub in data['requests']:
+            result = sub_response(dispatch(sub, authorization))
+            responses.append(result)
+            if atomic and result['status'] >= 400:
+                conn.rollback()
+                return jsonify(responses), 409
+            if not atomic and conn.in_transaction:
+                # Discard whatever the sub-request left uncommitted, as closing its own connection would
+                conn.rollback()
+    return jsonify(responses), 200
@@ -1,13 +1,14 @@
 # main-backend/routes/budgets.py
 from flask import Blueprint, request, jsonify
-from storage.resources import initialize_db
+from storage.resources import initialize_db, parse_fields
 from storage.budgets import get_budget, add_budget, update_budget, delete_budget, get_budget_history, get_budget_variance
-from middleware import token_required
+from middleware import token_required, conditional_get, idempotent
 
 bp = Blueprint('budgets', __name__)
 
 @bp.route('', methods=['GET'], endpoint='get_budget', strict_slashes=False)
 @token_required
+@conditional_get('budgets')
 def get_budget_route():
     initialize_db(request.user_id)
     budget = get_budget(request.user_id)
@@ -17,6 +18,7 @@ def get_budget_route():
 
 @bp.route('', methods=['POST'], endpoint='add_budget', strict_slashes=False)
 @token_required
+@idempotent
 def add_budget_route():
     data = request.get_json()
     required_fields = ['categories']
@@ -57,13 +59,18 @@ def delete_budget_route():
 
 @bp.route('/history', methods=['GET'], endpoint='get_budget_history', strict_slashes=False)
 @token_required
+@conditional_get('budget_history')
 def get_budget_history_route():
     initialize_db(request.user_id)
-    history = get_budget_history(request.user_id)
-    return jsonify(history), 200
+    try:
+        history = get_budget_history(request.user_id, fields=parse_fields(request.args.get('fields')))
+        return jsonify(history), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('/variance/<month>', methods=['GET'], endpoint='get_variance', strict_slashes=False)
 @token_required
+@conditional_get('budgets', 'expenses', 'goals')
 def get_variance_route(month):
     initialize_db(request.user_id)
     variance = get_budget_variance(request.user_id, month)
@@ -1,6 +1,7 @@
 # main-backend/routes/cfa.py
-from flask import Blueprint, jsonify
-from storage.resources import initialize_db
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from storage.resources import initialize_db, parse_user_ids, get_users_data_version
 from storage.income import get_all_income
 from storage.expenses import get_all_expenses
 from storage.debts import get_all_debts
@@ -8,12 +9,28 @@ from storage.investments import get_all_investments
 from storage.insurance import get_all_insurance
 from storage.goals import get_all_goals
 from storage.budgets import get_budget, get_budget_variance
-from middleware import cfa_required
+from storage.returns import get_investment_returns_for_users
+from storage.cohorts import get_cohort_statistics
+from middleware import cfa_required, conditional_get
 
 bp = Blueprint('cfa', __name__)
 
+def requested_users_version(*tables):
+    # Conditional GET version for views over the ?user_ids= list (None lets the view answer 400)
+    def version(**kwargs):
+        try:
+            user_ids = parse_user_ids(request.args.get('user_ids'))
+        except ValueError:
+            return None
+        if not user_ids:
+            return None
+        users_version, changed_at = get_users_data_version(user_ids, tables)
+        return f"users.{users_version}", changed_at
+    return version
+
 @bp.route('/users/<int:user_id>/financials', methods=['GET'], endpoint='get_user_financials', strict_slashes=False)
 @cfa_required
+@conditional_get(per_day=True)
 def get_user_financials(user_id):
     initialize_db(user_id)
     financials = {
@@ -29,9 +46,46 @@ def get_user_financials(user_id):
 
 @bp.route('/users/<int:user_id>/variance/<month>', methods=['GET'], endpoint='get_user_variance', strict_slashes=False)
 @cfa_required
+@conditional_get('budgets', 'expenses', 'goals')
 def get_user_variance(user_id, month):
     initialize_db(user_id)
     variance = get_budget_variance(user_id, month)
     if variance:
         return jsonify(variance), 200
     return jsonify({'error': 'Budget not found'}), 404
+
+@bp.route('/users/returns', methods=['GET'], endpoint='get_users_returns', strict_slashes=False)
+@cfa_required
+@conditional_get(per_day=True, prices=True, version=requested_users_version('investments'))
+def get_users_returns():
+    # Returns for a whole client list in one batched solve: ?user_ids=1,2,3
+    try:
+        user_ids = parse_user_ids(request.args.get('user_ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not user_ids:
+        return jsonify({'error': 'user_ids is required'}), 400
+
+    for user_id in user_ids:
+        initialize_db(user_id)
+    try:
+        returns = get_investment_returns_for_users(user_ids, request.args.get('start'), request.args.get('end'))
+        return jsonify({str(user_id): result for user_id, result in returns.items()}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/cohorts/statistics', methods=['GET'], endpoint='get_cohort_statistics', strict_slashes=False)
+@cfa_required
+@conditional_get(per_day=True, version=requested_users_version())
+def get_cohort_statistics_route():
+    # Distribution of savings rate, debt-to-income, budget variance and goal progress across ?user_ids=1,2,3
+    try:
+        user_ids = parse_user_ids(request.args.get('user_ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not user_ids:
+        return jsonify({'error': 'user_ids is required'}), 400
+    try:
+        return jsonify(get_cohort_statistics(user_ids, request.args.get('month') or datetime.now().strftime('%Y-%m'))), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
@@ -1,20 +1,26 @@
 # main-backend/routes/debts.py
 from flask import Blueprint, request, jsonify
-from storage.resources import initialize_db
+from storage.resources import initialize_db, parse_fields
 from storage.debts import get_all_debts, get_debt_by_id, add_debt, update_debt, delete_debt, add_payment, add_interest_rate_change, get_amortization_schedule
-from middleware import token_required
+from utils.json_provider import stream_json_array
+from middleware import token_required, conditional_get, idempotent
 
 bp = Blueprint('debts', __name__)
 
 @bp.route('', methods=['GET'], endpoint='get_debts', strict_slashes=False)
 @token_required
+@conditional_get('debts', per_day=True)
 def get_debts_route():
     initialize_db(request.user_id)
-    debts = get_all_debts(request.user_id)
-    return jsonify(debts), 200
+    try:
+        debts = get_all_debts(request.user_id, fields=parse_fields(request.args.get('fields')))
+        return jsonify(debts), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('', methods=['POST'], endpoint='add_debt', strict_slashes=False)
 @token_required
+@idempotent
 def add_debt_route():
     data = request.get_json()
     required_fields = ['amount', 'creditor', 'interest_rate', 'term', 'date', 'debt_type']
@@ -55,6 +61,7 @@ def delete_debt_route(id):
 
 @bp.route('/<int:id>/payment', methods=['POST'], endpoint='add_payment', strict_slashes=False)
 @token_required
+@idempotent
 def add_payment_route(id):
     data = request.get_json()
     required_fields = ['amount', 'date']
@@ -72,6 +79,7 @@ def add_payment_route(id):
 
 @bp.route('/<int:id>/interest-rate-change', methods=['POST'], endpoint='add_interest_rate_change', strict_slashes=False)
 @token_required
+@idempotent
 def add_interest_rate_change_route(id):
     data = request.get_json()
     required_fields = ['interest_rate', 'date']
@@ -90,6 +98,7 @@ def add_interest_rate_change_route(id):
 
 @bp.route('/<int:id>/amortization', methods=['GET'], endpoint='get_amortization_schedule', strict_slashes=False)
 @token_required
+@conditional_get('debts', per_day=True)
 def get_amortization_schedule_route(id):
     initialize_db(request.user_id)
     # Get query parameters for what-if scenarios
@@ -108,7 +117,7 @@ def get_amortization_schedule_route(id):
             ignore_history=ignore_history
         )
         if schedule is not None:
-            return jsonify(schedule), 200
+            return stream_json_array(schedule), 200
         return jsonify({'error': 'Debt not found'}), 404
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
@@ -0,0 +1,85 @@
+# main-backend/routes/events.py
+import json
+import queue
+from flask import Blueprint, Response, request, stream_with_context
+from utils.db import get_db_connection
+from utils.events import change_broker, read_changes
+from storage.resources import initialize_db, get_data_version
+from middleware import token_required
+
+bp = Blueprint('events', __name__)
+
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 5000
+
+def format_event(event):
+    data = json.dumps({'table': event['table'], 'id': event['id'], 'op': event['op']})
+    return f"id: {event['seq']}\nevent: change\ndata: {data}\n\n"
+
+def changes_after(user_id, seq):
+    conn = get_db_connection(user_id)
+    try:
+        return read_changes(conn, seq)
+    finally:
+        conn.close()
+
+@bp.route('', methods=['GET'], endpoint='get_events', strict_slashes=False)
+@token_required
+def get_events():
+    """
+    Server-sent events: one 'change' event per created/updated/deleted row, with the change
+    sequence as the event id. Reconnecting with Last-Event-ID (or ?last_event_id=) replays
+    anything missed. Fetch /api/sync?since=<id> to get the changed rows themselves.
+    """
+    user_id = request.user_id
+    initialize_db(user_id)
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_event_id = None
+
+    conn = get_db_connection(user_id)
+    current_seq = get_data_version(conn)[0]
+    conn.close()
+    # Subscribe before replaying so nothing committed in between is lost; seq dedupes overlap
+    subscription = change_broker.subscribe(user_id, current_seq)
+
+    def generate():
+        sent = current_seq
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            if last_event_id is not None and last_event_id < current_seq:
+                sent = last_event_id
+                for event in changes_after(user_id, sent):
+                    yield format_event(event)
+                    sent = event['seq']
+            while True:
+                try:
+                    event = subscription.events.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    # Also picks up writes made by other processes (batch jobs, other workers)
+                    for missed in changes_after(user_id, sent):
+                        yield format_event(missed)
+                        sent = missed['seq']
+                    yield ": heartbeat\n\n"
+                    continue
+                if subscription.overflowed:
+                    # Fell behind: drop the buffer and catch up from change_log instead
+                    subscription.overflowed = False
+                    while not subscription.events.empty():
+                        subscription.events.get_nowait()
+                    for missed in changes_after(user_id, sent):
+                        yield format_event(missed)
+                        sent = missed['seq']
+                    continue
+                if event['seq'] > sent:
+                    yield format_event(event)
+                    sent = event['seq']
+        finally:
+            change_broker.unsubscribe(subscription)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,20 +1,25 @@
 # main-backend/routes/expenses.py
 from flask import Blueprint, request, jsonify
-from storage.resources import initialize_db
+from storage.resources import initialize_db, parse_fields
 from storage.expenses import get_all_expenses, add_expense, update_expense, delete_expense
-from middleware import token_required
+from middleware import token_required, conditional_get, idempotent
 
 bp = Blueprint('expenses', __name__)
 
 @bp.route('', methods=['GET'], endpoint='get_expenses',strict_slashes=False)
 @token_required
+@conditional_get('expenses')
 def get_expenses_route():
     initialize_db(request.user_id)
-    expenses = get_all_expenses(request.user_id)
-    return jsonify(expenses), 200
+    try:
+        expenses = get_all_expenses(request.user_id, fields=parse_fields(request.args.get('fields')))
+        return jsonify(expenses), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('', methods=['POST'], endpoint='add_expense',strict_slashes=False)
 @token_required
+@idempotent
 def add_expense_route():
     data = request.get_json()
     required_fields = ['amount', 'category', 'date']
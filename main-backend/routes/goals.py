@@ -1,20 +1,25 @@
 # main-backend/routes/goals.py
 from flask import Blueprint, request, jsonify
-from storage.resources import initialize_db
+from storage.resources import initialize_db, parse_fields
 from storage.goals import get_all_goals, get_goal_by_id, add_goal, update_goal, delete_goal, add_allocation, get_monthly_allocations
-from middleware import token_required, user_or_cfa_required
+from middleware import token_required, user_or_cfa_required, conditional_get, idempotent
 
 bp = Blueprint('goals', __name__)
 
 @bp.route('', methods=['GET'], strict_slashes=False)
 @token_required
+@conditional_get('goals')
 def get_goals():
     initialize_db(request.user_id)
-    goals = get_all_goals(request.user_id)
-    return jsonify(goals), 200
+    try:
+        goals = get_all_goals(request.user_id, fields=parse_fields(request.args.get('fields')))
+        return jsonify(goals), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('/<int:id>', methods=['GET'],strict_slashes=False)
 @token_required
+@conditional_get('goals')
 def get_goal(id):
     initialize_db(request.user_id)
     goal = get_goal_by_id(request.user_id, id)
@@ -24,6 +29,7 @@ def get_goal(id):
 
 @bp.route('', methods=['POST'],strict_slashes=False)
 @token_required
+@idempotent
 def add_goal_route():
     data = request.get_json()
     required_fields = ['name', 'target_amount', 'current_amount', 'target_date']
@@ -62,9 +68,10 @@ def delete_goal(id):
         return jsonify({'message': 'Goal deleted'}), 200
     return jsonify({'error': 'Goal not found'}), 404
 
-@bp.route('/<int:id>/allocation', methods=['POST'],strict_slashes=False)
+@bp.route('/<int:id>/allocation', methods=['POST'], endpoint='add_allocation', strict_slashes=False)
 @token_required
-def add_allocation(id):
+@idempotent
+def add_allocation_route(id):
     data = request.get_json()
     required_fields = ['amount', 'date']
     if not all(field in data for field in required_fields):
@@ -81,6 +88,7 @@ def add_allocation(id):
 
 @bp.route('/allocations/<int:id>/<month>', methods=['GET'],strict_slashes=False)
 @user_or_cfa_required
+@conditional_get('goals')
 def get_allocations(id, month):
     initialize_db(request.user_id)
     allocations = get_monthly_allocations(request.user_id, id, month)
@@ -1,21 +1,26 @@
 # main-backend/routes/income.py
 from flask import Blueprint, request, jsonify
-from storage.resources import initialize_db
+from storage.resources import initialize_db, parse_fields
 from storage.income import get_all_income, add_income, update_income, delete_income
-from middleware import token_required
+from middleware import token_required, conditional_get, idempotent
 
 bp = Blueprint('income', __name__)
 
 @bp.route('', methods=['GET'], endpoint='get_income', strict_slashes=False)
 @token_required
+@conditional_get('income')
 def get_income_route():
     initialize_db(request.user_id)
     #initialize_db(request.user_id)
-    income = get_all_income(request.user_id)
-    return jsonify(income), 200
+    try:
+        income = get_all_income(request.user_id, fields=parse_fields(request.args.get('fields')))
+        return jsonify(income), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('', methods=['POST'], endpoint='add_income', strict_slashes=False)
 @token_required
+@idempotent
 def add_income_route():
     data = request.get_json()
     required_fields = ['name', 'amount', 'term', 'date']
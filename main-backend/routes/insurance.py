@@ -1,21 +1,37 @@
 # main-backend/routes/insurance.py
 from flask import Blueprint, request, jsonify
-from storage.resources import initialize_db
-from storage.insurance import get_all_insurance, add_insurance, update_insurance, delete_insurance
-from middleware import token_required
+from storage.resources import initialize_db, parse_fields
+from storage.insurance import get_all_insurance, add_insurance, update_insurance, delete_insurance, get_insurance_calendar
+from middleware import token_required, conditional_get, idempotent
 
 bp = Blueprint('insurance', __name__)
 
 @bp.route('', methods=['GET'], endpoint='get_insurance', strict_slashes=False)
 @token_required
+@conditional_get('insurance')
 def get_insurance_route():
     initialize_db(request.user_id)
     #initialize_db(request.user_id)
-    insurance = get_all_insurance(request.user_id)
-    return jsonify(insurance), 200
+    try:
+        insurance = get_all_insurance(request.user_id, fields=parse_fields(request.args.get('fields')))
+        return jsonify(insurance), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/calendar', methods=['GET'], endpoint='get_insurance_calendar', strict_slashes=False)
+@token_required
+@conditional_get('insurance', per_day=True)
+def get_insurance_calendar_route():
+    initialize_db(request.user_id)
+    try:
+        calendar = get_insurance_calendar(request.user_id, request.args.get('start'), request.args.get('end'))
+        return jsonify(calendar), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('', methods=['POST'], endpoint='add_insurance', strict_slashes=False)
 @token_required
+@idempotent
 def add_insurance_route():
     data = request.get_json()
     required_fields = ['name', 'insurance_type', 'premium', 'coverage', 'premium_term', 'start_date', 'end_date', 'is_active', 'maturity_value']
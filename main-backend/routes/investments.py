@@ -1,20 +1,98 @@
 # main-backend/routes/investments.py
 from flask import Blueprint, request, jsonify
-from storage.resources import initialize_db
+from storage.resources import initialize_db, parse_fields, INVESTMENT_DETAIL_COLUMNS
 from storage.investments import get_all_investments, add_investment, update_investment, delete_investment
-from middleware import token_required
+from storage.portfolio import get_portfolio_summary
+from storage.price_history import get_holding_value_series, get_portfolio_value_series
+from storage.returns import get_investment_returns
+from middleware import token_required, conditional_get, idempotent
 
 bp = Blueprint('investments', __name__)
 
+def parse_investment_filters(args):
+    """
+    Build storage filters from min_<field>/max_<field> query parameters and an optional type.
+    """
+    filters = {}
+    for field, sql_type in INVESTMENT_DETAIL_COLUMNS.items():
+        bounds = []
+        for prefix in ['min', 'max']:
+            value = args.get(f'{prefix}_{field}')
+            if value is not None and sql_type == 'REAL':
+                try:
+                    value = float(value)
+                except ValueError:
+                    raise ValueError(f"'{prefix}_{field}' must be a valid number")
+            bounds.append(value)
+        if bounds != [None, None]:
+            filters[field] = tuple(bounds)
+    if args.get('type'):
+        filters['type'] = args.get('type')
+    return filters
+
 @bp.route('', methods=['GET'], endpoint='get_investments', strict_slashes=False)
 @token_required
+@conditional_get('investments')
 def get_investments_route():
     initialize_db(request.user_id)
-    investments = get_all_investments(request.user_id)
-    return jsonify(investments), 200
+    try:
+        investments = get_all_investments(
+            request.user_id,
+            filters=parse_investment_filters(request.args),
+            sort_by=request.args.get('sort_by'),
+            order=request.args.get('order', default='asc').lower(),
+            fields=parse_fields(request.args.get('fields'))
+        )
+        return jsonify(investments), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/summary', methods=['GET'], endpoint='get_investment_summary', strict_slashes=False)
+@token_required
+@conditional_get('investments')
+def get_investment_summary_route():
+    initialize_db(request.user_id)
+    summary = get_portfolio_summary(request.user_id)
+    return jsonify(summary), 200
+
+@bp.route('/returns', methods=['GET'], endpoint='get_investment_returns', strict_slashes=False)
+@token_required
+@conditional_get('investments', per_day=True, prices=True)
+def get_investment_returns_route():
+    initialize_db(request.user_id)
+    try:
+        returns = get_investment_returns(request.user_id, request.args.get('start'), request.args.get('end'))
+        return jsonify(returns), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/history', methods=['GET'], endpoint='get_portfolio_history', strict_slashes=False)
+@token_required
+@conditional_get('investments', per_day=True, prices=True)
+def get_portfolio_history_route():
+    initialize_db(request.user_id)
+    try:
+        series = get_portfolio_value_series(request.user_id, request.args.get('start'), request.args.get('end'))
+        return jsonify(series), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/<int:id>/history', methods=['GET'], endpoint='get_investment_history', strict_slashes=False)
+@token_required
+@conditional_get('investments', per_day=True, prices=True)
+def get_investment_history_route(id):
+    initialize_db(request.user_id)
+    try:
+        series = get_holding_value_series(request.user_id, id, request.args.get('start'), request.args.get('end'))
+        if series is not None:
+            return jsonify(series), 200
+        return jsonify({'error': 'Investment not found or has no symbol'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('', methods=['POST'], endpoint='add_investment', strict_slashes=False)
 @token_required
+@idempotent
 def add_investment_route():
     data = request.get_json()
     required_fields = ['name', 'type', 'date', 'details']
@@ -0,0 +1,19 @@
+# main-backend/routes/summary.py
+from flask import Blueprint, request, jsonify
+from storage.resources import initialize_db
+from storage.summary import get_financial_summary
+from middleware import token_required, conditional_get
+
+bp = Blueprint('summary', __name__)
+
+@bp.route('', methods=['GET'], endpoint='get_summary', strict_slashes=False)
+@token_required
+@conditional_get(per_day=True)
+def get_summary():
+    # Net worth, monthly cash flow, debt, goal progress and budget variance in one call
+    initialize_db(request.user_id)
+    try:
+        summary = get_financial_summary(request.user_id, request.args.get('month'))
+        return jsonify(summary), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
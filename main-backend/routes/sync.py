@@ -0,0 +1,23 @@
+# main-backend/routes/sync.py
+from flask import Blueprint, request, jsonify
+from storage.resources import initialize_db
+from storage.sync import get_changes_since
+from middleware import token_required
+
+bp = Blueprint('sync', __name__)
+
+@bp.route('', methods=['GET'], endpoint='get_changes', strict_slashes=False)
+@token_required
+def get_changes_route():
+    """
+    Delta sync: ?since=<version from the previous sync> (0 for everything), optional ?limit=.
+    """
+    since = request.args.get('since', default=0, type=int)
+    limit = request.args.get('limit', type=int)
+    if since is None or (limit is not None and limit <= 0):
+        return jsonify({'error': 'since must be an integer and limit positive'}), 400
+    initialize_db(request.user_id)
+    try:
+        return jsonify(get_changes_since(request.user_id, since, limit)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
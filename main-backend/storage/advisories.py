@@ -1,12 +1,63 @@
 # main-backend/storage/advisories.py
 import json
+import threading
 from datetime import datetime
-from utils.db import get_db_connection
-from .resources import initialize_db
+from utils.db import get_db_connection, get_shared_db_connection, get_shared_db_path, fetch_dicts
+from .resources import initialize_db, resolve_projection, project
 
 # Define valid advice types
 VALID_ADVICE_TYPES = ['product_recommendation', 'investment_diversification', 'debt_restructuring']
 
+# Shared index of every user's advisories so CFA listings don't have to visit each user database.
+# It is ATTACHed to the user's connection on write so both inserts commit atomically.
+ADVISORY_INDEX_DB_NAME = 'advisory_index.db'
+advisory_index_ready = False
+advisory_index_lock = threading.Lock()
+
+def init_advisory_index():
+    global advisory_index_ready
+    if advisory_index_ready:
+        return
+    with advisory_index_lock:
+        conn = get_shared_db_connection(ADVISORY_INDEX_DB_NAME)
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS advisories (
+                user_id INTEGER NOT NULL,
+                advisory_id INTEGER NOT NULL,
+                cfa_id INTEGER NOT NULL,
+                advice_type TEXT NOT NULL,
+                details TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (user_id, advisory_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_advisories_cfa_created_at ON advisories (cfa_id, created_at);
+            -- Bumped on every index write for the CFA; validates CFA listings (conditional GETs)
+            CREATE TABLE IF NOT EXISTS cfa_versions (
+                cfa_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL,
+                changed_at TEXT NOT NULL
+            );
+            CREATE TRIGGER IF NOT EXISTS advisories_version_insert AFTER INSERT ON advisories BEGIN
+                INSERT INTO cfa_versions (cfa_id, version, changed_at) VALUES (NEW.cfa_id, 1, datetime('now'))
+                ON CONFLICT(cfa_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+            END;
+            CREATE TRIGGER IF NOT EXISTS advisories_version_delete AFTER DELETE ON advisories BEGIN
+                INSERT INTO cfa_versions (cfa_id, version, changed_at) VALUES (OLD.cfa_id, 1, datetime('now'))
+                ON CONFLICT(cfa_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+            END;
+        ''')
+        conn.commit()
+        conn.close()
+        advisory_index_ready = True
+
+def attach_advisory_index(conn):
+    # A connection shared by a batch's sub-requests (utils.db.shared_connection) keeps the index
+    # attached from an earlier write, so only attach it once
+    init_advisory_index()
+    if any(row['name'] == 'advisory_index' for row in conn.execute('PRAGMA database_list')):
+        return
+    conn.execute('ATTACH DATABASE ? AS advisory_index', (get_shared_db_path(ADVISORY_INDEX_DB_NAME),))
+
 def validate_advisory_data(data):
     """
     Validate advisory data.
@@ -18,41 +69,83 @@ def validate_advisory_data(data):
         return False, "Details must be a dictionary"
     return True, None
 
-def get_advisories_for_user(user_id):
+def get_advisories_for_user(user_id, fields=None):
     conn = get_db_connection(user_id)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM advisories WHERE user_id = ?', (user_id,))
-    advisories = [dict(row) for row in cursor.fetchall()]
+    try:
+        columns, output_fields = resolve_projection(conn, 'advisories', fields)
+    except ValueError:
+        conn.close()
+        raise
+    advisories = [project(row, output_fields) for row in fetch_dicts(conn, f'SELECT {columns} FROM advisories WHERE user_id = ?', (user_id,))]
     for advisory in advisories:
-        advisory['details'] = json.loads(advisory['details']) if advisory['details'] else {}
+        if 'details' in advisory:
+            advisory['details'] = json.loads(advisory['details']) if advisory['details'] else {}
     conn.close()
     return advisories
 
-def get_advisories_by_cfa(cfa_id):
-    # Since CFAs can access any user's data, we don't pass user_id to get_db_connection
-    conn = get_db_connection(0)  # Use a dummy user_id since CFAs have global access
+def get_advisories_by_cfa(cfa_id, limit=None, offset=0):
+    """
+    List a CFA's advisories across all clients, newest first, from the shared index.
+    """
+    init_advisory_index()
+    query = '''SELECT advisory_id AS id, user_id, cfa_id, advice_type, details, created_at FROM advisories
+               WHERE cfa_id = ? ORDER BY created_at DESC, user_id, advisory_id DESC'''
+    params = [cfa_id]
+    if limit is not None:
+        query += ' LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
+    conn = get_shared_db_connection(ADVISORY_INDEX_DB_NAME)
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM advisories WHERE cfa_id = ?', (cfa_id,))
+    cursor.execute(query, params)
     advisories = [dict(row) for row in cursor.fetchall()]
     for advisory in advisories:
         advisory['details'] = json.loads(advisory['details']) if advisory['details'] else {}
     conn.close()
     return advisories
 
+def get_cfa_index_version(cfa_id):
+    """
+    (version, changed_at) of a CFA's advisories in the shared index; (0, None) before any write.
+    """
+    init_advisory_index()
+    conn = get_shared_db_connection(ADVISORY_INDEX_DB_NAME)
+    row = conn.execute('SELECT version, changed_at FROM cfa_versions WHERE cfa_id = ?', (cfa_id,)).fetchone()
+    conn.close()
+    return (row['version'], row['changed_at']) if row else (0, None)
+
+def count_advisories_by_cfa(cfa_id):
+    init_advisory_index()
+    conn = get_shared_db_connection(ADVISORY_INDEX_DB_NAME)
+    total = conn.execute('SELECT COUNT(*) FROM advisories WHERE cfa_id = ?', (cfa_id,)).fetchone()[0]
+    conn.close()
+    return total
+
 def add_advisory(user_id, cfa_id, data):
     is_valid, error = validate_advisory_data(data)
     if not is_valid:
         raise ValueError(error)
 
+    created_at = datetime.now().strftime('%Y-%m-%d')
+    details = json.dumps(data['details'])
     conn = get_db_connection(user_id)
+    attach_advisory_index(conn)
     cursor = conn.cursor()
-    cursor.execute(
-        'INSERT INTO advisories (user_id, cfa_id, advice_type, details, created_at) VALUES (?, ?, ?, ?, ?)',
-        (user_id, cfa_id, data['advice_type'], json.dumps(data['details']), datetime.now().strftime('%Y-%m-%d'))
-    )
-    conn.commit()
-    advisory_id = cursor.lastrowid
-    cursor.execute('SELECT * FROM advisories WHERE id = ?', (advisory_id,))
+    try:
+        cursor.execute(
+            'INSERT INTO main.advisories (user_id, cfa_id, advice_type, details, created_at) VALUES (?, ?, ?, ?, ?)',
+            (user_id, cfa_id, data['advice_type'], details, created_at)
+        )
+        advisory_id = cursor.lastrowid
+        cursor.execute(
+            'INSERT OR REPLACE INTO advisory_index.advisories (user_id, advisory_id, cfa_id, advice_type, details, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (user_id, advisory_id, cfa_id, data['advice_type'], details, created_at)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        conn.close()
+        raise
+    cursor.execute('SELECT * FROM main.advisories WHERE id = ?', (advisory_id,))
     advisory = dict(cursor.fetchone())
     advisory['details'] = json.loads(advisory['details']) if advisory['details'] else {}
     conn.close()
@@ -60,9 +153,36 @@ def add_advisory(user_id, cfa_id, data):
 
 def delete_advisory(user_id, advisory_id):
     conn = get_db_connection(user_id)
+    attach_advisory_index(conn)
     cursor = conn.cursor()
-    cursor.execute('DELETE FROM advisories WHERE id = ? AND user_id = ?', (advisory_id, user_id))
-    success = cursor.rowcount > 0
-    conn.commit()
+    try:
+        cursor.execute('DELETE FROM main.advisories WHERE id = ? AND user_id = ?', (advisory_id, user_id))
+        success = cursor.rowcount > 0
+        cursor.execute('DELETE FROM advisory_index.advisories WHERE advisory_id = ? AND user_id = ?', (advisory_id, user_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        conn.close()
+        raise
     conn.close()
     return success
+
+def reindex_user_advisories(user_id, advisories):
+    """
+    Replace a user's entries in the shared index with the given advisories (rows from their database).
+    """
+    init_advisory_index()
+    conn = get_shared_db_connection(ADVISORY_INDEX_DB_NAME)
+    try:
+        conn.execute('DELETE FROM advisories WHERE user_id = ?', (user_id,))
+        conn.executemany(
+            'INSERT INTO advisories (user_id, advisory_id, cfa_id, advice_type, details, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            [
+                (user_id, advisory['id'], advisory['cfa_id'], advisory['advice_type'], json.dumps(advisory['details']), advisory['created_at'])
+                for advisory in advisories
+            ]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return len(advisories)
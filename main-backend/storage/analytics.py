@@ -0,0 +1,277 @@
+# main-backend/storage/analytics.py
+import json
+import sqlite3
+from datetime import datetime
+from utils.db import get_db_connection, get_shared_db_connection, user_db_mtime
+from utils.parallel import map_users
+from .resources import initialize_db
+from .portfolio import VALUATION_FIELDS, TOTAL_VALUE_FIELDS, to_float
+from .debts import pending_principal
+
+# Consolidated, cross-user copy of the per-user tables, refreshed incrementally from each
+# user's change_log. Rows are flattened into narrow typed columns (no JSON blobs).
+ANALYTICS_DB_NAME = 'analytics.db'
+
+INCOME_TERM_MONTHS = {'monthly': 1, 'quarterly': 3, 'yearly': 12}
+
+def investment_cost_and_value(row):
+    fields = VALUATION_FIELDS.get(row['type'])
+    if fields is None:
+        return 0.0, 0.0
+    details = json.loads(row['details']) if row['details'] else {}
+    purchase_field, current_field, quantity_field = fields
+    quantity = to_float(details.get(quantity_field)) if quantity_field else 1.0
+    value_quantity = 1.0 if current_field in TOTAL_VALUE_FIELDS else quantity
+    return to_float(details.get(purchase_field)) * quantity, to_float(details.get(current_field)) * value_quantity
+
+def budgeted_total(row):
+    categories = json.loads(row['categories']) if row['categories'] else {}
+    return sum(to_float(amount) for amount in categories.values())
+
+# Per source table: analytics columns (after user_id, id) and a row -> values transform
+ANALYTICS_TABLES = {
+    # term comes last because it was added to existing analytics databases with ALTER TABLE
+    'debts': (
+        ['amount REAL', 'interest_rate REAL', 'remaining_balance REAL', 'debt_type TEXT', 'category TEXT', 'date TEXT', 'term INTEGER'],
+        lambda row: (to_float(row['amount']), to_float(row['interest_rate']), to_float(row['remaining_balance']),
+                     row['debt_type'], row['category'], row['date'], row['term'])
+    ),
+    'expenses': (
+        ['amount REAL', 'category TEXT', 'date TEXT', 'month TEXT'],
+        lambda row: (to_float(row['amount']), row['category'], row['date'], (row['date'] or '')[:7])
+    ),
+    'income': (
+        ['amount REAL', 'monthly_amount REAL', 'term TEXT', 'date TEXT', 'category TEXT'],
+        lambda row: (to_float(row['amount']), to_float(row['amount']) / INCOME_TERM_MONTHS.get(row['term'], 1),
+                     row['term'], row['date'], row['category'])
+    ),
+    'investments': (
+        ['type TEXT', 'date TEXT', 'cost REAL', 'value REAL'],
+        lambda row: (row['type'], row['date'], *investment_cost_and_value(row))
+    ),
+    'goals': (
+        ['target_amount REAL', 'current_amount REAL', 'target_date TEXT'],
+        lambda row: (to_float(row['target_amount']), to_float(row['current_amount']), row['target_date'])
+    ),
+    'budgets': (
+        ['total_budgeted REAL', 'total_income REAL'],
+        lambda row: (budgeted_total(row), to_float(row['total_income']))
+    ),
+    'insurance': (
+        ['insurance_type TEXT', 'premium REAL', 'annualized_premium REAL', 'coverage REAL', 'is_active INTEGER', 'end_date TEXT'],
+        lambda row: (row['insurance_type'], to_float(row['premium']), row['annualized_premium'], to_float(row['coverage']),
+                     row['is_active'], row['end_date'])
+    )
+}
+
+ANALYTICS_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_expenses_month_category ON expenses (month, category)',
+    'CREATE INDEX IF NOT EXISTS idx_income_user ON income (user_id)',
+    'CREATE INDEX IF NOT EXISTS idx_debts_type ON debts (debt_type)',
+    'CREATE INDEX IF NOT EXISTS idx_investments_type ON investments (type)',
+    'CREATE INDEX IF NOT EXISTS idx_insurance_active_end_date ON insurance (is_active, end_date)'
+]
+
+# Keep IN (...) lists well under SQLite's variable limit
+FETCH_CHUNK_SIZE = 500
+
+def init_analytics_db():
+    conn = get_shared_db_connection(ANALYTICS_DB_NAME)
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS etl_state (
+            user_id INTEGER PRIMARY KEY,
+            high_water_seq INTEGER NOT NULL,
+            db_mtime REAL,
+            refreshed_at TEXT NOT NULL
+        )
+    ''')
+    for table, (columns, _) in ANALYTICS_TABLES.items():
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (user_id INTEGER NOT NULL, id INTEGER NOT NULL, {', '.join(columns)}, PRIMARY KEY (user_id, id))"
+        )
+    for index in ANALYTICS_INDEXES:
+        cursor.execute(index)
+    debt_columns = [row['name'] for row in cursor.execute('PRAGMA table_info(debts)')]
+    if 'term' not in debt_columns:
+        # Outstanding balances are computed from the debt terms; re-extract every user to fill them in
+        cursor.execute('ALTER TABLE debts ADD COLUMN term INTEGER')
+        cursor.execute('DELETE FROM etl_state')
+    conn.commit()
+    conn.close()
+
+def debt_outstanding(row):
+    # Computed as of today, as /api/summary does; the copied remaining_balance is only as fresh
+    # as the user's last debt listing and is kept as a fallback for rows that can't be computed
+    try:
+        return pending_principal(row)
+    except (TypeError, ValueError):
+        return row['remaining_balance'] or 0.0
+
+def extract_user_changes(user_id, high_water_seq):
+    """
+    Read everything that changed in a user's database after high_water_seq.
+    Returns (new high-water seq, {table: [row values]}, {table: [deleted ids]}).
+    """
+    conn = get_db_connection(user_id)
+    try:
+        try:
+            cursor = conn.execute('SELECT MAX(seq) FROM change_log')
+        except sqlite3.OperationalError:
+            # Database predates change tracking; installing it seeds the log with every row
+            conn.close()
+            initialize_db(user_id)
+            conn = get_db_connection(user_id)
+            cursor = conn.execute('SELECT MAX(seq) FROM change_log')
+        max_seq = cursor.fetchone()[0] or 0
+        if max_seq < high_water_seq:
+            raise ValueError(f"change_log for user_id {user_id} went backwards; run a full refresh")
+
+        cursor = conn.execute(
+            'SELECT table_name, row_id, operation FROM change_log WHERE seq > ? AND seq <= ?',
+            (high_water_seq, max_seq)
+        )
+        upsert_ids = {}
+        deleted_ids = {}
+        for table_name, row_id, operation in cursor.fetchall():
+            if table_name not in ANALYTICS_TABLES:
+                continue
+            target = upsert_ids if operation == 'upsert' else deleted_ids
+            target.setdefault(table_name, []).append(row_id)
+
+        upserts = {}
+        for table, ids in upsert_ids.items():
+            transform = ANALYTICS_TABLES[table][1]
+            rows = []
+            for i in range(0, len(ids), FETCH_CHUNK_SIZE):
+                chunk = ids[i:i + FETCH_CHUNK_SIZE]
+                placeholders = ', '.join('?' for _ in chunk)
+                for row in conn.execute(f'SELECT * FROM {table} WHERE id IN ({placeholders})', chunk):
+                    rows.append((user_id, row['id'], *transform(row)))
+            upserts[table] = rows
+    finally:
+        conn.close()
+    return max_seq, upserts, deleted_ids
+
+def load_user_changes(conn, user_id, max_seq, db_mtime, upserts, deleted_ids):
+    cursor = conn.cursor()
+    for table, ids in deleted_ids.items():
+        cursor.executemany(f'DELETE FROM {table} WHERE user_id = ? AND id = ?', [(user_id, row_id) for row_id in ids])
+    for table, rows in upserts.items():
+        if rows:
+            placeholders = ', '.join('?' for _ in rows[0])
+            cursor.executemany(f'INSERT OR REPLACE INTO {table} VALUES ({placeholders})', rows)
+    cursor.execute(
+        'INSERT OR REPLACE INTO etl_state (user_id, high_water_seq, db_mtime, refreshed_at) VALUES (?, ?, ?, ?)',
+        (user_id, max_seq, db_mtime, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    )
+    conn.commit()
+
+def refresh_analytics(user_ids, full=False, max_workers=None):
+    """
+    Copy rows changed since each user's high-water mark into the analytics database.
+    Users whose database file hasn't been modified since their last refresh are skipped
+    without being opened. Returns {'users_refreshed', 'users_skipped', 'rows_upserted',
+    'rows_deleted', 'failures'}.
+    """
+    init_analytics_db()
+    conn = get_shared_db_connection(ANALYTICS_DB_NAME)
+    if full:
+        for table in ANALYTICS_TABLES:
+            conn.execute(f'DELETE FROM {table}')
+        conn.execute('DELETE FROM etl_state')
+        conn.commit()
+    state = {row['user_id']: (row['high_water_seq'], row['db_mtime']) for row in conn.execute('SELECT * FROM etl_state')}
+
+    pending = {}
+    skipped = 0
+    for user_id in user_ids:
+        high_water_seq, last_mtime = state.get(user_id, (0, None))
+        mtime = user_db_mtime(user_id)
+        if mtime is None or (last_mtime is not None and mtime <= last_mtime):
+            skipped += 1
+            continue
+        pending[user_id] = (high_water_seq, mtime)
+
+    def extract(user_id):
+        high_water_seq, mtime = pending[user_id]
+        return (mtime, *extract_user_changes(user_id, high_water_seq))
+
+    summary = {'users_refreshed': 0, 'users_skipped': skipped, 'rows_upserted': 0, 'rows_deleted': 0, 'failures': {}}
+    # Extraction fans out across user databases; the analytics database has a single writer
+    for user_id, result, error in map_users(extract, list(pending), max_workers):
+        if error is not None:
+            summary['failures'][user_id] = str(error)
+            continue
+        mtime, max_seq, upserts, deleted_ids = result
+        load_user_changes(conn, user_id, max_seq, mtime, upserts, deleted_ids)
+        summary['users_refreshed'] += 1
+        summary['rows_upserted'] += sum(len(rows) for rows in upserts.values())
+        summary['rows_deleted'] += sum(len(ids) for ids in deleted_ids.values())
+    conn.close()
+    return summary
+
+def get_analytics_version():
+    """
+    (version, changed_at) of the analytics database. Every load raises a user's high-water
+    change seq, so their sum changes whenever refreshed data does.
+    """
+    init_analytics_db()
+    conn = get_shared_db_connection(ANALYTICS_DB_NAME)
+    row = conn.execute('SELECT COUNT(*), COALESCE(SUM(high_water_seq), 0), MAX(refreshed_at) FROM etl_state').fetchone()
+    conn.close()
+    return f'{row[0]}.{row[1]}', row[2]
+
+def get_platform_summary(month):
+    init_analytics_db()
+    conn = get_shared_db_connection(ANALYTICS_DB_NAME)
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) AS users, MAX(refreshed_at) AS refreshed_at FROM etl_state')
+    state = dict(cursor.fetchone())
+    cursor.execute('SELECT user_id, amount, interest_rate, term, date, remaining_balance FROM debts')
+    debt_rows = cursor.fetchall()
+    debts = {'total_debt': sum(debt_outstanding(row) for row in debt_rows), 'users_with_debt': len({row['user_id'] for row in debt_rows})}
+    cursor.execute('SELECT COALESCE(SUM(cost), 0) AS total_invested, COALESCE(SUM(value), 0) AS total_investment_value FROM investments')
+    investments = dict(cursor.fetchone())
+    # Savings rate per user for the month: (monthly income - month's expenses) / monthly income
+    cursor.execute('''
+        SELECT AVG((i.monthly_income - COALESCE(e.spent, 0)) / i.monthly_income) AS average_savings_rate,
+               COUNT(*) AS users_with_income
+        FROM (SELECT user_id, SUM(monthly_amount) AS monthly_income FROM income GROUP BY user_id) AS i
+        LEFT JOIN (SELECT user_id, SUM(amount) AS spent FROM expenses WHERE month = ? GROUP BY user_id) AS e
+            ON e.user_id = i.user_id
+        WHERE i.monthly_income > 0
+    ''', (month,))
+    savings = dict(cursor.fetchone())
+    conn.close()
+
+    average_savings_rate = savings['average_savings_rate']
+    return {
+        'month': month,
+        'users': state['users'],
+        'refreshed_at': state['refreshed_at'],
+        'total_debt': round(debts['total_debt'], 2),
+        'users_with_debt': debts['users_with_debt'],
+        'total_invested': round(investments['total_invested'], 2),
+        'total_investment_value': round(investments['total_investment_value'], 2),
+        'average_savings_rate_percentage': round(average_savings_rate * 100, 2) if average_savings_rate is not None else None,
+        'users_with_income': savings['users_with_income']
+    }
+
+def get_spending_distribution(month):
+    init_analytics_db()
+    conn = get_shared_db_connection(ANALYTICS_DB_NAME)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT category, SUM(amount) AS total, COUNT(*) AS transactions, COUNT(DISTINCT user_id) AS users
+        FROM expenses WHERE month = ? GROUP BY category ORDER BY total DESC
+    ''', (month,))
+    categories = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    grand_total = sum(category['total'] for category in categories)
+    for category in categories:
+        category['average_per_user'] = round(category['total'] / category['users'], 2)
+        category['share_percentage'] = round(category['total'] * 100 / grand_total, 2) if grand_total else 0
+        category['total'] = round(category['total'], 2)
+    return {'month': month, 'total': round(grand_total, 2), 'categories': categories}
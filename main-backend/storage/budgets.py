@@ -1,9 +1,10 @@
 # main-backend/storage/budgets.py
 import json
 from datetime import datetime
-from utils.db import get_db_connection
+from utils.db import get_db_connection, fetch_dicts
 from storage.expenses import get_all_expenses
 from storage.goals import get_monthly_allocations
+from storage.resources import resolve_projection, project
 
 def get_budget(user_id):
     conn = get_db_connection(user_id)
@@ -100,13 +101,17 @@ def delete_budget(user_id):
     conn.close()
     return success
 
-def get_budget_history(user_id):
+def get_budget_history(user_id, fields=None):
     conn = get_db_connection(user_id)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM budget_history WHERE user_id = ? ORDER BY updated_at DESC', (user_id,))
-    history = [dict(row) for row in cursor.fetchall()]
+    try:
+        columns, output_fields = resolve_projection(conn, 'budget_history', fields)
+    except ValueError:
+        conn.close()
+        raise
+    history = [project(row, output_fields) for row in fetch_dicts(conn, f'SELECT {columns} FROM budget_history WHERE user_id = ? ORDER BY updated_at DESC', (user_id,))]
     for entry in history:
-        entry['categories'] = json.loads(entry.get('categories', '{}')) if entry.get('categories') else {}
+        if 'categories' in entry:
+            entry['categories'] = json.loads(entry.get('categories', '{}')) if entry.get('categories') else {}
     conn.close()
     return history
 
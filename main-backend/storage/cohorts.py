@@ -0,0 +1,117 @@
+# main-backend/storage/cohorts.py
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from utils.db import get_db_connection, user_db_exists, user_db_mtime
+from utils.parallel import map_users
+from utils.sketches import QuantileSketch
+from .analytics import INCOME_TERM_MONTHS
+from .budgets import get_budget_variance
+from .debts import pending_principal
+
+COHORT_METRICS = ['savings_rate_percentage', 'debt_to_income', 'budget_variance_percentage', 'goal_progress_percentage']
+
+# Users per task: each task folds its users into its own sketches, which are merged at the end
+COHORT_CHUNK_SIZE = 50
+
+# Cached statistics keyed by (sorted user ids, month) -> (newest database mtime, result)
+cohort_cache = OrderedDict()
+cohort_cache_lock = threading.Lock()
+COHORT_CACHE_SIZE = 128
+
+def reset_cohort_cache():
+    # For forked worker processes: start empty, with a lock no other process can hold
+    global cohort_cache, cohort_cache_lock
+    cohort_cache = OrderedDict()
+    cohort_cache_lock = threading.Lock()
+
+def load_user_cohort_metrics(user_id, month):
+    """
+    The cohort metrics for one user and month; a metric is None when it doesn't apply
+    (no income, no budget, no goals).
+    """
+    conn = get_db_connection(user_id)
+    cursor = conn.cursor()
+    cursor.execute('SELECT amount, term FROM income WHERE user_id = ?', (user_id,))
+    monthly_income = sum(row['amount'] / INCOME_TERM_MONTHS.get(row['term'], 1) for row in cursor.fetchall())
+    cursor.execute('SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE user_id = ? AND date LIKE ?', (user_id, f'{month}%'))
+    spent = cursor.fetchone()[0]
+    # Outstanding as of today, as /api/summary computes it (the stored remaining_balance can be stale)
+    cursor.execute('SELECT amount, interest_rate, term, date FROM debts WHERE user_id = ?', (user_id,))
+    debt = sum(pending_principal(row) for row in cursor.fetchall())
+    cursor.execute('SELECT SUM(current_amount), SUM(target_amount) FROM goals WHERE user_id = ?', (user_id,))
+    saved, target = cursor.fetchone()
+    conn.close()
+
+    variance = get_budget_variance(user_id, month)
+    budgeted = variance['total_budgeted_expenses'] if variance else 0
+    return {
+        'savings_rate_percentage': (monthly_income - spent) * 100 / monthly_income if monthly_income > 0 else None,
+        'debt_to_income': debt / (monthly_income * 12) if monthly_income > 0 else None,
+        'budget_variance_percentage': variance['variance'] * 100 / budgeted if budgeted > 0 else None,
+        'goal_progress_percentage': saved * 100 / target if target else None
+    }
+
+def build_chunk_sketches(user_ids, month):
+    sketches = {metric: QuantileSketch() for metric in COHORT_METRICS}
+    failures = {}
+    for user_id in user_ids:
+        try:
+            metrics = load_user_cohort_metrics(user_id, month)
+        except Exception as e:
+            failures[user_id] = str(e)
+            continue
+        for metric, value in metrics.items():
+            if value is not None:
+                sketches[metric].add(value)
+    return sketches, failures
+
+def compute_cohort_statistics(user_ids, month, max_workers=None):
+    chunks = [tuple(user_ids[i:i + COHORT_CHUNK_SIZE]) for i in range(0, len(user_ids), COHORT_CHUNK_SIZE)]
+    sketches = {metric: QuantileSketch() for metric in COHORT_METRICS}
+    failures = {}
+    for chunk, result, error in map_users(lambda chunk: build_chunk_sketches(chunk, month), chunks, max_workers):
+        if error is not None:
+            failures.update({user_id: str(error) for user_id in chunk})
+            continue
+        chunk_sketches, chunk_failures = result
+        for metric, sketch in chunk_sketches.items():
+            sketches[metric].merge(sketch)
+        failures.update(chunk_failures)
+    return {
+        'month': month,
+        'users': len(user_ids),
+        'metrics': {metric: sketch.summary() for metric, sketch in sketches.items()},
+        'failures': {str(user_id): error for user_id, error in sorted(failures.items())}
+    }
+
+def get_cohort_statistics(user_ids, month):
+    """
+    Percentiles of savings rate, debt-to-income, budget variance and goal progress across a
+    cohort for one month. Results are cached per (cohort, month) until one of the cohort's
+    databases changes or the day ends.
+    """
+    try:
+        datetime.strptime(month, '%Y-%m')
+    except (TypeError, ValueError):
+        raise ValueError("month must be in YYYY-MM format")
+    user_ids = sorted(user_id for user_id in set(user_ids) if user_db_exists(user_id))
+    if not user_ids:
+        raise ValueError("Cohort has no users with data")
+
+    key = (tuple(user_ids), month)
+    # Debt balances are computed as of today, so a cached result also expires with the day
+    fingerprint = (max(user_db_mtime(user_id) or 0 for user_id in user_ids), date.today())
+    with cohort_cache_lock:
+        cached = cohort_cache.get(key)
+        if cached and cached[0] == fingerprint:
+            cohort_cache.move_to_end(key)
+            return cached[1]
+
+    statistics = compute_cohort_statistics(user_ids, month)
+    with cohort_cache_lock:
+        cohort_cache[key] = (fingerprint, statistics)
+        cohort_cache.move_to_end(key)
+        while len(cohort_cache) > COHORT_CACHE_SIZE:
+            cohort_cache.popitem(last=False)
+    return statistics
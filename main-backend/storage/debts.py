@@ -2,30 +2,33 @@
 import json
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from utils.db import get_db_connection
+from utils.db import get_db_connection, fetch_dicts
+from .resources import resolve_projection, project
 
-def get_all_debts(user_id):
+# Computed fields of a debt listing and the stored columns they are derived from
+DEBT_METRIC_FIELDS = ['principal_paid', 'principal_pending', 'interest_paid', 'interest_pending', 'progress_percentage', 'remaining_balance']
+DEBT_METRIC_DEPENDENCIES = {field: ['amount', 'interest_rate', 'term', 'date'] for field in DEBT_METRIC_FIELDS}
+
+def get_all_debts(user_id, update_balances=True, fields=None):
+    # update_balances=False keeps this read-only (e.g. for admin/CFA views of someone else's data)
+    # fields limits the columns read, the JSON decoded and the metrics computed (None for everything)
     conn = get_db_connection(user_id)
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM debts WHERE user_id = ?', (user_id,))
-    debts = [dict(row) for row in cursor.fetchall()]
+    try:
+        columns, output_fields = resolve_projection(conn, 'debts', fields, DEBT_METRIC_DEPENDENCIES)
+    except ValueError:
+        conn.close()
+        raise
+    debts = fetch_dicts(conn, f'SELECT {columns} FROM debts WHERE user_id = ?', (user_id,))
+    with_metrics = output_fields is None or any(field in output_fields for field in DEBT_METRIC_FIELDS)
     for debt in debts:
         # Ensure fields are valid JSON strings
-        payment_history = debt.get('payment_history', '[]')
-        interest_rate_history = debt.get('interest_rate_history', '[]')
-        details = debt.get('details', '{}')
-
-        if not payment_history or payment_history == '':
-            debt['payment_history'] = '[]'
-        if not interest_rate_history or interest_rate_history == '':
-            debt['interest_rate_history'] = '[]'
-        if not details or details == '':
-            debt['details'] = '{}'
-
-        debt['payment_history'] = json.loads(debt['payment_history'])
-        debt['interest_rate_history'] = json.loads(debt['interest_rate_history'])
-        debt['details'] = json.loads(debt['details'])
+        for column, empty in [('payment_history', '[]'), ('interest_rate_history', '[]'), ('details', '{}')]:
+            if column in debt:
+                debt[column] = json.loads(debt[column] or empty)
 
+        if not with_metrics:
+            continue
         # Calculate debt metrics
         metrics = calculate_debt_metrics(
             principal=debt['amount'],
@@ -40,14 +43,20 @@ def get_all_debts(user_id):
         debt['progress_percentage'] = metrics['progress_percentage']
         # Update remaining_balance in the database
         debt['remaining_balance'] = debt['principal_pending']
-        cursor.execute(
-            'UPDATE debts SET remaining_balance = ? WHERE id = ? AND user_id = ?',
-            (debt['remaining_balance'], debt['id'], user_id)
-        )
+        if update_balances:
+            cursor.execute(
+                'UPDATE debts SET remaining_balance = ? WHERE id = ? AND user_id = ?',
+                (debt['remaining_balance'], debt['id'], user_id)
+            )
     conn.commit()
     conn.close()
-    return debts
+    return [project(debt, output_fields) for debt in debts]
+
 
+def pending_principal(debt):
+    # What is still owed today on a debt row (amount, interest_rate, term, date). The stored
+    # remaining_balance is only brought up to date when the debt list is read.
+    return calculate_debt_metrics(principal=debt['amount'], interest_rate=debt['interest_rate'], term=debt['term'], start_date=debt['date'])['principal_pending']
 
 def calculate_debt_metrics(principal, interest_rate, term, start_date):
     principal = float(principal)
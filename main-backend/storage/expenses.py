@@ -1,12 +1,15 @@
 # main-backend/storage/expenses.py
-from utils.db import get_db_connection
-from .resources import initialize_db
+from utils.db import get_db_connection, fetch_dicts
+from .resources import initialize_db, resolve_projection, project
 
-def get_all_expenses(user_id):
+def get_all_expenses(user_id, fields=None):
     conn = get_db_connection(user_id)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM expenses WHERE user_id = ?', (user_id,))
-    expenses = [dict(row) for row in cursor.fetchall()]
+    try:
+        columns, output_fields = resolve_projection(conn, 'expenses', fields)
+    except ValueError:
+        conn.close()
+        raise
+    expenses = [project(row, output_fields) for row in fetch_dicts(conn, f'SELECT {columns} FROM expenses WHERE user_id = ?', (user_id,))]
     conn.close()
     return expenses
 
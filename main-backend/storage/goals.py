@@ -1,17 +1,21 @@
 # main-backend/storage/goals.py
 import json
 from datetime import datetime
-from utils.db import get_db_connection
-from .resources import initialize_db
+from utils.db import get_db_connection, fetch_dicts
+from .resources import initialize_db, resolve_projection, project
 from .income import get_income_by_id
 
-def get_all_goals(user_id):
+def get_all_goals(user_id, fields=None):
     conn = get_db_connection(user_id)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM goals WHERE user_id = ?', (user_id,))
-    goals = [dict(row) for row in cursor.fetchall()]
+    try:
+        columns, output_fields = resolve_projection(conn, 'goals', fields)
+    except ValueError:
+        conn.close()
+        raise
+    goals = [project(row, output_fields) for row in fetch_dicts(conn, f'SELECT {columns} FROM goals WHERE user_id = ?', (user_id,))]
     for goal in goals:
-        goal['allocations'] = json.loads(goal['allocations']) if goal['allocations'] else []
+        if 'allocations' in goal:
+            goal['allocations'] = json.loads(goal['allocations']) if goal['allocations'] else []
     conn.close()
     return goals
 
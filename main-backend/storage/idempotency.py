@@ -0,0 +1,26 @@
+# main-backend/storage/idempotency.py
+import os
+import time
+
+# Responses stored under an Idempotency-Key are replayed for this many seconds
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 3600)))
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+def get_stored_response(conn, key):
+    """
+    The stored response for an unexpired key as a row (request_hash, status, content_type,
+    body), or None.
+    """
+    return conn.execute(
+        'SELECT request_hash, status, content_type, body FROM idempotency_keys WHERE key = ? AND created_at > ?',
+        (key, time.time() - IDEMPOTENCY_KEY_TTL)
+    ).fetchone()
+
+def store_response(conn, key, request_hash, status, content_type, body):
+    # Expired keys are purged here rather than by a job; the table only ever holds a TTL's worth
+    now = time.time()
+    conn.execute('DELETE FROM idempotency_keys WHERE created_at <= ?', (now - IDEMPOTENCY_KEY_TTL,))
+    conn.execute(
+        'INSERT OR REPLACE INTO idempotency_keys (key, request_hash, status, content_type, body, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+        (key, request_hash, status, content_type, body, now)
+    )
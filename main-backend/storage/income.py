@@ -1,14 +1,17 @@
 # main-backend/storage/income.py
 import json
 from datetime import datetime
-from utils.db import get_db_connection
-from .resources import initialize_db
+from utils.db import get_db_connection, fetch_dicts
+from .resources import initialize_db, resolve_projection, project
 
-def get_all_income(user_id):
+def get_all_income(user_id, fields=None):
     conn = get_db_connection(user_id)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM income WHERE user_id = ?', (user_id,))
-    incomes = [dict(row) for row in cursor.fetchall()]
+    try:
+        columns, output_fields = resolve_projection(conn, 'income', fields)
+    except ValueError:
+        conn.close()
+        raise
+    incomes = [project(row, output_fields) for row in fetch_dicts(conn, f'SELECT {columns} FROM income WHERE user_id = ?', (user_id,))]
     conn.close()
     return incomes
 
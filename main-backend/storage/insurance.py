@@ -1,11 +1,18 @@
 # main-backend/storage/insurance.py
-from utils.db import get_db_connection
-from .resources import initialize_db
+import sqlite3
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from utils.db import get_db_connection, fetch_dicts
+from utils.parallel import map_users
+from .resources import initialize_db, resolve_projection, project
 
 # Define valid insurance types and premium terms
 VALID_INSURANCE_TYPES = ["Medical", "Term", "Asset", "Special"]
 VALID_PREMIUM_TERMS = ["monthly", "quarterly", "yearly"]
 
+# Months between premium payments for each term
+PREMIUM_TERM_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
 def validate_insurance_data(data):
     """
     Validate insurance data.
@@ -21,11 +28,83 @@ def validate_insurance_data(data):
         return False, "Maturity value must be a non-negative number"
     return True, None
 
-def get_all_insurance(user_id):
-    conn = get_db_connection(user_id)
+def annualize_premium(premium, premium_term):
+    return round(float(premium) * 12 / PREMIUM_TERM_MONTHS[premium_term], 2)
+
+def premium_due_dates(start_date, end_date, premium_term, window_start, window_end):
+    """
+    Premium due dates (YYYY-MM-DD) falling in [window_start, window_end] and within the policy term.
+    Dues fall on start_date and every term after it.
+    """
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        window_start = datetime.strptime(window_start, '%Y-%m-%d').date()
+        window_end = datetime.strptime(window_end, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return []
+    step = PREMIUM_TERM_MONTHS.get(premium_term)
+    if step is None:
+        return []
+
+    # Jump straight to the first due date on or after the window start
+    periods = 0
+    if window_start > start:
+        months = (window_start.year - start.year) * 12 + window_start.month - start.month
+        periods = max(months // step - 1, 0)
+        while start + relativedelta(months=periods * step) < window_start:
+            periods += 1
+
+    due_dates = []
+    due = start + relativedelta(months=periods * step)
+    while due <= window_end and due <= end:
+        due_dates.append(due.strftime('%Y-%m-%d'))
+        periods += 1
+        due = start + relativedelta(months=periods * step)
+    return due_dates
+
+def next_premium_due_date(start_date, end_date, premium_term, is_active, today=None):
+    if not is_active:
+        return None
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    due_dates = premium_due_dates(start_date, end_date, premium_term, today, end_date)
+    return due_dates[0] if due_dates else None
+
+def refresh_premium_schedule(conn, user_id, today=None):
+    """
+    Roll next_due_date forward for active policies whose due date has passed (or was never set),
+    and fill in annualized_premium for rows that predate it. Run by
+    jobs/refresh_premium_schedules.py. Only rows that need it are touched, via the
+    (is_active, next_due_date) index. Policies with no due dates left keep next_due_date NULL
+    and are not looked at again.
+    """
+    today = today or datetime.now().strftime('%Y-%m-%d')
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM insurance WHERE user_id = ?', (user_id,))
-    insurance = [dict(row) for row in cursor.fetchall()]
+    cursor.execute(
+        '''SELECT id, premium, premium_term, start_date, end_date, is_active, annualized_premium, next_due_date FROM insurance
+           WHERE user_id = ? AND is_active = 1
+             AND (next_due_date < ? OR annualized_premium IS NULL OR (next_due_date IS NULL AND end_date >= ?))''',
+        (user_id, today, today)
+    )
+    updates = []
+    for row in cursor.fetchall():
+        annualized_premium = annualize_premium(row['premium'], row['premium_term']) if row['premium_term'] in PREMIUM_TERM_MONTHS else None
+        next_due_date = next_premium_due_date(row['start_date'], row['end_date'], row['premium_term'], row['is_active'], today)
+        # Unchanged rows aren't rewritten, so they don't bump the data version
+        if (annualized_premium, next_due_date) != (row['annualized_premium'], row['next_due_date']):
+            updates.append((annualized_premium, next_due_date, row['id']))
+    if updates:
+        cursor.executemany('UPDATE insurance SET annualized_premium = ?, next_due_date = ? WHERE id = ?', updates)
+        conn.commit()
+
+def get_all_insurance(user_id, fields=None):
+    conn = get_db_connection(user_id)
+    try:
+        columns, output_fields = resolve_projection(conn, 'insurance', fields)
+    except ValueError:
+        conn.close()
+        raise
+    insurance = [project(row, output_fields) for row in fetch_dicts(conn, f'SELECT {columns} FROM insurance WHERE user_id = ?', (user_id,))]
     conn.close()
     return insurance
 
@@ -37,7 +116,7 @@ def add_insurance(user_id, data):
     conn = get_db_connection(user_id)
     cursor = conn.cursor()
     cursor.execute(
-        'INSERT INTO insurance (user_id, name, insurance_type, premium, coverage, premium_term, start_date, end_date, is_active, maturity_value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        'INSERT INTO insurance (user_id, name, insurance_type, premium, coverage, premium_term, start_date, end_date, is_active, maturity_value, annualized_premium, next_due_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
         (
             user_id,
             data['name'],
@@ -48,7 +127,9 @@ def add_insurance(user_id, data):
             data['start_date'],
             data['end_date'],
             1 if data['is_active'] else 0,
-            data['maturity_value']
+            data['maturity_value'],
+            annualize_premium(data['premium'], data['premium_term']),
+            next_premium_due_date(data['start_date'], data['end_date'], data['premium_term'], data['is_active'])
         )
     )
     conn.commit()
@@ -66,7 +147,7 @@ def update_insurance(user_id, insurance_id, data):
     conn = get_db_connection(user_id)
     cursor = conn.cursor()
     cursor.execute(
-        'UPDATE insurance SET name = ?, insurance_type = ?, premium = ?, coverage = ?, premium_term = ?, start_date = ?, end_date = ?, is_active = ?, maturity_value = ? WHERE id = ? AND user_id = ?',
+        'UPDATE insurance SET name = ?, insurance_type = ?, premium = ?, coverage = ?, premium_term = ?, start_date = ?, end_date = ?, is_active = ?, maturity_value = ?, annualized_premium = ?, next_due_date = ? WHERE id = ? AND user_id = ?',
         (
             data['name'],
             data['insurance_type'],
@@ -77,6 +158,8 @@ def update_insurance(user_id, insurance_id, data):
             data['end_date'],
             1 if data['is_active'] else 0,
             data['maturity_value'],
+            annualize_premium(data['premium'], data['premium_term']),
+            next_premium_due_date(data['start_date'], data['end_date'], data['premium_term'], data['is_active']),
             insurance_id,
             user_id
         )
@@ -95,3 +178,84 @@ def delete_insurance(user_id, insurance_id):
     conn.commit()
     conn.close()
     return success
+
+def get_insurance_calendar(user_id, start=None, end=None):
+    """
+    Premiums due and policies expiring in [start, end] (YYYY-MM-DD, default the next 30 days).
+    """
+    try:
+        start_date = datetime.strptime(start, '%Y-%m-%d') if start else datetime.now()
+        end_date = datetime.strptime(end, '%Y-%m-%d') if end else start_date + timedelta(days=30)
+    except ValueError:
+        raise ValueError("Dates must be in YYYY-MM-DD format")
+    if start_date > end_date:
+        raise ValueError("Start date must not be after end date")
+    start = start_date.strftime('%Y-%m-%d')
+    end = end_date.strftime('%Y-%m-%d')
+
+    # Read-only: due dates are generated for the window from each policy's terms, so windows
+    # in the past work too; the stored next_due_date is kept current by add/update and by
+    # jobs/refresh_premium_schedules.py
+    conn = get_db_connection(user_id)
+    cursor = conn.cursor()
+    cursor.execute(
+        '''SELECT id, name, insurance_type, premium, premium_term, annualized_premium, start_date, end_date
+           FROM insurance WHERE user_id = ? AND is_active = 1 AND start_date <= ? AND end_date >= ?''',
+        (user_id, end, start)
+    )
+    due_premiums = []
+    for row in cursor.fetchall():
+        for due_date in premium_due_dates(row['start_date'], row['end_date'], row['premium_term'], start, end):
+            due_premiums.append({**dict(row), 'due_date': due_date})
+    due_premiums.sort(key=lambda due: due['due_date'])
+
+    cursor.execute(
+        '''SELECT * FROM insurance WHERE user_id = ? AND is_active = 1 AND end_date BETWEEN ? AND ?
+           ORDER BY end_date''',
+        (user_id, start, end)
+    )
+    expiring_policies = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    return {
+        'start_date': start,
+        'end_date': end,
+        'due_premiums': due_premiums,
+        'total_due': round(sum(float(due['premium']) for due in due_premiums), 2),
+        'expiring_policies': expiring_policies
+    }
+
+def get_expiring_policies(user_id, days):
+    end = (datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d')
+    conn = get_db_connection(user_id)
+    cursor = conn.cursor()
+    cursor.execute(
+        '''SELECT * FROM insurance WHERE user_id = ? AND is_active = 1 AND end_date BETWEEN ? AND ?
+           ORDER BY end_date''',
+        (user_id, datetime.now().strftime('%Y-%m-%d'), end)
+    )
+    policies = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return policies
+
+def scan_expiring_policies(user_ids, days, max_workers=None):
+    """
+    Find active policies expiring in the next `days` days across many user databases in parallel.
+    Returns ({user_id: [policies]} for users with matches, {user_id: error message}).
+    """
+    def scan(user_id):
+        try:
+            return get_expiring_policies(user_id, days)
+        except sqlite3.OperationalError:
+            # Database predates the current schema; migrate it and retry once
+            initialize_db(user_id)
+            return get_expiring_policies(user_id, days)
+
+    expiring = {}
+    failures = {}
+    for user_id, policies, error in map_users(scan, user_ids, max_workers):
+        if error is not None:
+            failures[user_id] = str(error)
+        elif policies:
+            expiring[user_id] = policies
+    return expiring, failures
@@ -1,7 +1,7 @@
 # main-backend/storage/investments.py
 import json
-from utils.db import get_db_connection
-from .resources import initialize_db
+from utils.db import get_db_connection, fetch_dicts
+from .resources import initialize_db, INVESTMENT_DETAIL_COLUMNS, resolve_projection, project
 
 # Define required fields for each investment type
 INVESTMENT_TYPE_FIELDS = {
@@ -35,14 +35,63 @@ def validate_investment_details(type, details):
         elif field == "location" and (not isinstance(details[field], str) or not details[field].strip()):
             return False, f"'{field}' must be a non-empty string"
 
+    # Optional instrument identifier used to match holdings against the shared price store
+    if 'symbol' in details and (not isinstance(details['symbol'], str) or not details['symbol'].strip()):
+        return False, "'symbol' must be a non-empty string"
+
     return True, None
 
-def get_all_investments(user_id):
+# Columns the investments listing can be sorted on, besides the extracted detail fields
+INVESTMENT_SORT_COLUMNS = ['id', 'name', 'type', 'date']
+
+def strip_detail_columns(investment):
+    for field in INVESTMENT_DETAIL_COLUMNS:
+        investment.pop(f'details_{field}', None)
+    return investment
+
+def get_all_investments(user_id, filters=None, sort_by=None, order='asc', fields=None):
+    """
+    List investments, optionally filtered and sorted in SQL on the generated detail columns.
+    filters: dict of field -> (min, max); either bound may be None. 'type' filters on the investment type.
+    fields: columns to return (None for all).
+    """
+    query = 'FROM investments WHERE user_id = ?'
+    params = [user_id]
+    for field, bounds in (filters or {}).items():
+        if field == 'type':
+            query += ' AND type = ?'
+            params.append(bounds)
+            continue
+        if field not in INVESTMENT_DETAIL_COLUMNS:
+            raise ValueError(f"Invalid filter field: {field}. Must be one of {list(INVESTMENT_DETAIL_COLUMNS.keys())}")
+        minimum, maximum = bounds
+        if minimum is not None:
+            query += f' AND details_{field} >= ?'
+            params.append(minimum)
+        if maximum is not None:
+            query += f' AND details_{field} <= ?'
+            params.append(maximum)
+    if sort_by is not None:
+        if sort_by in INVESTMENT_DETAIL_COLUMNS:
+            sort_column = f'details_{sort_by}'
+        elif sort_by in INVESTMENT_SORT_COLUMNS:
+            sort_column = sort_by
+        else:
+            raise ValueError(f"Invalid sort field: {sort_by}. Must be one of {INVESTMENT_SORT_COLUMNS + list(INVESTMENT_DETAIL_COLUMNS.keys())}")
+        if order not in ['asc', 'desc']:
+            raise ValueError("Order must be 'asc' or 'desc'")
+        query += f' ORDER BY {sort_column} {order.upper()}, id'
+
     conn = get_db_connection(user_id)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM investments WHERE user_id = ?', (user_id,))
-    investments = [dict(row) for row in cursor.fetchall()]
+    try:
+        columns, output_fields = resolve_projection(conn, 'investments', fields)
+    except ValueError:
+        conn.close()
+        raise
+    investments = [project(strip_detail_columns(row), output_fields) for row in fetch_dicts(conn, f'SELECT {columns} {query}', params)]
     for investment in investments:
+        if 'details' not in investment:
+            continue
         if investment['details']:
             investment['details'] = json.loads(investment['details'])
         else:
@@ -66,7 +115,7 @@ def add_investment(user_id, data):
     conn.commit()
     investment_id = cursor.lastrowid
     cursor.execute('SELECT * FROM investments WHERE id = ?', (investment_id,))
-    investment = dict(cursor.fetchone())
+    investment = strip_detail_columns(dict(cursor.fetchone()))
     investment['details'] = json.loads(investment['details']) if investment['details'] else {}
     conn.close()
     return investment
@@ -86,7 +135,7 @@ def update_investment(user_id, investment_id, data):
     )
     conn.commit()
     cursor.execute('SELECT * FROM investments WHERE id = ?', (investment_id,))
-    investment = dict(cursor.fetchone()) if cursor.rowcount > 0 else None
+    investment = strip_detail_columns(dict(cursor.fetchone())) if cursor.rowcount > 0 else None
     if investment:
         investment['details'] = json.loads(investment['details']) if investment['details'] else {}
     conn.close()
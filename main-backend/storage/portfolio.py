@@ -0,0 +1,188 @@
+# main-backend/storage/portfolio.py
+import json
+import threading
+import numpy as np
+from utils.db import get_db_connection
+from .investments import INVESTMENT_TYPE_FIELDS
+from .resources import get_user_data_version
+
+# For each investment type: (purchase price field, current price field, quantity field).
+# A quantity field of None means the prices are already totals for the holding.
+VALUATION_FIELDS = {
+    "Mutual Funds": ("nav", "current_nav", "units"),
+    "Stocks": ("purchase_price", "current_price", "quantity"),
+    "Real Estate": ("purchase_price", "current_value", None),
+    "Gold": ("purchase_price", "current_market_value", "weight")
+}
+
+# Current-value fields that hold the holding's total value rather than a per-unit price
+TOTAL_VALUE_FIELDS = {"current_value", "current_market_value"}
+
+INVESTMENT_TYPES = list(INVESTMENT_TYPE_FIELDS.keys())
+
+# Cached summaries keyed by user_id -> (investments data version, summary)
+summary_cache = {}
+summary_cache_lock = threading.Lock()
+
+def reset_summary_cache():
+    # For forked worker processes: start empty, with a lock no other process can hold
+    global summary_cache, summary_cache_lock
+    summary_cache = {}
+    summary_cache_lock = threading.Lock()
+
+def to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+def load_holdings(user_id):
+    """
+    Decode every holding's details once into columnar arrays.
+    Returns (ids, names, types, type_index, cost, value, purchase_dates).
+    """
+    conn = get_db_connection(user_id)
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, name, type, details FROM investments WHERE user_id = ?', (user_id,))
+    rows = cursor.fetchall()
+    conn.close()
+
+    count = len(rows)
+    ids = np.empty(count, dtype=np.int64)
+    type_index = np.full(count, -1, dtype=np.int64)
+    purchase_price = np.zeros(count, dtype=np.float64)
+    current_price = np.zeros(count, dtype=np.float64)
+    quantity = np.ones(count, dtype=np.float64)
+    value_quantity = np.ones(count, dtype=np.float64)
+    names = []
+    types = []
+    purchase_dates = []
+
+    # Holdings of unknown types stay in the listing but are valued at zero
+    for i, row in enumerate(rows):
+        ids[i] = row['id']
+        names.append(row['name'])
+        types.append(row['type'])
+        fields = VALUATION_FIELDS.get(row['type'])
+        details = json.loads(row['details']) if row['details'] and fields else {}
+        purchase_dates.append(details.get('purchase_date'))
+        if fields is None:
+            continue
+        purchase_field, current_field, quantity_field = fields
+        type_index[i] = INVESTMENT_TYPES.index(row['type'])
+        purchase_price[i] = to_float(details.get(purchase_field))
+        current_price[i] = to_float(details.get(current_field))
+        if quantity_field is not None:
+            quantity[i] = to_float(details.get(quantity_field))
+            if current_field not in TOTAL_VALUE_FIELDS:
+                value_quantity[i] = quantity[i]
+
+    known = type_index >= 0
+    cost = np.where(known, purchase_price * quantity, 0.0)
+    value = np.where(known, current_price * value_quantity, 0.0)
+    return ids, names, types, type_index, cost, value, purchase_dates
+
+def percentage(gain, cost):
+    return np.divide(gain * 100, cost, out=np.zeros_like(gain), where=cost > 0)
+
+def compute_portfolio_summary(user_id):
+    ids, names, types, type_index, cost, value, _ = load_holdings(user_id)
+    known = type_index >= 0
+    gain = value - cost
+    gain_pct = percentage(gain, cost)
+
+    type_slots = np.where(known, type_index, len(INVESTMENT_TYPES))
+    bins = len(INVESTMENT_TYPES) + 1
+    type_count = np.bincount(type_slots, minlength=bins)[:-1]
+    type_cost = np.bincount(type_slots, weights=cost, minlength=bins)[:-1]
+    type_value = np.bincount(type_slots, weights=value, minlength=bins)[:-1]
+    type_gain = type_value - type_cost
+    type_gain_pct = percentage(type_gain, type_cost)
+
+    holdings = [
+        {
+            'id': int(ids[i]),
+            'name': names[i],
+            'type': types[i],
+            'cost': round(float(cost[i]), 2),
+            'value': round(float(value[i]), 2),
+            'gain': round(float(gain[i]), 2),
+            'gain_percentage': round(float(gain_pct[i]), 2)
+        }
+        for i in range(len(names))
+    ]
+    by_type = {
+        investment_type: {
+            'count': int(type_count[t]),
+            'cost': round(float(type_cost[t]), 2),
+            'value': round(float(type_value[t]), 2),
+            'gain': round(float(type_gain[t]), 2),
+            'gain_percentage': round(float(type_gain_pct[t]), 2)
+        }
+        for t, investment_type in enumerate(INVESTMENT_TYPES)
+        if type_count[t] > 0
+    }
+    total_cost = float(cost.sum())
+    total_value = float(value.sum())
+    total_gain = total_value - total_cost
+    total = {
+        'cost': round(total_cost, 2),
+        'value': round(total_value, 2),
+        'gain': round(total_gain, 2),
+        'gain_percentage': round(total_gain * 100 / total_cost, 2) if total_cost > 0 else 0
+    }
+    return {'holdings': holdings, 'by_type': by_type, 'total': total}
+
+def get_portfolio_summary(user_id):
+    # The investments table's data version also moves when batch jobs write from other processes
+    version = get_user_data_version(user_id, ['investments'])[0]
+    cached = summary_cache.get(user_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    summary = compute_portfolio_summary(user_id)
+    with summary_cache_lock:
+        # Only store if no write landed while we were computing
+        if get_user_data_version(user_id, ['investments'])[0] == version:
+            summary_cache[user_id] = (version, summary)
+    return summary
+
+def revalued_details_sql():
+    """
+    SQL expression producing a holding's details with its current-value field set from the
+    attached price store row p. Total-value fields (e.g. Gold's current_market_value) are
+    priced per unit of the holding's quantity field.
+    """
+    cases = []
+    for investment_type, (purchase_field, current_field, quantity_field) in VALUATION_FIELDS.items():
+        value = 'p.price'
+        if current_field in TOTAL_VALUE_FIELDS and quantity_field is not None:
+            value = f'p.price * investments.details_{quantity_field}'
+        cases.append(f"WHEN '{investment_type}' THEN json_set(investments.details, '$.{current_field}', {value})")
+    return f"CASE investments.type {' '.join(cases)} ELSE investments.details END"
+
+def revalue_holdings(user_id, price_db_path):
+    """
+    Set the current-value field of every holding with a symbol in the price store, in one
+    set-based UPDATE. Returns the number of holdings whose details changed.
+    """
+    new_details = revalued_details_sql()
+    conn = get_db_connection(user_id)
+    try:
+        conn.execute('ATTACH DATABASE ? AS price_store', (price_db_path,))
+        cursor = conn.execute(
+            f"""
+            UPDATE investments SET details = {new_details}
+            FROM price_store.prices AS p
+            WHERE investments.user_id = ?
+              AND investments.details_symbol = p.symbol
+              AND investments.details IS NOT {new_details}
+            """,
+            (user_id,)
+        )
+        updated = cursor.rowcount
+        conn.commit()
+        conn.execute('DETACH DATABASE price_store')
+    finally:
+        conn.close()
+    return updated
@@ -0,0 +1,296 @@
+# main-backend/storage/price_history.py
+import os
+import re
+import struct
+import threading
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+from utils.db import get_db_connection, project_root
+from .portfolio import VALUATION_FIELDS
+
+# One append-only file per instrument: a fixed header followed by one little-endian float64
+# closing price per calendar day. Days without a quote carry the previous price forward.
+HISTORY_DIR = os.path.join(project_root, 'db', 'price_history')
+HEADER = struct.Struct('<8sq')  # magic, ordinal of the first stored day
+MAGIC = b'PXHIST01'
+PRICE_DTYPE = np.dtype('<f8')
+
+# Open memory maps keyed by symbol -> (file size when mapped, first day ordinal, memmap)
+history_maps = {}
+history_lock = threading.Lock()
+
+def reset_history_maps():
+    # For forked worker processes: map the files afresh, with a lock no other process can hold
+    global history_maps, history_lock
+    history_maps = {}
+    history_lock = threading.Lock()
+
+def history_path(symbol):
+    if not isinstance(symbol, str) or not re.fullmatch(r'[A-Za-z0-9._-]+', symbol):
+        raise ValueError(f"Invalid symbol: {symbol}")
+    return os.path.join(HISTORY_DIR, f'{symbol}.f64')
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        magic, first_day = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a price history file")
+    return first_day
+
+def open_series(symbol):
+    """
+    Return (first day ordinal, read-only float64 memmap) for a symbol, or (None, None) if
+    there is no history. The map is reused until the file grows.
+    """
+    try:
+        size = os.path.getsize(history_path(symbol))
+    except (OSError, ValueError):
+        return None, None
+    if size <= HEADER.size:
+        return None, None
+
+    cached = history_maps.get(symbol)
+    if cached and cached[0] == size:
+        return cached[1], cached[2]
+
+    path = history_path(symbol)
+    first_day = read_header(path)
+    count = (size - HEADER.size) // PRICE_DTYPE.itemsize
+    series = np.memmap(path, dtype=PRICE_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+    with history_lock:
+        history_maps[symbol] = (size, first_day, series)
+    return first_day, series
+
+def append_prices(symbol, rows):
+    """
+    Append (date string, price) rows to a symbol's history. Rows on or before the last stored
+    day are skipped, so re-loading the same feed is harmless. Returns the number of days written.
+    """
+    path = history_path(symbol)
+    rows = sorted((datetime.strptime(day, '%Y-%m-%d').date().toordinal(), float(price)) for day, price in rows)
+    if not rows:
+        return 0
+
+    with history_lock:
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER.size:
+            first_day = read_header(path)
+            count = (os.path.getsize(path) - HEADER.size) // PRICE_DTYPE.itemsize
+            last_price = None
+            if count:
+                with open(path, 'rb') as f:
+                    f.seek(HEADER.size + (count - 1) * PRICE_DTYPE.itemsize)
+                    last_price = float(np.frombuffer(f.read(PRICE_DTYPE.itemsize), dtype=PRICE_DTYPE)[0])
+            next_day = first_day + count
+        else:
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, rows[0][0]))
+            next_day = rows[0][0]
+            last_price = None
+
+        rows = [(day, price) for day, price in rows if day >= next_day]
+        if not rows:
+            return 0
+
+        # Lay the new quotes out day by day, carrying the last price across gaps
+        days = np.array([day for day, _ in rows], dtype=np.int64) - next_day
+        prices = np.array([price for _, price in rows], dtype=PRICE_DTYPE)
+        values = np.full(days[-1] + 1, np.nan, dtype=PRICE_DTYPE)
+        values[days] = prices
+        if last_price is not None and np.isnan(values[0]):
+            values[0] = last_price
+        filled = np.where(np.isnan(values), 0, np.arange(len(values)))
+        values = values[np.maximum.accumulate(filled)]
+
+        with open(path, 'ab') as f:
+            f.write(values.tobytes())
+        return len(values)
+
+def get_price_history_version():
+    """
+    (version, changed_at) of the price history files. The files are append-only, so their
+    total size changes with every append; changed_at is the latest write (UTC).
+    """
+    files = total_size = 0
+    latest = None
+    try:
+        entries = list(os.scandir(HISTORY_DIR))
+    except FileNotFoundError:
+        entries = []
+    for entry in entries:
+        if not entry.name.endswith('.f64'):
+            continue
+        stat = entry.stat()
+        files += 1
+        total_size += stat.st_size
+        latest = max(latest or 0, stat.st_mtime)
+    changed_at = datetime.fromtimestamp(latest, timezone.utc).strftime('%Y-%m-%d %H:%M:%S') if latest else None
+    return f'{files}.{total_size}', changed_at
+
+def price_window(symbol, start_day, end_day):
+    """
+    Prices for each day in [start_day, end_day] (ordinals) as a float64 array, NaN before the
+    first stored day and the last price carried forward after the last one. Returns None
+    when the symbol has no history. Windows inside the stored range are zero-copy views.
+    """
+    first_day, series = open_series(symbol)
+    if series is None:
+        return None
+    lo = start_day - first_day
+    hi = end_day - first_day + 1
+    if lo >= 0 and hi <= len(series):
+        return series[lo:hi]
+
+    window = np.full(end_day - start_day + 1, np.nan, dtype=PRICE_DTYPE)
+    src_lo = max(lo, 0)
+    src_hi = min(hi, len(series))
+    if src_lo < src_hi:
+        window[src_lo - lo:src_hi - lo] = series[src_lo:src_hi]
+    if hi > len(series):
+        window[max(len(series) - lo, 0):] = series[-1]
+    return window
+
+def parse_date_range(start, end):
+    """
+    Parse optional YYYY-MM-DD bounds into day ordinals; defaults to the year ending today.
+    """
+    try:
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else date.today()
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else end_date - timedelta(days=365)
+    except ValueError:
+        raise ValueError("Dates must be in YYYY-MM-DD format")
+    if start_date > end_date:
+        raise ValueError("Start date must not be after end date")
+    return start_date.toordinal(), end_date.toordinal()
+
+def load_priced_holdings(user_id, investment_id=None):
+    """
+    Read symbol, quantity and purchase date for holdings straight from the generated detail
+    columns, without decoding details JSON.
+    """
+    quantity_columns = sorted({fields[2] for fields in VALUATION_FIELDS.values() if fields[2]})
+    query = (
+        f"SELECT id, name, type, details_symbol, details_purchase_date, "
+        f"{', '.join(f'details_{column}' for column in quantity_columns)} "
+        f"FROM investments WHERE user_id = ? AND details_symbol IS NOT NULL"
+    )
+    params = [user_id]
+    if investment_id is not None:
+        query += ' AND id = ?'
+        params.append(investment_id)
+
+    conn = get_db_connection(user_id)
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    holdings = []
+    for row in cursor.fetchall():
+        fields = VALUATION_FIELDS.get(row['type'])
+        if fields is None:
+            continue
+        quantity = row[f'details_{fields[2]}'] if fields[2] else 1.0
+        try:
+            purchase_day = datetime.strptime(row['details_purchase_date'], '%Y-%m-%d').date().toordinal()
+        except (TypeError, ValueError):
+            purchase_day = None
+        holdings.append({
+            'id': row['id'],
+            'name': row['name'],
+            'symbol': row['details_symbol'],
+            'quantity': float(quantity or 0),
+            'purchase_day': purchase_day
+        })
+    conn.close()
+    return holdings
+
+def series_response(start_day, values):
+    # Dates are implied: one value per calendar day from start_date
+    return {
+        'start_date': date.fromordinal(start_day).isoformat(),
+        'end_date': date.fromordinal(start_day + len(values) - 1).isoformat() if len(values) else None,
+        'values': np.round(values, 2).tolist()
+    }
+
+def get_holding_value_series(user_id, investment_id, start=None, end=None):
+    start_day, end_day = parse_date_range(start, end)
+    holdings = load_priced_holdings(user_id, investment_id)
+    if not holdings:
+        return None
+    holding = holdings[0]
+    if holding['purchase_day']:
+        start_day = max(start_day, holding['purchase_day'])
+    if start_day > end_day:
+        return {'id': holding['id'], 'symbol': holding['symbol'], **series_response(start_day, np.empty(0))}
+
+    prices = price_window(holding['symbol'], start_day, end_day)
+    if prices is None:
+        prices = np.empty(0)
+    else:
+        # Skip days before the instrument's first quote
+        known = np.flatnonzero(~np.isnan(prices))
+        offset = int(known[0]) if len(known) else len(prices)
+        prices = prices[offset:]
+        start_day += offset
+    return {'id': holding['id'], 'symbol': holding['symbol'], **series_response(start_day, prices * holding['quantity'])}
+
+def get_portfolio_value_series(user_id, start=None, end=None):
+    start_day, end_day = parse_date_range(start, end)
+    totals = np.zeros(end_day - start_day + 1, dtype=np.float64)
+    priced = np.zeros(len(totals), dtype=bool)
+    holding_ids = []
+    for holding in load_priced_holdings(user_id):
+        holding_start = max(start_day, holding['purchase_day'] or start_day)
+        if holding_start > end_day:
+            continue
+        prices = price_window(holding['symbol'], holding_start, end_day)
+        if prices is None:
+            continue
+        offset = holding_start - start_day
+        has_price = ~np.isnan(prices)
+        totals[offset:] += np.where(has_price, prices, 0.0) * holding['quantity']
+        priced[offset:] |= has_price
+        holding_ids.append(holding['id'])
+
+    # Start the series at the first day any holding had a price
+    known = np.flatnonzero(priced)
+    first = int(known[0]) if len(known) else len(totals)
+    return {'holdings': holding_ids, **series_response(start_day + first, totals[first:])}
+
+def get_time_weighted_returns(user_id, start=None, end=None):
+    """
+    Time-weighted return over [start, end] for each holding with price history and for the
+    portfolio. Holdings first priced inside the window enter as external flows at that day's
+    value, so they don't count as growth. Returns None for the portfolio when nothing is priced.
+    """
+    start_day, end_day = parse_date_range(start, end)
+    totals = np.zeros(end_day - start_day + 1, dtype=np.float64)
+    inflows = np.zeros(len(totals), dtype=np.float64)
+    holding_returns = {}
+    for holding in load_priced_holdings(user_id):
+        holding_start = max(start_day, holding['purchase_day'] or start_day)
+        if holding_start > end_day:
+            continue
+        prices = price_window(holding['symbol'], holding_start, end_day)
+        if prices is None:
+            continue
+        known = np.flatnonzero(~np.isnan(prices))
+        if not len(known) or prices[known[0]] <= 0:
+            continue
+        prices = prices[known[0]:]
+        holding_returns[holding['id']] = float(prices[-1] / prices[0] - 1)
+        offset = holding_start - start_day + int(known[0])
+        values = prices * holding['quantity']
+        totals[offset:] += values
+        if offset > 0:
+            inflows[offset] += values[0]
+
+    portfolio_return = None
+    if totals.any():
+        previous = totals[:-1]
+        ratios = np.divide(totals[1:] - inflows[1:], previous, out=np.ones(len(previous)), where=previous > 0)
+        portfolio_return = float(np.prod(ratios) - 1)
+    return {
+        'start_date': date.fromordinal(start_day).isoformat(),
+        'end_date': date.fromordinal(end_day).isoformat(),
+        'holdings': holding_returns,
+        'portfolio': portfolio_return
+    }
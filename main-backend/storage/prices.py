@@ -0,0 +1,89 @@
+# main-backend/storage/prices.py
+import csv
+from datetime import datetime
+from utils.db import get_shared_db_connection, get_shared_db_path
+
+# Shared price table keyed by instrument identifier (the optional 'symbol' in investment details)
+PRICE_DB_NAME = 'prices.db'
+
+def price_db_path():
+    return get_shared_db_path(PRICE_DB_NAME)
+
+def init_price_db():
+    conn = get_shared_db_connection(PRICE_DB_NAME)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS prices (
+            symbol TEXT PRIMARY KEY,
+            price REAL NOT NULL,
+            price_date TEXT NOT NULL,
+            source TEXT,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+def read_price_csv(path):
+    """
+    Read a price CSV with a header row of symbol,price[,date].
+    Rows without a date use today's date. Returns a list of (symbol, price, price_date) tuples.
+    """
+    today = datetime.now().strftime('%Y-%m-%d')
+    rows = []
+    with open(path, newline='') as f:
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            symbol = (row.get('symbol') or '').strip()
+            if not symbol:
+                raise ValueError(f"{path}:{line_number}: missing symbol")
+            try:
+                price = float(row.get('price'))
+            except (ValueError, TypeError):
+                raise ValueError(f"{path}:{line_number}: price must be a valid number")
+            if price <= 0:
+                raise ValueError(f"{path}:{line_number}: price must be a positive number")
+            rows.append((symbol, price, (row.get('date') or '').strip() or today))
+    return rows
+
+def load_prices_from_csv(paths):
+    """
+    Upsert prices from one or more CSV files. An existing price is only replaced by one
+    with the same or a later date. Returns the number of rows read.
+    """
+    init_price_db()
+    updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    conn = get_shared_db_connection(PRICE_DB_NAME)
+    total = 0
+    try:
+        for path in paths:
+            rows = read_price_csv(path)
+            conn.executemany(
+                '''
+                INSERT INTO prices (symbol, price, price_date, source, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    price = excluded.price,
+                    price_date = excluded.price_date,
+                    source = excluded.source,
+                    updated_at = excluded.updated_at
+                WHERE excluded.price_date >= prices.price_date
+                ''',
+                [(symbol, price, price_date, path, updated_at) for symbol, price, price_date in rows]
+            )
+            total += len(rows)
+        conn.commit()
+    finally:
+        conn.close()
+    return total
+
+def get_prices(symbols=None):
+    init_price_db()
+    conn = get_shared_db_connection(PRICE_DB_NAME)
+    cursor = conn.cursor()
+    if symbols is None:
+        cursor.execute('SELECT * FROM prices')
+    else:
+        symbols = list(symbols)
+        placeholders = ', '.join('?' for _ in symbols)
+        cursor.execute(f'SELECT * FROM prices WHERE symbol IN ({placeholders})', symbols)
+    prices = {row['symbol']: dict(row) for row in cursor.fetchall()}
+    conn.close()
+    return prices
@@ -1,24 +1,177 @@
 # main-backend/storage/resources.py
+import hashlib
 import sqlite3
 import os
 import json
 from datetime import datetime
+import logging
 import threading
-from utils.db import get_db_connection
+from utils.db import get_db_connection, get_active_shared_connection, user_db_exists
+
+logger = logging.getLogger(__name__)
 
 # Lock for database initialization to prevent race conditions
 db_init_lock = threading.Lock()
 
+# Numeric and date fields of investment details exposed as generated columns (details_<field>)
+INVESTMENT_DETAIL_COLUMNS = {
+    'nav': 'REAL',
+    'units': 'REAL',
+    'current_nav': 'REAL',
+    'purchase_price': 'REAL',
+    'quantity': 'REAL',
+    'current_price': 'REAL',
+    'current_value': 'REAL',
+    'weight': 'REAL',
+    'current_market_value': 'REAL',
+    'purchase_date': 'TEXT',
+    'symbol': 'TEXT'
+}
+
+# Tables whose row changes are recorded in change_log (one entry per row, latest change wins)
+TRACKED_TABLES = ['debts', 'budgets', 'budget_history', 'goals', 'expenses', 'income', 'investments', 'insurance', 'advisories']
+
+def ensure_change_tracking(cursor):
+    """
+    Maintain change_log with triggers on every tracked table. Each insert/update/delete gives the
+    row a new, ever-increasing seq; deletes leave a tombstone. Updates that change nothing are ignored.
+    Triggers are regenerated whenever a table's columns change.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='change_log'")
+    new_log = cursor.fetchone() is None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            operation TEXT NOT NULL CHECK(operation IN ('upsert', 'delete')),
+            changed_at TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_change_log_row ON change_log (table_name, row_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_change_log_table_seq ON change_log (table_name, seq)')
+
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger' AND name LIKE 'change_log_%'")
+    existing_triggers = {row[0]: row[1] for row in cursor.fetchall()}
+    for table in TRACKED_TABLES:
+        cursor.execute(f"PRAGMA table_info({table})")
+        columns = [col[1] for col in cursor.fetchall()]
+        if not columns:
+            continue
+        old_row = ', '.join(f'OLD.{column}' for column in columns)
+        new_row = ', '.join(f'NEW.{column}' for column in columns)
+        log = "INSERT OR REPLACE INTO change_log (table_name, row_id, operation, changed_at) VALUES ('{table}', {row}.id, '{operation}', datetime('now'))"
+        triggers = {
+            f'change_log_{table}_insert': f"CREATE TRIGGER change_log_{table}_insert AFTER INSERT ON {table} BEGIN {log.format(table=table, row='NEW', operation='upsert')}; END",
+            f'change_log_{table}_update': f"CREATE TRIGGER change_log_{table}_update AFTER UPDATE ON {table} WHEN ({old_row}) IS NOT ({new_row}) BEGIN {log.format(table=table, row='NEW', operation='upsert')}; END",
+            f'change_log_{table}_delete': f"CREATE TRIGGER change_log_{table}_delete AFTER DELETE ON {table} BEGIN {log.format(table=table, row='OLD', operation='delete')}; END"
+        }
+        for name, sql in triggers.items():
+            if existing_triggers.get(name) != sql:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+                cursor.execute(sql)
+        if new_log:
+            # Seed the log with rows that existed before tracking was installed
+            cursor.execute(
+                f"INSERT OR REPLACE INTO change_log (table_name, row_id, operation, changed_at) SELECT '{table}', id, 'upsert', datetime('now') FROM {table}"
+            )
+
+def get_data_version(conn, tables=None):
+    """
+    (seq, changed_at) of the latest change_log entry across all tracked tables, or only the
+    given ones; (0, None) when nothing has been recorded. seq grows with every tracked write,
+    so it identifies the state of the data.
+    """
+    latest = (0, None)
+    for table in tables or [None]:
+        if table is None:
+            cursor = conn.execute('SELECT seq, changed_at FROM change_log ORDER BY seq DESC LIMIT 1')
+        else:
+            cursor = conn.execute('SELECT seq, changed_at FROM change_log WHERE table_name = ? ORDER BY seq DESC LIMIT 1', (table,))
+        row = cursor.fetchone()
+        if row and row[0] > latest[0]:
+            latest = (row[0], row[1])
+    return latest
+
+def get_user_data_version(user_id, tables=None):
+    conn = get_db_connection(user_id)
+    try:
+        return get_data_version(conn, tables)
+    finally:
+        conn.close()
+
+def get_users_data_version(user_ids, tables=None):
+    """
+    Combined (version, changed_at) of several users' data, for views built from many user
+    databases: version is a digest of every user's data version and changed_at the latest
+    change. Users without a database (or not yet initialised) count as unchanged.
+    """
+    versions = []
+    latest = None
+    for user_id in sorted(set(user_ids)):
+        seq, changed_at = 0, None
+        if user_db_exists(user_id):
+            try:
+                seq, changed_at = get_user_data_version(user_id, tables)
+            except sqlite3.OperationalError:
+                pass
+        versions.append(f'{user_id}:{seq}')
+        if changed_at and (latest is None or changed_at > latest):
+            latest = changed_at
+    return hashlib.sha256(','.join(versions).encode()).hexdigest()[:16], latest
+
+def parse_user_ids(value):
+    # user_ids=1,2,3 query parameter -> list of user ids; raises ValueError for non-integers
+    try:
+        return [int(user_id) for user_id in (value or '').split(',') if user_id.strip()]
+    except ValueError:
+        raise ValueError("user_ids must be a comma-separated list of integers")
+
+def parse_fields(value):
+    # fields=a,b,c query parameter -> list of field names, or None for everything
+    fields = list(dict.fromkeys(field.strip() for field in (value or '').split(',') if field.strip()))
+    return fields or None
+
+def resolve_projection(conn, table, fields, derived=None):
+    """
+    Map a fields= projection onto a table. Returns (SQL column list, set of output fields);
+    ('*', None) when fields is None. derived maps computed output fields to the stored columns
+    they are computed from. The id column is always included. Raises ValueError for unknown fields.
+    """
+    if not fields:
+        return '*', None
+    derived = derived or {}
+    stored = [column[1] for column in conn.execute(f'PRAGMA table_info({table})').fetchall()]
+    unknown = [field for field in fields if field not in stored and field not in derived]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Must be among {stored + [field for field in derived if field not in stored]}")
+    needed = {'id'}
+    for field in fields:
+        if field in stored:
+            needed.add(field)
+        needed.update(derived.get(field, ()))
+    return ', '.join(column for column in stored if column in needed), {'id', *fields}
+
+def project(record, output_fields):
+    if output_fields is None:
+        return record
+    return {key: value for key, value in record.items() if key in output_fields}
+
 def initialize_db(user_id):
+    if get_active_shared_connection(user_id) is not None:
+        # Already initialised before the shared connection was opened; executescript would
+        # also commit its pending transaction
+        return
     with db_init_lock:
-        print(f"Starting database initialization for user_id: {user_id}")
+        logger.debug(f"Starting database initialization for user_id: {user_id}")
         conn = get_db_connection(user_id)
         cursor = conn.cursor()
 
         # Check if tables already exist
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        existing_tables = [table[0] for table in cursor.fetchall()]
-        print(f"Existing tables before creation for user_id {user_id}: {existing_tables}")
+        if logger.isEnabledFor(logging.DEBUG):
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            existing_tables = [table[0] for table in cursor.fetchall()]
+            logger.debug(f"Existing tables before creation for user_id {user_id}: {existing_tables}")
 
         # Create tables
         try:
@@ -87,30 +240,55 @@ def initialize_db(user_id):
                 CREATE TABLE IF NOT EXISTS investments (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     user_id INTEGER NOT NULL,
-                    amount REAL NOT NULL,
+                    name TEXT NOT NULL,
+                    amount REAL,
                     type TEXT NOT NULL,
                     date TEXT NOT NULL,
-                    description TEXT
+                    description TEXT,
+                    details TEXT
+                );
+
+                CREATE TABLE IF NOT EXISTS advisories (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    cfa_id INTEGER NOT NULL,
+                    advice_type TEXT NOT NULL,
+                    details TEXT NOT NULL,
+                    created_at TEXT NOT NULL
                 );
 
                 CREATE TABLE IF NOT EXISTS insurance (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     user_id INTEGER NOT NULL,
-                    type TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    insurance_type TEXT NOT NULL,
+                    type TEXT,
                     premium REAL NOT NULL,
-                    coverage_amount REAL NOT NULL,
+                    coverage REAL,
+                    coverage_amount REAL,
+                    premium_term TEXT NOT NULL,
                     start_date TEXT NOT NULL,
                     end_date TEXT NOT NULL,
-                    provider TEXT NOT NULL
+                    is_active INTEGER NOT NULL,
+                    maturity_value REAL,
+                    provider TEXT,
+                    annualized_premium REAL,
+                    next_due_date TEXT
+                );
+
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    key TEXT PRIMARY KEY,
+                    request_hash TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    content_type TEXT,
+                    body BLOB,
+                    created_at REAL NOT NULL
                 );
+                CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created_at ON idempotency_keys (created_at);
             ''')
-            print("Tables created successfully for user_id: {user_id}")
-            # Debug: List tables after creation to confirm
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = cursor.fetchall()
-            print(f"Tables in database after creation for user_id {user_id}: {[table[0] for table in tables]}")
+            logger.debug(f"Tables created successfully for user_id: {user_id}")
         except Exception as e:
-            print(f"Error creating tables for user_id {user_id}: {str(e)}")
+            logger.error(f"Error creating tables for user_id {user_id}: {str(e)}")
 
         # Ensure all columns exist in the debts table
         cursor.execute("PRAGMA table_info(debts)")
@@ -180,22 +358,47 @@ def initialize_db(user_id):
         # Ensure all columns exist in the investments table
         cursor.execute("PRAGMA table_info(investments)")
         columns = [col[1] for col in cursor.fetchall()]
-        required_investments_columns = ['id', 'user_id', 'amount', 'type', 'date', 'description']
+        required_investments_columns = ['id', 'user_id', 'name', 'amount', 'type', 'date', 'description', 'details']
         for column in required_investments_columns:
             if column not in columns:
                 cursor.execute(f'ALTER TABLE investments ADD COLUMN {column} TEXT')
 
+        # Extract investment details into indexed generated columns so they can be filtered in SQL
+        cursor.execute("PRAGMA table_xinfo(investments)")
+        columns = [col[1] for col in cursor.fetchall()]
+        for field, sql_type in INVESTMENT_DETAIL_COLUMNS.items():
+            column = f'details_{field}'
+            if column not in columns:
+                cursor.execute(
+                    f"ALTER TABLE investments ADD COLUMN {column} {sql_type} "
+                    f"GENERATED ALWAYS AS (CAST(json_extract(details, '$.{field}') AS {sql_type})) VIRTUAL"
+                )
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_investments_{column} ON investments (user_id, {column})')
+
         # Ensure all columns exist in the insurance table
         cursor.execute("PRAGMA table_info(insurance)")
         columns = [col[1] for col in cursor.fetchall()]
-        required_insurance_columns = ['id', 'user_id', 'type', 'premium', 'coverage_amount', 'start_date', 'end_date', 'provider']
+        required_insurance_columns = [
+            'id', 'user_id', 'name', 'insurance_type', 'type', 'premium', 'coverage', 'coverage_amount',
+            'premium_term', 'start_date', 'end_date', 'is_active', 'maturity_value', 'provider'
+        ]
         for column in required_insurance_columns:
             if column not in columns:
                 cursor.execute(f'ALTER TABLE insurance ADD COLUMN {column} TEXT')
 
+        # Precomputed premium schedule, maintained by storage/insurance.py
+        for column, sql_type in [('annualized_premium', 'REAL'), ('next_due_date', 'TEXT')]:
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE insurance ADD COLUMN {column} {sql_type}')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_insurance_active_end_date ON insurance (is_active, end_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_insurance_active_next_due_date ON insurance (is_active, next_due_date)')
+
+        ensure_change_tracking(cursor)
+
         conn.commit()
-        # Debug: List tables after commit to confirm persistence
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        print(f"Tables in database after commit for user_id {user_id}: {[table[0] for table in tables]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # List tables after commit to confirm persistence
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+            tables = cursor.fetchall()
+            logger.debug(f"Tables in database after commit for user_id {user_id}: {[table[0] for table in tables]}")
         conn.close()
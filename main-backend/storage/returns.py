@@ -0,0 +1,142 @@
+# main-backend/storage/returns.py
+from datetime import date, datetime
+import numpy as np
+from .portfolio import load_holdings
+from .price_history import get_time_weighted_returns
+
+# Search bracket for annual rates: just above -100% up to +10,000%
+XIRR_LOWER_BOUND = -0.9999
+XIRR_UPPER_BOUND = 100.0
+XIRR_TOLERANCE = 1e-9
+XIRR_MAX_ITERATIONS = 100
+
+def solve_xirr(amounts, years):
+    """
+    Solve NPV(rate) = 0 for every row of a zero-padded cash-flow matrix at once.
+    amounts and years are (rows, flows) arrays; years are measured from each row's first flow.
+    Uses Newton steps safeguarded by a shrinking bisection bracket.
+    Returns an array of annual rates, NaN where the row has no root in the bracket.
+    """
+    rows = amounts.shape[0]
+    if rows == 0:
+        return np.empty(0)
+
+    def npv(rate):
+        return (amounts * (1 + rate)[:, None] ** -years).sum(axis=1)
+
+    def npv_derivative(rate):
+        return (-years * amounts * (1 + rate)[:, None] ** (-years - 1)).sum(axis=1)
+
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        lo = np.full(rows, XIRR_LOWER_BOUND)
+        hi = np.full(rows, XIRR_UPPER_BOUND)
+        f_lo = npv(lo)
+        f_hi = npv(hi)
+        solvable = np.isfinite(f_lo) & np.isfinite(f_hi) & (np.sign(f_lo) != np.sign(f_hi))
+        rate = np.where(solvable, 0.1, np.nan)
+        active = solvable.copy()
+
+        for _ in range(XIRR_MAX_ITERATIONS):
+            if not active.any():
+                break
+            f = npv(rate)
+            # Keep the root bracketed: replace whichever end has the same sign as f
+            move_lo = active & (np.sign(f) == np.sign(f_lo))
+            move_hi = active & ~move_lo
+            lo = np.where(move_lo, rate, lo)
+            f_lo = np.where(move_lo, f, f_lo)
+            hi = np.where(move_hi, rate, hi)
+
+            newton = rate - f / npv_derivative(rate)
+            in_bracket = np.isfinite(newton) & (newton > lo) & (newton < hi)
+            next_rate = np.where(in_bracket, newton, (lo + hi) / 2)
+            converged = (np.abs(next_rate - rate) < XIRR_TOLERANCE) | (f == 0)
+            rate = np.where(active, next_rate, rate)
+            active &= ~converged
+
+    return rate
+
+def cash_flow_matrix(flows):
+    """
+    Pack a list of per-row [(day ordinal, amount), ...] flows into zero-padded
+    (amounts, years) matrices for solve_xirr.
+    """
+    width = max((len(row) for row in flows), default=0)
+    amounts = np.zeros((len(flows), width))
+    years = np.zeros((len(flows), width))
+    for i, row in enumerate(flows):
+        if not row:
+            continue
+        days = np.array([day for day, _ in row], dtype=np.float64)
+        amounts[i, :len(row)] = [amount for _, amount in row]
+        years[i, :len(row)] = (days - days.min()) / 365.0
+    return amounts, years
+
+def parse_day(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().toordinal()
+    except (TypeError, ValueError):
+        return None
+
+def as_percentage(rate):
+    return None if rate is None or not np.isfinite(rate) else round(float(rate) * 100, 2)
+
+def get_investment_returns_for_users(user_ids, start=None, end=None):
+    """
+    XIRR per holding and per portfolio for several users, solved in a single batch, plus
+    time-weighted returns over [start, end] where price history exists.
+    Each holding is a purchase at its cost on purchase_date and a sale at today's value.
+    Returns {user_id: {'as_of', 'holdings', 'portfolio'}}.
+    """
+    today = date.today().toordinal()
+    flows = []
+    layout = []
+    for user_id in user_ids:
+        ids, names, types, _, cost, value, purchase_dates = load_holdings(user_id)
+        holding_rows = []
+        portfolio_flows = {}
+        portfolio_value = 0.0
+        for i in range(len(ids)):
+            purchase_day = parse_day(purchase_dates[i])
+            if purchase_day is None or purchase_day >= today or cost[i] <= 0:
+                holding_rows.append(None)
+                continue
+            holding_rows.append(len(flows))
+            flows.append([(purchase_day, -float(cost[i])), (today, float(value[i]))])
+            portfolio_flows[purchase_day] = portfolio_flows.get(purchase_day, 0.0) - float(cost[i])
+            portfolio_value += float(value[i])
+        portfolio_row = None
+        if portfolio_flows:
+            portfolio_row = len(flows)
+            flows.append(sorted(portfolio_flows.items()) + [(today, portfolio_value)])
+        layout.append((user_id, ids, names, types, holding_rows, portfolio_row))
+
+    rates = solve_xirr(*cash_flow_matrix(flows))
+
+    results = {}
+    for user_id, ids, names, types, holding_rows, portfolio_row in layout:
+        twr = get_time_weighted_returns(user_id, start, end)
+        holdings = []
+        for i, row in enumerate(holding_rows):
+            holding_id = int(ids[i])
+            holdings.append({
+                'id': holding_id,
+                'name': names[i],
+                'type': types[i],
+                'xirr_percentage': as_percentage(rates[row]) if row is not None else None,
+                'twr_percentage': as_percentage(twr['holdings'].get(holding_id))
+            })
+        results[user_id] = {
+            'as_of': date.fromordinal(today).isoformat(),
+            'holdings': holdings,
+            'portfolio': {
+                'xirr_percentage': as_percentage(rates[portfolio_row]) if portfolio_row is not None else None,
+                'twr_percentage': as_percentage(twr['portfolio']),
+                'twr_start_date': twr['start_date'],
+                'twr_end_date': twr['end_date']
+            }
+        }
+    return results
+
+def get_investment_returns(user_id, start=None, end=None):
+    return get_investment_returns_for_users([user_id], start, end)[user_id]
@@ -0,0 +1,107 @@
+# main-backend/storage/summary.py
+import json
+from datetime import datetime
+from utils.db import get_db_connection
+from .analytics import INCOME_TERM_MONTHS, investment_cost_and_value
+from .debts import pending_principal
+
+def compute_financial_summary(cursor, user_id, month):
+    cursor.execute('SELECT amount, term FROM income WHERE user_id = ?', (user_id,))
+    monthly_income = sum(row['amount'] / INCOME_TERM_MONTHS.get(row['term'], 1) for row in cursor.fetchall())
+    cursor.execute('SELECT category, SUM(amount) AS spent FROM expenses WHERE user_id = ? AND date LIKE ? GROUP BY category', (user_id, f'{month}%'))
+    spent_by_category = {row['category']: row['spent'] for row in cursor.fetchall()}
+    monthly_expenses = sum(spent_by_category.values())
+
+    # The stored remaining_balance is only refreshed when debts are listed, so work out what is
+    # pending today the same way get_all_debts does
+    cursor.execute('SELECT amount, interest_rate, term, date FROM debts WHERE user_id = ?', (user_id,))
+    debt_rows = cursor.fetchall()
+    debts = {'outstanding': sum(pending_principal(row) for row in debt_rows), 'count': len(debt_rows)}
+
+    cursor.execute('SELECT type, details FROM investments WHERE user_id = ?', (user_id,))
+    invested = 0.0
+    investment_value = 0.0
+    for row in cursor.fetchall():
+        cost, value = investment_cost_and_value(row)
+        invested += cost
+        investment_value += value
+
+    cursor.execute('SELECT current_amount, target_amount, allocations FROM goals WHERE user_id = ?', (user_id,))
+    saved = 0.0
+    target = 0.0
+    allocated = 0.0
+    for row in cursor.fetchall():
+        saved += row['current_amount']
+        target += row['target_amount']
+        allocations = json.loads(row['allocations']) if row['allocations'] else []
+        allocated += sum(float(allocation['amount']) for allocation in allocations if allocation['date'].startswith(month))
+
+    cursor.execute('SELECT categories, total_income FROM budgets WHERE user_id = ?', (user_id,))
+    budget_row = cursor.fetchone()
+    budget = None
+    if budget_row:
+        categories = json.loads(budget_row['categories']) if budget_row['categories'] else {}
+        budgeted = sum(float(amount) for amount in categories.values())
+        budget = {
+            'total_budgeted_expenses': round(budgeted, 2),
+            'total_expenses': round(monthly_expenses, 2),
+            'total_allocations': round(allocated, 2),
+            'total_savings': round(budget_row['total_income'] - monthly_expenses - allocated, 2),
+            'variance': round(budgeted - monthly_expenses, 2),
+            'by_category': {
+                category: round(float(amount) - spent_by_category.get(category, 0), 2)
+                for category, amount in categories.items()
+            }
+        }
+
+    cursor.execute('SELECT COUNT(*) AS count, COALESCE(SUM(annualized_premium), 0) AS annual_premiums FROM insurance WHERE user_id = ? AND is_active = 1', (user_id,))
+    insurance = dict(cursor.fetchone())
+
+    return {
+        'month': month,
+        'net_worth': round(investment_value - debts['outstanding'], 2),
+        'cash_flow': {
+            'monthly_income': round(monthly_income, 2),
+            'expenses': round(monthly_expenses, 2),
+            'goal_allocations': round(allocated, 2),
+            'net': round(monthly_income - monthly_expenses - allocated, 2)
+        },
+        'debt': {'outstanding': round(debts['outstanding'], 2), 'count': debts['count']},
+        'investments': {
+            'invested': round(invested, 2),
+            'value': round(investment_value, 2),
+            'gain': round(investment_value - invested, 2)
+        },
+        'goals': {
+            'saved': round(saved, 2),
+            'target': round(target, 2),
+            'progress_percentage': round(saved * 100 / target, 2) if target else None
+        },
+        'budget': budget,
+        'insurance': {'active_policies': insurance['count'], 'annual_premiums': round(insurance['annual_premiums'], 2)}
+    }
+
+def get_financial_summary(user_id, month=None):
+    """
+    Dashboard totals for one user, read in a single transaction so every figure reflects the
+    same state.
+    """
+    month = month or datetime.now().strftime('%Y-%m')
+    try:
+        datetime.strptime(month, '%Y-%m')
+    except ValueError:
+        raise ValueError("month must be in YYYY-MM format")
+
+    conn = get_db_connection(user_id)
+    cursor = conn.cursor()
+    # Inside an atomic batch the open transaction already gives a consistent view
+    owns_transaction = not conn.in_transaction
+    if owns_transaction:
+        cursor.execute('BEGIN')
+    try:
+        summary = compute_financial_summary(cursor, user_id, month)
+    finally:
+        if owns_transaction:
+            conn.rollback()
+        conn.close()
+    return summary
@@ -0,0 +1,84 @@
+# main-backend/storage/sync.py
+import json
+from utils.db import get_db_connection
+from .resources import get_data_version
+from .investments import strip_detail_columns
+from .analytics import FETCH_CHUNK_SIZE
+
+# JSON-encoded columns per table and the empty value used when they are blank
+SYNC_JSON_COLUMNS = {
+    'debts': {'payment_history': list, 'interest_rate_history': list, 'details': dict},
+    'budgets': {'categories': dict},
+    'budget_history': {'categories': dict},
+    'goals': {'allocations': list},
+    'investments': {'details': dict},
+    'advisories': {'details': dict}
+}
+
+DEFAULT_SYNC_LIMIT = 1000
+MAX_SYNC_LIMIT = 5000
+
+def decode_row(table, row):
+    record = dict(row)
+    if table == 'investments':
+        strip_detail_columns(record)
+    for column, empty in SYNC_JSON_COLUMNS.get(table, {}).items():
+        if column in record:
+            record[column] = json.loads(record[column]) if record[column] else empty()
+    return record
+
+def get_changes_since(user_id, since=0, limit=DEFAULT_SYNC_LIMIT):
+    """
+    Rows created, updated or deleted after change sequence `since`, at most `limit` changes,
+    oldest first. Upserted rows carry their current contents; deletes are ids only. Pass the
+    returned 'version' as the next `since`; 'has_more' means another page is waiting.
+    """
+    if since < 0:
+        raise ValueError("since must be a non-negative integer")
+    limit = min(limit or DEFAULT_SYNC_LIMIT, MAX_SYNC_LIMIT)
+
+    conn = get_db_connection(user_id)
+    cursor = conn.cursor()
+    # One read transaction: the row contents match the change_log page they were listed in
+    # Inside an atomic batch the open transaction already gives a consistent view
+    owns_transaction = not conn.in_transaction
+    if owns_transaction:
+        cursor.execute('BEGIN')
+    try:
+        version = get_data_version(conn)[0]
+        if since > version:
+            raise ValueError("since is ahead of this account's data; sync again from 0")
+        cursor.execute(
+            'SELECT seq, table_name, row_id, operation FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?',
+            (since, limit + 1)
+        )
+        entries = cursor.fetchall()
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        changes = {}
+        upserted_ids = {}
+        for entry in entries:
+            table_changes = changes.setdefault(entry['table_name'], {'upserted': [], 'deleted': []})
+            if entry['operation'] == 'delete':
+                table_changes['deleted'].append(entry['row_id'])
+            else:
+                upserted_ids.setdefault(entry['table_name'], []).append(entry['row_id'])
+
+        for table, ids in upserted_ids.items():
+            for i in range(0, len(ids), FETCH_CHUNK_SIZE):
+                chunk = ids[i:i + FETCH_CHUNK_SIZE]
+                placeholders = ', '.join('?' for _ in chunk)
+                cursor.execute(f'SELECT * FROM {table} WHERE id IN ({placeholders})', chunk)
+                changes[table]['upserted'].extend(decode_row(table, row) for row in cursor.fetchall())
+    finally:
+        if owns_transaction:
+            conn.rollback()
+        conn.close()
+
+    return {
+        'since': since,
+        'version': entries[-1]['seq'] if has_more else version,
+        'has_more': has_more,
+        'changes': changes
+    }
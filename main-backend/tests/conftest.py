@@ -0,0 +1,45 @@
+# main-backend/tests/conftest.py
+"""
+Tests run against the real app and SQLite, with every database under a temporary directory.
+Run from main-backend: python -m pytest -q tests
+"""
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+# Configure before the app modules read their settings at import
+os.environ['MAIN_BACKEND_DB_DIR'] = tempfile.mkdtemp(prefix='finance-tests-')
+os.environ.setdefault('ACCESS_LOG_SAMPLE_RATE', '0')
+os.environ['ADMISSION_CONTROL'] = '0'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import jwt
+import pytest
+from app import app as flask_app
+from middleware import JWT_SECRET
+
+user_ids = itertools.count(1000)
+
+@pytest.fixture
+def app():
+    return flask_app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def user_id():
+    # A fresh user (and so a fresh database) per test
+    return next(user_ids)
+
+def make_token(user_id, role='user', status='approved'):
+    return jwt.encode({'user_id': user_id, 'role': role, 'status': status, 'exp': int(time.time()) + 600}, JWT_SECRET, algorithm='HS256')
+
+@pytest.fixture
+def auth():
+    def headers(user_id, role='user', **extra):
+        return {'Authorization': f'Bearer {make_token(user_id, role)}', **extra}
+    return headers
@@ -0,0 +1,49 @@
+# main-backend/tests/test_access_log.py
+import json
+import logging
+import pytest
+from utils.access_log import JsonFormatter, access_logger
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+@pytest.fixture
+def captured():
+    handler = Capture()
+    access_logger.addHandler(handler)
+    yield handler.records
+    access_logger.removeHandler(handler)
+
+def test_requests_are_logged_with_route_and_timings(client, auth, user_id, captured, monkeypatch):
+    monkeypatch.setattr('utils.access_log.ACCESS_LOG_SAMPLE_RATE', 1.0)
+    client.post('/api/expenses', json={'category': 'Food', 'amount': 12, 'date': '2026-03-02'}, headers=auth(user_id))
+    expense_id = client.get('/api/expenses', headers=auth(user_id)).get_json()[0]['id']
+    client.delete(f'/api/expenses/{expense_id}', headers=auth(user_id))
+
+    fields = [record.fields for record in captured]
+    assert [(entry['method'], entry['status']) for entry in fields] == [('POST', 201), ('GET', 200), ('DELETE', 200)]
+    # Grouped by route template, not the concrete path
+    assert fields[2]['route'] == '/api/expenses/<int:id>'
+    assert all(entry['user_id'] == user_id and entry['latency_ms'] >= entry['db_ms'] >= 0 for entry in fields)
+
+def test_sampling_skips_successes_but_keeps_errors(client, auth, user_id, captured, monkeypatch):
+    monkeypatch.setattr('utils.access_log.ACCESS_LOG_SAMPLE_RATE', 0.0)
+    client.get('/api/expenses', headers=auth(user_id))
+    client.get('/api/expenses')
+    assert [record.fields['status'] for record in captured] == [401]
+
+def test_formatter_writes_one_json_object_per_record():
+    formatter = JsonFormatter()
+    record = logging.LogRecord('access', logging.INFO, __file__, 1, 'request', None, None)
+    record.fields = {'status': 200, 'route': '/api/summary'}
+    entry = json.loads(formatter.format(record))
+    assert entry['level'] == 'INFO' and entry['logger'] == 'access'
+    assert entry['status'] == 200 and 'message' not in entry
+
+    plain = logging.LogRecord('app', logging.WARNING, __file__, 1, 'slow %s', ('query',), None)
+    assert json.loads(formatter.format(plain))['message'] == 'slow query'
@@ -0,0 +1,22 @@
+# main-backend/tests/test_admin_export.py
+import json
+import routes.admin
+
+def test_streams_one_line_per_user_with_data(client, auth, user_id, monkeypatch):
+    with_data, without_data = user_id, user_id + 1
+    client.post('/api/expenses', json={'category': 'Rent', 'amount': 900, 'date': '2026-02-01'}, headers=auth(with_data))
+    client.get('/api/expenses', headers=auth(without_data))
+    users = [{'id': with_data}, {'id': without_data}, {'id': user_id + 2}]
+    monkeypatch.setattr(routes.admin, 'fetch_users', lambda authorization, role, limit, offset: (users[offset:offset + limit], len(users)))
+
+    response = client.get('/api/admin/users?limit=2', headers=auth(1, 'admin'))
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['X-Total-Count'] == '3'
+    assert response.headers['X-Next-Offset'] == '2'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['user_id'] for line in lines] == [with_data]
+    assert lines[0]['expenses'][0]['category'] == 'Rent'
+
+def test_requires_admin(client, auth, user_id):
+    assert client.get('/api/admin/users', headers=auth(user_id)).status_code == 403
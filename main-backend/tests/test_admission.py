@@ -0,0 +1,80 @@
+# main-backend/tests/test_admission.py
+import pytest
+from flask import Blueprint, Flask, jsonify
+import utils.admission as admission
+from utils.admission import FileBuckets, MemoryBuckets, take
+from conftest import make_token
+
+def test_take_refills_up_to_the_burst_and_reports_the_wait():
+    state, wait = take(None, rate=2, burst=4, cost=1, now=100.0)
+    assert state == (3, 100.0) and wait == 0
+    # Refilling never goes past the burst
+    state, wait = take((3, 100.0), rate=2, burst=4, cost=1, now=110.0)
+    assert state == (3, 110.0)
+    # Overdrawing leaves a debt that takes debt / rate seconds to repay
+    state, wait = take((0.5, 110.0), rate=2, burst=4, cost=2.5, now=110.0)
+    assert state == (-2.0, 110.0) and wait == pytest.approx(1.0)
+
+@pytest.mark.parametrize('make_backend', [MemoryBuckets, lambda: FileBuckets(db_name='admission-test.db')])
+def test_reserve_takes_from_every_bucket_or_none(make_backend):
+    backend = make_backend()
+    user = ('user:1:read', 1.0, 2.0)
+    shared = ('global:read', 100.0, 100.0)
+    assert backend.reserve([shared, user], 1, max_wait=0) == (True, 0.0)
+    assert backend.reserve([shared, user], 1, max_wait=0) == (True, 0.0)
+    # The user's bucket is empty: within max_wait it queues, past it nothing is taken
+    admitted, wait = backend.reserve([shared, user], 1, max_wait=0.5)
+    assert not admitted and wait == pytest.approx(1.0, abs=0.05)
+    admitted, wait = backend.reserve([shared, user], 1, max_wait=2)
+    assert admitted and wait == pytest.approx(1.0, abs=0.05)
+    # Another user still gets through on the shared bucket
+    assert backend.reserve([shared, ('user:2:read', 1.0, 2.0)], 1, max_wait=0)[0]
+
+def test_file_buckets_are_shared_between_workers():
+    first, second = FileBuckets(db_name='admission-shared.db'), FileBuckets(db_name='admission-shared.db')
+    bucket = [('user:7:write', 0.001, 2.0)]
+    assert first.reserve(bucket, 1, max_wait=0)[0]
+    assert second.reserve(bucket, 1, max_wait=0)[0]
+    assert not first.reserve(bucket, 1, max_wait=0)[0]
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    monkeypatch.setattr(admission, 'ADMISSION_CONTROL', True)
+    monkeypatch.setattr(admission, 'ADMISSION_BACKEND', 'memory')
+    monkeypatch.setattr(admission, 'ADMISSION_MAX_WAIT', 0)
+    monkeypatch.setattr(admission, 'USER_READ_LIMIT', (0.001, 2))
+    monkeypatch.setattr(admission, 'USER_WRITE_LIMIT', (0.001, 3))
+    monkeypatch.setattr(admission, 'admission_backend', None)
+    app = Flask(__name__)
+    admission.init_admission(app)
+
+    @app.route('/thing', methods=['GET', 'POST'])
+    def thing():
+        return jsonify({}), 200
+
+    # Same endpoint name as the real batch route, which is charged per sub-request
+    batch = Blueprint('batch', __name__)
+
+    @batch.route('/batch', methods=['POST'])
+    def run_batch():
+        return jsonify([]), 200
+    app.register_blueprint(batch)
+    return app
+
+def test_requests_past_a_users_burst_get_429(limited_app):
+    client = limited_app.test_client()
+    headers = {'Authorization': f'Bearer {make_token(41)}'}
+    assert [client.get('/thing', headers=headers).status_code for _ in range(3)] == [200, 200, 429]
+    assert int(client.get('/thing', headers=headers).headers['Retry-After']) >= 1
+    # Writes have their own budget, and other users theirs
+    assert client.post('/thing', headers=headers).status_code == 200
+    assert client.get('/thing', headers={'Authorization': f'Bearer {make_token(42)}'}).status_code == 200
+
+def test_batches_larger_than_the_burst_get_413(limited_app):
+    client = limited_app.test_client()
+    headers = {'Authorization': f'Bearer {make_token(43)}'}
+    batch = {'requests': [{'method': 'POST', 'path': '/api/income'}] * 4}
+    assert client.post('/batch', json=batch, headers=headers).status_code == 413
+    assert client.post('/batch', json={'requests': batch['requests'][:3]}, headers=headers).status_code == 200
+    # The batch used the whole write budget
+    assert client.post('/thing', headers=headers).status_code == 429
@@ -0,0 +1,41 @@
+# main-backend/tests/test_advisory_index.py
+from jobs.rebuild_advisory_index import main as rebuild_main
+from storage.advisories import get_advisories_by_cfa, count_advisories_by_cfa, ADVISORY_INDEX_DB_NAME
+from utils.db import get_shared_db_connection
+
+ADVICE = {'advice_type': 'investment_diversification', 'details': {'note': 'spread out'}}
+
+def test_cfa_listing_spans_clients_and_follows_deletes(client, auth):
+    cfa, first, second = 5001, 5002, 5003
+    headers = auth(cfa, role='CFA')
+    ids = []
+    for user_id in (first, second, first):
+        response = client.post(f'/api/advisories/user/{user_id}', json=ADVICE, headers=headers)
+        assert response.status_code == 201
+        ids.append((user_id, response.get_json()['id']))
+
+    listing = client.get(f'/api/advisories/cfa/{cfa}', headers=headers).get_json()
+    assert sorted((advisory['user_id'], advisory['id']) for advisory in listing) == sorted(ids)
+    assert listing[0]['details'] == ADVICE['details']
+
+    page = client.get(f'/api/advisories/cfa/{cfa}?limit=2&offset=2', headers=headers)
+    assert len(page.get_json()) == 1 and page.headers['X-Total-Count'] == '3'
+    assert client.get(f'/api/advisories/cfa/{cfa + 1}', headers=headers).status_code == 403
+
+    # The client deleting an advisory removes it from the index in the same transaction
+    user_id, advisory_id = ids[1]
+    assert client.delete(f'/api/advisories/{advisory_id}', headers=auth(user_id)).status_code == 200
+    assert count_advisories_by_cfa(cfa) == 2
+
+def test_rebuild_restores_the_index_from_user_databases(client, auth, monkeypatch):
+    cfa, user_id = 5011, 5012
+    client.post(f'/api/advisories/user/{user_id}', json=ADVICE, headers=auth(cfa, role='CFA'))
+    conn = get_shared_db_connection(ADVISORY_INDEX_DB_NAME)
+    conn.execute('DELETE FROM advisories WHERE cfa_id = ?', (cfa,))
+    conn.commit()
+    conn.close()
+    assert get_advisories_by_cfa(cfa) == []
+
+    monkeypatch.setattr('sys.argv', ['rebuild_advisory_index', '--users', str(user_id)])
+    rebuild_main()
+    assert [advisory['user_id'] for advisory in get_advisories_by_cfa(cfa)] == [user_id]
@@ -0,0 +1,42 @@
+# main-backend/tests/test_analytics.py
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from storage.analytics import refresh_analytics, get_platform_summary
+from storage.debts import pending_principal
+from storage.resources import initialize_db
+from storage.summary import get_financial_summary
+from utils.db import get_db_connection
+
+DEBT = {'creditor': 'Car loan', 'amount': 12000, 'interest_rate': 6, 'term': 48, 'debt_type': 'fixed', 'category': 'Vehicle'}
+
+def run_sql(user_id, sql, params=()):
+    conn = get_db_connection(user_id)
+    conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+def test_total_debt_matches_the_summary(user_id):
+    start = (datetime.now() - relativedelta(months=10)).strftime('%Y-%m-%d')
+    initialize_db(user_id)
+    run_sql(user_id, '''INSERT INTO debts (user_id, amount, creditor, interest_rate, term, date, category, debt_type, remaining_balance)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (user_id, DEBT['amount'], DEBT['creditor'], DEBT['interest_rate'], DEBT['term'], start, DEBT['category'], DEBT['debt_type'], DEBT['amount']))
+    refresh_analytics([user_id])
+
+    outstanding = get_financial_summary(user_id)['debt']['outstanding']
+    assert outstanding == pending_principal({**DEBT, 'date': start})
+    assert outstanding < DEBT['amount']
+
+    # The stored remaining_balance is still the original amount; the platform total must not use it
+    month = datetime.now().strftime('%Y-%m')
+    total = get_platform_summary(month)['total_debt']
+    assert total >= outstanding
+    run_sql(user_id, 'UPDATE debts SET remaining_balance = 0')
+    refresh_analytics([user_id])
+    assert get_platform_summary(month)['total_debt'] == total
+
+def test_refresh_is_incremental(client, auth, user_id):
+    client.post('/api/expenses', json={'category': 'Food', 'amount': 10, 'date': '2026-03-02'}, headers=auth(user_id))
+    first = refresh_analytics([user_id])
+    assert first['users_refreshed'] == 1 and first['rows_upserted'] >= 1
+    assert refresh_analytics([user_id])['users_skipped'] == 1
@@ -0,0 +1,72 @@
+# main-backend/tests/test_batch.py
+import pytest
+
+EXPENSE = {'category': 'Grocery', 'amount': 25.5, 'date': '2026-01-15', 'description': 'Weekly shop'}
+ADVICE = {'advice_type': 'debt_restructuring', 'details': {'note': 'Refinance'}}
+
+def run_batch(client, auth, user_id, requests, atomic=False):
+    return client.post('/api/batch', json={'requests': requests, 'atomic': atomic}, headers=auth(user_id))
+
+def test_runs_sub_requests_in_order(client, auth, user_id):
+    response = run_batch(client, auth, user_id, [
+        {'method': 'POST', 'path': '/api/expenses', 'body': EXPENSE},
+        {'method': 'GET', 'path': '/api/expenses'}
+    ])
+    assert response.status_code == 200
+    created, listing = response.get_json()
+    assert created['status'] == 201
+    assert listing['status'] == 200
+    assert [expense['category'] for expense in listing['body']] == ['Grocery']
+    assert 'ETag' in listing['headers']
+
+def test_atomic_batch_rolls_back_on_failure(client, auth, user_id):
+    response = run_batch(client, auth, user_id, [
+        {'method': 'POST', 'path': '/api/expenses', 'body': EXPENSE},
+        {'method': 'DELETE', 'path': '/api/expenses/999999'}
+    ], atomic=True)
+    assert response.status_code == 409
+    assert [sub['status'] for sub in response.get_json()] == [201, 404]
+    assert client.get('/api/expenses', headers=auth(user_id)).get_json() == []
+
+def test_non_atomic_batch_keeps_earlier_writes(client, auth, user_id):
+    response = run_batch(client, auth, user_id, [
+        {'method': 'POST', 'path': '/api/expenses', 'body': EXPENSE},
+        {'method': 'DELETE', 'path': '/api/expenses/999999'}
+    ])
+    assert response.status_code == 200
+    assert [sub['status'] for sub in response.get_json()] == [201, 404]
+    assert len(client.get('/api/expenses', headers=auth(user_id)).get_json()) == 1
+
+@pytest.mark.parametrize('atomic', [False, True])
+def test_two_advisory_writes_in_one_batch(client, auth, user_id, atomic):
+    cfa = auth(user_id + 500000, 'CFA')
+    ids = [client.post(f'/api/advisories/user/{user_id}', json=ADVICE, headers=cfa).get_json()['id'] for _ in range(2)]
+    response = run_batch(client, auth, user_id, [{'method': 'DELETE', 'path': f'/api/advisories/{advisory_id}'} for advisory_id in ids], atomic=atomic)
+    assert response.status_code == 200
+    assert [sub['status'] for sub in response.get_json()] == [200, 200]
+    assert client.get(f'/api/advisories/user/{user_id}', headers=auth(user_id)).get_json() == []
+
+def test_atomic_batch_mixing_writes_and_advisories(client, auth, user_id):
+    advisory = client.post(f'/api/advisories/user/{user_id}', json=ADVICE, headers=auth(user_id + 500000, 'CFA')).get_json()
+    response = run_batch(client, auth, user_id, [
+        {'method': 'POST', 'path': '/api/expenses', 'body': EXPENSE},
+        {'method': 'DELETE', 'path': f"/api/advisories/{advisory['id']}"}
+    ], atomic=True)
+    assert response.status_code == 200
+    assert [sub['status'] for sub in response.get_json()] == [201, 200]
+
+@pytest.mark.parametrize('requests, error', [
+    ([{'path': '/api/batch', 'method': 'POST', 'body': {'requests': [{'path': '/api/expenses'}]}}], 'Batches cannot be nested'),
+    ([{'path': '/api/events'}], 'Event streams cannot be batched')
+])
+def test_rejects_nested_and_streaming_sub_requests(client, auth, user_id, requests, error):
+    response = run_batch(client, auth, user_id, requests)
+    assert response.status_code == 200
+    assert response.get_json() == [{'status': 400, 'body': {'error': error}}]
+
+@pytest.mark.parametrize('body', [{}, {'requests': []}, {'requests': [{'path': 'expenses'}]}, {'requests': [{'path': '/api/expenses', 'method': 'PATCH'}]}])
+def test_rejects_invalid_batches(client, auth, user_id, body):
+    assert client.post('/api/batch', json=body, headers=auth(user_id)).status_code == 400
+
+def test_requires_a_token(client):
+    assert client.post('/api/batch', json={'requests': [{'path': '/api/expenses'}]}).status_code == 401
@@ -0,0 +1,73 @@
+# main-backend/tests/test_cohorts.py
+import random
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+import numpy as np
+import pytest
+from storage.cohorts import load_user_cohort_metrics, compute_cohort_statistics
+from storage.debts import pending_principal
+from storage.resources import initialize_db
+from utils.db import get_db_connection
+from utils.sketches import QuantileSketch
+
+def test_merged_sketches_match_a_single_sketch():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1) for _ in range(20000)]
+    whole = QuantileSketch()
+    for value in values:
+        whole.add(value)
+    merged = QuantileSketch()
+    for i in range(0, len(values), 1000):
+        part = QuantileSketch()
+        for value in values[i:i + 1000]:
+            part.add(value)
+        merged.merge(part)
+
+    assert merged.count == whole.count == len(values)
+    assert merged.min == min(values) and merged.max == max(values)
+    assert merged.total == pytest.approx(sum(values))
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        exact = float(np.quantile(values, q))
+        # Rank error stays small, in particular at the tails
+        assert np.mean(np.array(values) <= merged.quantile(q)) == pytest.approx(q, abs=0.01)
+        assert merged.quantile(q) == pytest.approx(exact, rel=0.05)
+    # The merged sketch stays compact
+    assert len(merged.means) <= 2 * merged.compression
+
+def test_empty_and_single_value_sketches():
+    empty = QuantileSketch()
+    assert empty.quantile(0.5) is None
+    assert empty.summary() == {'count': 0}
+    single = QuantileSketch().merge(empty)
+    single.add(3)
+    assert single.summary()['p10'] == single.summary()['p90'] == 3
+
+def test_debt_to_income_uses_the_current_balance(user_id):
+    start = (datetime.now() - relativedelta(months=12)).strftime('%Y-%m-%d')
+    initialize_db(user_id)
+    conn = get_db_connection(user_id)
+    conn.execute('INSERT INTO income (user_id, amount, name, term, date, category) VALUES (?, 1000, ?, ?, ?, ?)', (user_id, 'Job', 'monthly', start, 'Salary'))
+    conn.execute('''INSERT INTO debts (user_id, amount, creditor, interest_rate, term, date, category, debt_type, remaining_balance)
+                    VALUES (?, 24000, 'Bank', 5, 60, ?, 'Loan', 'fixed', 24000)''', (user_id, start))
+    conn.commit()
+    conn.close()
+    pending = pending_principal({'amount': 24000, 'interest_rate': 5, 'term': 60, 'date': start})
+    metrics = load_user_cohort_metrics(user_id, datetime.now().strftime('%Y-%m'))
+    assert metrics['debt_to_income'] == pytest.approx(pending / 12000)
+
+def test_cohort_statistics_count_every_user(user_id):
+    month = datetime.now().strftime('%Y-%m')
+    user_ids = [user_id * 100 + n for n in range(5)]
+    for n, uid in enumerate(user_ids):
+        initialize_db(uid)
+        conn = get_db_connection(uid)
+        conn.execute('INSERT INTO income (user_id, amount, name, term, date, category) VALUES (?, 1000, ?, ?, ?, ?)', (uid, 'Job', 'monthly', f'{month}-01', 'Salary'))
+        conn.execute('INSERT INTO expenses (user_id, amount, category, date) VALUES (?, ?, ?, ?)', (uid, 100 * n, 'Food', f'{month}-02'))
+        conn.commit()
+        conn.close()
+    statistics = compute_cohort_statistics(user_ids, month, max_workers=2)
+    savings = statistics['metrics']['savings_rate_percentage']
+    assert statistics['failures'] == {}
+    assert savings['count'] == 5
+    assert (savings['min'], savings['max']) == (60, 100)
+    assert savings['p50'] == pytest.approx(80)
@@ -0,0 +1,39 @@
+# main-backend/tests/test_compression.py
+import gzip
+import zlib
+from utils.compression import compress_stream, compression_stats
+
+def add_expenses(client, headers, count):
+    for day in range(1, count + 1):
+        client.post('/api/expenses', json={'category': 'Groceries', 'amount': day, 'date': f'2026-03-{day:02d}'}, headers=headers)
+
+def test_large_json_is_gzipped_with_a_weak_etag(client, auth, user_id):
+    headers = auth(user_id)
+    add_expenses(client, headers, 28)
+    plain = client.get('/api/expenses', headers=headers)
+    assert 'Content-Encoding' not in plain.headers and 'Accept-Encoding' in plain.headers['Vary']
+
+    before = compression_stats.snapshot()['bytes_saved']
+    compressed = client.get('/api/expenses', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    saved = int(compressed.headers['X-Bytes-Saved'])
+    assert saved == len(plain.data) - len(compressed.data) > 0
+    assert compression_stats.snapshot()['bytes_saved'] - before == saved
+    assert compressed.headers['ETag'].startswith('W/')
+
+def test_small_responses_are_sent_as_is(client, auth, user_id):
+    headers = auth(user_id)
+    add_expenses(client, headers, 1)
+    response = client.get('/api/expenses', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_streams_are_flushed_chunk_by_chunk():
+    decompressor = zlib.decompressobj(31)
+    chunks = compress_stream(iter(['{"a": 1}\n', b'{"b": 2}\n']), 'gzip', (6, 5))
+    # Each chunk can be decoded as soon as it arrives, before the stream ends
+    assert decompressor.decompress(next(chunks)) == b'{"a": 1}\n'
+    assert decompressor.decompress(next(chunks)) == b'{"b": 2}\n'
+    for tail in chunks:
+        decompressor.decompress(tail)
+    assert decompressor.eof
@@ -0,0 +1,81 @@
+# main-backend/tests/test_conditional_get.py
+import pytest
+import storage.price_history as price_history
+from storage.analytics import refresh_analytics
+
+STOCK = {
+    'name': 'ACME', 'type': 'Stocks', 'date': '2024-01-02',
+    'details': {'purchase_price': 10, 'quantity': 5, 'current_price': 12, 'purchase_date': '2024-01-02', 'symbol': 'ACME'}
+}
+INCOME = {'name': 'Salary', 'amount': 5000, 'term': 'monthly', 'date': '2024-01-01'}
+
+def revalidate(client, url, headers):
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200 and first.headers.get('ETag')
+    second = client.get(url, headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    return first.headers['ETag']
+
+def test_user_routes_answer_304_until_their_tables_change(client, auth, user_id):
+    headers = auth(user_id)
+    etag = revalidate(client, '/api/investments', headers)
+
+    # A write to another table leaves the listing valid
+    assert client.post('/api/income', json=INCOME, headers=headers).status_code == 201
+    assert client.get('/api/investments', headers={**headers, 'If-None-Match': etag}).status_code == 304
+
+    assert client.post('/api/investments', json=STOCK, headers=headers).status_code == 201
+    assert client.get('/api/investments', headers={**headers, 'If-None-Match': etag}).status_code == 200
+
+def test_price_history_appends_change_history_etags(client, auth, user_id, tmp_path, monkeypatch):
+    monkeypatch.setattr(price_history, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(price_history, 'history_maps', {})
+    headers = auth(user_id)
+    client.post('/api/investments', json=STOCK, headers=headers)
+    price_history.append_prices('ACME', [('2024-01-02', 10.0)])
+    url = '/api/investments/history?start=2024-01-01&end=2024-01-10'
+    etag = revalidate(client, url, headers)
+
+    price_history.append_prices('ACME', [('2024-01-03', 11.0)])
+    response = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['values'][-1] == pytest.approx(55.0)
+
+def test_cfa_returns_track_every_listed_user(client, auth):
+    cfa, first, second = 3001, 3002, 3003
+    for user_id in (first, second):
+        client.post('/api/investments', json=STOCK, headers=auth(user_id))
+    headers = auth(cfa, role='CFA')
+    url = f'/api/cfa/users/returns?user_ids={first},{second}'
+    etag = revalidate(client, url, headers)
+
+    client.post('/api/investments', json=STOCK, headers=auth(second))
+    assert client.get(url, headers={**headers, 'If-None-Match': etag}).status_code == 200
+    # Bad input still reaches the view
+    assert client.get('/api/cfa/users/returns?user_ids=x', headers={**headers, 'If-None-Match': etag}).status_code == 400
+
+def test_cfa_advisory_listing_is_versioned_in_the_shared_index(client, auth, user_id):
+    cfa = 3010
+    headers = auth(cfa, role='CFA')
+    advisory = {'advice_type': 'debt_restructuring', 'details': {'note': 'consolidate'}}
+    client.post(f'/api/advisories/user/{user_id}', json=advisory, headers=headers)
+    etag = revalidate(client, f'/api/advisories/cfa/{cfa}', headers)
+
+    client.post(f'/api/advisories/user/{user_id}', json=advisory, headers=headers)
+    response = client.get(f'/api/advisories/cfa/{cfa}', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200 and len(response.get_json()) == 2
+    # Another CFA is refused, whatever validator it sends
+    other = client.get(f'/api/advisories/cfa/{cfa}', headers={**auth(cfa + 1, role='CFA'), 'If-None-Match': etag})
+    assert other.status_code == 403
+
+def test_admin_analytics_revalidate_against_the_last_refresh(client, auth, user_id):
+    headers = auth(1, role='admin')
+    assert client.post('/api/income', json=INCOME, headers=auth(user_id)).status_code == 201
+    refresh_analytics([user_id])
+    etag = revalidate(client, '/api/admin/analytics/summary', headers)
+
+    client.post('/api/income', json={**INCOME, 'name': 'Bonus'}, headers=auth(user_id))
+    # Still valid until the next refresh picks the change up
+    assert client.get('/api/admin/analytics/summary', headers={**headers, 'If-None-Match': etag}).status_code == 304
+    refresh_analytics([user_id])
+    assert client.get('/api/admin/analytics/summary', headers={**headers, 'If-None-Match': etag}).status_code == 200
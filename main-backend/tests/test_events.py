@@ -0,0 +1,54 @@
+# main-backend/tests/test_events.py
+import json
+from utils.events import change_broker
+
+EXPENSE = {'category': 'Food', 'amount': 12, 'date': '2026-03-02'}
+
+def parse(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+    return int(fields['id']), fields['event'], json.loads(fields['data'])
+
+def test_broker_fans_out_commits_to_subscribers_only(client, auth, user_id):
+    headers = auth(user_id)
+    client.get('/api/expenses', headers=headers)
+    subscription = change_broker.subscribe(user_id, 0)
+    try:
+        expense_id = client.post('/api/expenses', json=EXPENSE, headers=headers).get_json()['id']
+        event = subscription.events.get_nowait()
+        assert (event['table'], event['id'], event['op']) == ('expenses', expense_id, 'upsert')
+        assert subscription.events.empty()
+    finally:
+        change_broker.unsubscribe(subscription)
+    assert not change_broker.has_subscribers(user_id)
+
+def test_full_buffer_marks_the_subscriber_overflowed(client, auth, user_id, monkeypatch):
+    monkeypatch.setattr('utils.events.SUBSCRIBER_BUFFER_SIZE', 2)
+    headers = auth(user_id)
+    client.get('/api/expenses', headers=headers)
+    subscription = change_broker.subscribe(user_id, 0)
+    try:
+        for _ in range(3):
+            client.post('/api/expenses', json=EXPENSE, headers=headers)
+        assert subscription.overflowed and subscription.events.qsize() == 2
+    finally:
+        change_broker.unsubscribe(subscription)
+
+def test_stream_replays_from_last_event_id_then_follows_live_changes(client, auth, user_id):
+    headers = auth(user_id)
+    first = client.post('/api/expenses', json=EXPENSE, headers=headers).get_json()['id']
+    second = client.post('/api/expenses', json=EXPENSE, headers=headers).get_json()['id']
+
+    response = client.get('/api/events', headers={**headers, 'Last-Event-ID': '0'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    try:
+        assert next(chunks).startswith(b'retry: ')
+        replayed = [parse(next(chunks)) for _ in range(2)]
+        assert [(event, data['id']) for _, event, data in replayed] == [('change', first), ('change', second)]
+
+        third = client.post('/api/expenses', json=EXPENSE, headers=headers).get_json()['id']
+        seq, _, data = parse(next(chunks))
+        assert seq > replayed[-1][0] and data == {'table': 'expenses', 'id': third, 'op': 'upsert'}
+    finally:
+        response.close()
+    assert not change_broker.has_subscribers(user_id)
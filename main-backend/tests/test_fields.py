@@ -0,0 +1,45 @@
+# main-backend/tests/test_fields.py
+from storage.resources import initialize_db
+from utils.db import get_db_connection
+
+INCOME = {'name': 'Salary', 'amount': 5000, 'term': 'monthly', 'date': '2024-01-01'}
+STOCK = {
+    'name': 'ACME', 'type': 'Stocks', 'date': '2024-01-02',
+    'details': {'purchase_price': 10, 'quantity': 5, 'current_price': 12, 'purchase_date': '2024-01-02'}
+}
+
+def test_fields_limits_the_listing_and_keeps_the_id(client, auth, user_id):
+    headers = auth(user_id)
+    created = client.post('/api/income', json=INCOME, headers=headers).get_json()
+    response = client.get('/api/income?fields=name,amount', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == [{'id': created['id'], 'name': 'Salary', 'amount': created['amount']}]
+    # Without fields everything comes back
+    assert client.get('/api/income', headers=headers).get_json() == [created]
+
+def test_unknown_fields_are_rejected(client, auth, user_id):
+    headers = auth(user_id)
+    client.post('/api/income', json=INCOME, headers=headers)
+    response = client.get('/api/income?fields=name,salary', headers=headers)
+    assert response.status_code == 400 and 'salary' in response.get_json()['error']
+
+def test_json_and_detail_columns_are_decoded_only_when_asked_for(client, auth, user_id):
+    headers = auth(user_id)
+    client.post('/api/investments', json=STOCK, headers=headers)
+    [investment] = client.get('/api/investments?fields=details', headers=headers).get_json()
+    assert set(investment) == {'id', 'details'} and investment['details']['quantity'] == 5
+    [investment] = client.get('/api/investments?fields=name', headers=headers).get_json()
+    assert set(investment) == {'id', 'name'}
+
+def test_derived_debt_metrics_read_their_source_columns(client, auth, user_id):
+    initialize_db(user_id)
+    conn = get_db_connection(user_id)
+    conn.execute('''INSERT INTO debts (user_id, amount, creditor, interest_rate, term, date, category, debt_type, remaining_balance)
+                    VALUES (?, 120000, 'Bank', 9.0, 60, '2023-01-01', 'Home Loan', 'fixed', 120000)''', (user_id,))
+    conn.commit()
+    conn.close()
+    headers = auth(user_id)
+    [debt] = client.get('/api/debts?fields=principal_pending,creditor', headers=headers).get_json()
+    assert set(debt) == {'id', 'principal_pending', 'creditor'}
+    [full] = client.get('/api/debts', headers=headers).get_json()
+    assert debt['principal_pending'] == full['principal_pending'] < 120000
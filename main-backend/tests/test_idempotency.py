@@ -0,0 +1,54 @@
+# main-backend/tests/test_idempotency.py
+import threading
+from utils.db import get_db_connection
+
+INCOME = {'name': 'Salary', 'amount': 5000, 'term': 'monthly', 'date': '2024-01-01'}
+
+def count_income(user_id):
+    conn = get_db_connection(user_id)
+    count = conn.execute('SELECT COUNT(*) FROM income').fetchone()[0]
+    conn.close()
+    return count
+
+def test_repeated_key_replays_the_first_response(client, auth, user_id):
+    headers = auth(user_id, **{'Idempotency-Key': 'pay-1'})
+    first = client.post('/api/income', json=INCOME, headers=headers)
+    second = client.post('/api/income', json=INCOME, headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.headers.get('Idempotent-Replayed') == 'true'
+    assert second.get_json() == first.get_json()
+    assert count_income(user_id) == 1
+
+def test_key_reused_for_a_different_request_is_rejected(client, auth, user_id):
+    headers = auth(user_id, **{'Idempotency-Key': 'pay-2'})
+    assert client.post('/api/income', json=INCOME, headers=headers).status_code == 201
+    response = client.post('/api/income', json={**INCOME, 'amount': 6000}, headers=headers)
+    assert response.status_code == 422
+    assert count_income(user_id) == 1
+
+def test_keys_are_scoped_per_user_and_validated(client, auth, user_id):
+    other = user_id + 100000
+    for owner in (user_id, other):
+        response = client.post('/api/income', json=INCOME, headers=auth(owner, **{'Idempotency-Key': 'shared'}))
+        assert response.status_code == 201 and 'Idempotent-Replayed' not in response.headers
+    assert client.post('/api/income', json=INCOME, headers=auth(user_id, **{'Idempotency-Key': 'k' * 256})).status_code == 400
+    # Without a key every POST runs
+    client.post('/api/income', json=INCOME, headers=auth(user_id))
+    assert count_income(user_id) == 2
+
+def test_concurrent_duplicates_run_the_view_once(app, auth, user_id):
+    headers = auth(user_id, **{'Idempotency-Key': 'pay-3'})
+    app.test_client().post('/api/income', json=INCOME, headers=auth(user_id))  # create the database first
+    responses = []
+
+    def post():
+        responses.append(app.test_client().post('/api/income', json=INCOME, headers=headers))
+
+    threads = [threading.Thread(target=post) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(response.status_code for response in responses) == [201] * 4
+    assert sum(response.headers.get('Idempotent-Replayed') == 'true' for response in responses) == 3
+    assert count_income(user_id) == 2
@@ -0,0 +1,40 @@
+# main-backend/tests/test_insurance_calendar.py
+from storage.insurance import refresh_premium_schedule
+from storage.resources import get_user_data_version
+from utils.db import get_db_connection
+
+POLICY = {
+    'name': 'Home cover', 'insurance_type': 'Asset', 'premium': 300, 'coverage': 100000,
+    'premium_term': 'quarterly', 'start_date': '2020-01-15', 'end_date': '2030-01-14',
+    'is_active': 1, 'maturity_value': 0
+}
+
+def test_past_window_lists_the_premiums_due_in_it(client, auth, user_id):
+    headers = auth(user_id)
+    assert client.post('/api/insurance', json=POLICY, headers=headers).status_code == 201
+
+    response = client.get('/api/insurance/calendar?start=2021-01-01&end=2021-12-31', headers=headers)
+    assert response.status_code == 200
+    due_dates = [due['due_date'] for due in response.get_json()['due_premiums']]
+    assert due_dates == ['2021-01-15', '2021-04-15', '2021-07-15', '2021-10-15']
+
+def test_calendar_reads_do_not_write(client, auth, user_id):
+    headers = auth(user_id)
+    assert client.post('/api/insurance', json=POLICY, headers=headers).status_code == 201
+    # A stale schedule left for the refresh job must not be rewritten by reads
+    conn = get_db_connection(user_id)
+    conn.execute("UPDATE insurance SET next_due_date = '2020-01-15'")
+    conn.commit()
+    conn.close()
+    version = get_user_data_version(user_id)
+
+    first = client.get('/api/insurance/calendar?start=2021-01-01&end=2021-03-31', headers=headers)
+    second = client.get('/api/insurance/calendar?start=2021-01-01&end=2021-03-31', headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert get_user_data_version(user_id) == version
+
+    conn = get_db_connection(user_id)
+    refresh_premium_schedule(conn, user_id, today='2021-02-01')
+    assert conn.execute('SELECT next_due_date FROM insurance').fetchone()[0] == '2021-04-15'
+    conn.close()
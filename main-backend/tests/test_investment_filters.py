@@ -0,0 +1,44 @@
+# main-backend/tests/test_investment_filters.py
+from utils.db import get_db_connection
+
+def stock(name, price, quantity, purchase_date='2024-01-02'):
+    return {
+        'name': name, 'type': 'Stocks', 'date': purchase_date,
+        'details': {'purchase_price': price, 'quantity': quantity, 'current_price': price, 'purchase_date': purchase_date}
+    }
+
+def names(client, headers, query):
+    response = client.get(f'/api/investments?{query}', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return [investment['name'] for investment in response.get_json()]
+
+def test_filters_and_sorts_on_detail_fields(client, auth, user_id):
+    headers = auth(user_id)
+    for investment in (stock('A', 30, 1), stock('B', 10, 8, '2023-05-01'), stock('C', 20, 4)):
+        assert client.post('/api/investments', json=investment, headers=headers).status_code == 201
+    client.post('/api/investments', json={
+        'name': 'Coins', 'type': 'Gold', 'date': '2024-01-02',
+        'details': {'purchase_price': 50, 'weight': 2, 'current_market_value': 130, 'purchase_date': '2024-01-02'}
+    }, headers=headers)
+
+    assert names(client, headers, 'min_current_price=15&sort_by=current_price&order=desc') == ['A', 'C']
+    assert names(client, headers, 'max_quantity=4&sort_by=quantity') == ['A', 'C']
+    assert names(client, headers, 'min_purchase_date=2024-01-01&type=Stocks&sort_by=name') == ['A', 'C']
+    # Generated columns stay internal
+    assert not any(key.startswith('details_') for key in client.get('/api/investments', headers=headers).get_json()[0])
+
+def test_invalid_filter_and_sort_values(client, auth, user_id):
+    headers = auth(user_id)
+    client.post('/api/investments', json=stock('A', 30, 1), headers=headers)
+    assert client.get('/api/investments?min_quantity=lots', headers=headers).status_code == 400
+    assert client.get('/api/investments?sort_by=color', headers=headers).status_code == 400
+    assert client.get('/api/investments?sort_by=name&order=sideways', headers=headers).status_code == 400
+
+def test_filters_are_served_by_the_detail_indexes(client, auth, user_id):
+    client.post('/api/investments', json=stock('A', 30, 1), headers=auth(user_id))
+    conn = get_db_connection(user_id)
+    plan = ' '.join(row[3] for row in conn.execute(
+        'EXPLAIN QUERY PLAN SELECT id FROM investments WHERE user_id = ? AND details_current_price >= ?', (user_id, 10)
+    ))
+    conn.close()
+    assert 'idx_investments_details_current_price' in plan
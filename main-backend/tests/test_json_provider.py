@@ -0,0 +1,27 @@
+# main-backend/tests/test_json_provider.py
+import json
+import sqlite3
+import numpy as np
+from utils.db import fetch_dicts
+
+def make_conn():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE expenses (id INTEGER PRIMARY KEY, amount REAL, category TEXT, description TEXT)')
+    conn.executemany('INSERT INTO expenses (amount, category, description) VALUES (?, ?, ?)', [(12.5, 'food', None), (40.0, 'rent', 'May')])
+    return conn
+
+def test_fetch_dicts_matches_row_conversion():
+    conn = make_conn()
+    expected = [dict(row) for row in conn.execute('SELECT * FROM expenses WHERE amount > ?', (10,)).fetchall()]
+    assert fetch_dicts(conn, 'SELECT * FROM expenses WHERE amount > ?', (10,)) == expected
+    # The connection keeps handing out sqlite3.Row elsewhere
+    assert isinstance(conn.execute('SELECT * FROM expenses').fetchone(), sqlite3.Row)
+
+def test_provider_encodes_rows_dicts_and_numpy_alike(app):
+    conn = make_conn()
+    rows = conn.execute('SELECT * FROM expenses').fetchall()
+    payload = {'rows': rows, 'dicts': fetch_dicts(conn, 'SELECT * FROM expenses'), 'total': np.float64(52.5)}
+    decoded = json.loads(app.json.dumps(payload))
+    assert decoded['rows'] == decoded['dicts'] == [dict(row) for row in rows]
+    assert decoded['total'] == 52.5
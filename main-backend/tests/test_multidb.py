@@ -0,0 +1,39 @@
+# main-backend/tests/test_multidb.py
+import pytest
+from conftest import user_ids as fresh_user_ids
+from utils.multidb import batch_user_ids, query_users
+
+TEMPLATE = "SELECT {user_id} AS user_id, category, amount FROM {db}.expenses WHERE amount >= :minimum"
+
+@pytest.fixture
+def users(client, auth):
+    # A fresh set of users per test; the nth user has an expense of n alongside one of 5
+    user_ids = [next(fresh_user_ids) for _ in range(5)]
+    for n, user_id in enumerate(user_ids, 1):
+        for amount in (5, n):
+            client.post('/api/expenses', json={'category': 'Food', 'amount': amount, 'date': '2026-03-01'}, headers=auth(user_id))
+    return user_ids
+
+def test_batches_drop_duplicates_and_missing_databases(users):
+    assert batch_user_ids(users + users[:2] + [6999], batch_size=2) == [users[0:2], users[2:4], users[4:]]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_union_spans_every_batch(users, workers):
+    rows = query_users(TEMPLATE, users + [6999], {'minimum': 2}, batch_size=2, workers=workers)
+    assert next(rows) == ['user_id', 'category', 'amount']
+    found = sorted(rows)
+    assert found == sorted([(user_id, 'Food', 5.0) for user_id in users] +
+                           [(user_id, 'Food', float(n)) for n, user_id in enumerate(users, 1) if n >= 2])
+
+def test_outer_query_pre_aggregates_each_batch(users):
+    outer = 'SELECT COUNT(*) AS expenses, SUM(amount) AS total FROM ({rows})'
+    rows = query_users(TEMPLATE, users, {'minimum': 0}, outer=outer, batch_size=2, workers=1)
+    assert next(rows) == ['expenses', 'total']
+    partials = list(rows)
+    # One partial per batch, merged by the caller
+    assert len(partials) == 3
+    assert sum(count for count, _ in partials) == 10
+    assert sum(total for _, total in partials) == 5 * 5 + 1 + 2 + 3 + 4 + 5
+
+def test_no_databases_yields_nothing():
+    assert list(query_users(TEMPLATE, [6998, 6999])) == []
@@ -0,0 +1,38 @@
+# main-backend/tests/test_parallel.py
+import threading
+from utils.parallel import map_users
+
+def test_yields_every_result_and_error():
+    def func(user_id):
+        if user_id % 5 == 0:
+            raise ValueError(f'user {user_id}')
+        return user_id * 2
+    results = {user_id: (result, error) for user_id, result, error in map_users(func, range(1, 21), max_workers=3)}
+    assert sorted(results) == list(range(1, 21))
+    assert all(result == user_id * 2 and error is None for user_id, (result, error) in results.items() if user_id % 5)
+    assert all(result is None and str(error) == f'user {user_id}' for user_id, (result, error) in results.items() if not user_id % 5)
+
+def test_keeps_a_bounded_window_of_calls():
+    started = []
+    lock = threading.Lock()
+
+    def func(user_id):
+        with lock:
+            started.append(user_id)
+        return user_id
+
+    consumed = 0
+    # A generator, so nothing is materialised up front either
+    for _ in map_users(func, (user_id for user_id in range(1000)), max_workers=4):
+        consumed += 1
+        with lock:
+            # In flight: up to 4 submitted plus the one just refilled before this yield
+            assert len(started) - consumed <= 4
+    assert consumed == 1000
+
+def test_closing_early_stops_submitting():
+    started = []
+    results = map_users(started.append, range(1000), max_workers=2)
+    next(results)
+    results.close()
+    assert len(started) <= 3
@@ -0,0 +1,36 @@
+# main-backend/tests/test_portfolio.py
+import pytest
+
+STOCK = {
+    'name': 'ACME', 'type': 'Stocks', 'date': '2024-01-02',
+    'details': {'purchase_price': 10, 'quantity': 5, 'current_price': 12, 'purchase_date': '2024-01-02'}
+}
+GOLD = {
+    'name': 'Coins', 'type': 'Gold', 'date': '2024-01-02',
+    'details': {'purchase_price': 50, 'weight': 2, 'current_market_value': 130, 'purchase_date': '2024-01-02'}
+}
+FUND = {
+    'name': 'Index', 'type': 'Mutual Funds', 'date': '2024-01-02',
+    'details': {'nav': 20, 'units': 10, 'current_nav': 18, 'purchase_date': '2024-01-02'}
+}
+
+def test_summary_totals_holdings_and_types(client, auth, user_id):
+    headers = auth(user_id)
+    for investment in (STOCK, GOLD, FUND):
+        assert client.post('/api/investments', json=investment, headers=headers).status_code == 201
+    summary = client.get('/api/investments/summary', headers=headers).get_json()
+
+    by_name = {holding['name']: holding for holding in summary['holdings']}
+    assert by_name['ACME'] == {**by_name['ACME'], 'cost': 50, 'value': 60, 'gain': 10, 'gain_percentage': 20}
+    # Gold's current market value is already the holding's total
+    assert (by_name['Coins']['cost'], by_name['Coins']['value']) == (100, 130)
+    assert by_name['Index']['gain_percentage'] == -10
+    assert summary['by_type']['Stocks']['count'] == 1
+    assert summary['total'] == {'cost': 350, 'value': 370, 'gain': 20, 'gain_percentage': pytest.approx(5.71)}
+
+def test_summary_is_recomputed_after_a_write(client, auth, user_id):
+    headers = auth(user_id)
+    client.post('/api/investments', json=STOCK, headers=headers)
+    assert client.get('/api/investments/summary', headers=headers).get_json()['total']['value'] == 60
+    client.post('/api/investments', json=STOCK, headers=headers)
+    assert client.get('/api/investments/summary', headers=headers).get_json()['total']['value'] == 120
@@ -0,0 +1,42 @@
+# main-backend/tests/test_price_history.py
+from datetime import date
+import numpy as np
+import pytest
+import storage.price_history as price_history
+from storage.price_history import append_prices, price_window
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_history, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(price_history, 'history_maps', {})
+    return tmp_path
+
+def day(value):
+    return date.fromisoformat(value).toordinal()
+
+def test_appends_fill_gaps_and_skip_known_days(history_dir):
+    assert append_prices('PHA', [('2024-01-01', 10), ('2024-01-04', 13)]) == 4
+    # Re-loading the same feed, or older days, writes nothing
+    assert append_prices('PHA', [('2024-01-03', 99), ('2024-01-04', 13)]) == 0
+    assert append_prices('PHA', [('2024-01-06', 15)]) == 2
+    window = price_window('PHA', day('2023-12-30'), day('2024-01-08'))
+    assert np.isnan(window[:2]).all()
+    # Gaps carry the previous close; days after the last quote carry the last price
+    assert window[2:].tolist() == [10, 10, 10, 13, 13, 15, 15, 15]
+    assert price_window('NOPE', day('2024-01-01'), day('2024-01-02')) is None
+
+def test_value_series_endpoints(client, auth, user_id, history_dir):
+    headers = auth(user_id)
+    details = {'purchase_price': 10, 'quantity': 2, 'current_price': 10, 'symbol': 'PHB'}
+    early = client.post('/api/investments', json={'name': 'Early', 'type': 'Stocks', 'date': '2024-01-01', 'details': {**details, 'purchase_date': '2024-01-01'}}, headers=headers).get_json()
+    client.post('/api/investments', json={'name': 'Late', 'type': 'Stocks', 'date': '2024-01-03', 'details': {**details, 'purchase_date': '2024-01-03'}}, headers=headers)
+    append_prices('PHB', [('2024-01-02', 10), ('2024-01-04', 12)])
+
+    series = client.get(f"/api/investments/{early['id']}/history?start=2024-01-01&end=2024-01-05", headers=headers).get_json()
+    # Starts at the first quote, not the window start
+    assert series['start_date'] == '2024-01-02' and series['values'] == [20, 20, 24, 24]
+
+    portfolio = client.get('/api/investments/history?start=2024-01-01&end=2024-01-05', headers=headers).get_json()
+    # The second holding counts from its purchase date
+    assert portfolio['start_date'] == '2024-01-02' and portfolio['values'] == [20, 40, 48, 48]
+    assert client.get('/api/investments/history?start=2024-02-01&end=2024-01-01', headers=headers).status_code == 400
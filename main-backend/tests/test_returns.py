@@ -0,0 +1,42 @@
+# main-backend/tests/test_returns.py
+from datetime import date, timedelta
+import numpy as np
+import pytest
+import storage.price_history as price_history
+from storage.price_history import append_prices
+from storage.returns import solve_xirr, cash_flow_matrix
+
+def test_batched_xirr_matches_known_rates():
+    start = date(2020, 1, 1).toordinal()
+    flows = [
+        [(start, -100.0), (start + 365, 110.0)],
+        # Doubling over two years is about 41.4% a year
+        [(start, -100.0), (start + 730, 200.0)],
+        [(start, -100.0), (start + 180, -100.0), (start + 365, 150.0)],
+        # No sign change: no rate
+        [(start, 100.0), (start + 365, 100.0)],
+        []
+    ]
+    rates = solve_xirr(*cash_flow_matrix(flows))
+    assert rates[0] == pytest.approx(0.10, abs=1e-6)
+    assert rates[1] == pytest.approx(2 ** 0.5 - 1, abs=1e-6)
+    amounts, years = cash_flow_matrix([flows[2]])
+    assert (amounts[0] * (1 + rates[2]) ** -years[0]).sum() == pytest.approx(0, abs=1e-6)
+    assert np.isnan(rates[3]) and np.isnan(rates[4])
+
+def test_returns_endpoint_combines_xirr_and_twr(client, auth, user_id, tmp_path, monkeypatch):
+    monkeypatch.setattr(price_history, 'HISTORY_DIR', str(tmp_path))
+    monkeypatch.setattr(price_history, 'history_maps', {})
+    headers = auth(user_id)
+    bought = (date.today() - timedelta(days=365)).isoformat()
+    details = {'purchase_price': 10, 'quantity': 10, 'current_price': 12, 'purchase_date': bought, 'symbol': 'RTA'}
+    client.post('/api/investments', json={'name': 'ACME', 'type': 'Stocks', 'date': bought, 'details': details}, headers=headers)
+    days = [(date.today() - timedelta(days=n)).isoformat() for n in (2, 1, 0)]
+    append_prices('RTA', list(zip(days, [10, 11, 12.1])))
+
+    returns = client.get(f'/api/investments/returns?start={days[0]}&end={days[-1]}', headers=headers).get_json()
+    [holding] = returns['holdings']
+    assert holding['xirr_percentage'] == pytest.approx(20, abs=0.1)
+    assert holding['twr_percentage'] == pytest.approx(21)
+    assert returns['portfolio']['twr_percentage'] == pytest.approx(21)
+    assert client.get('/api/investments/returns?start=bad', headers=headers).status_code == 400
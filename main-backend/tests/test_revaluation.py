@@ -0,0 +1,37 @@
+# main-backend/tests/test_revaluation.py
+import pytest
+from jobs.revalue_investments import revalue_all_users
+from storage.investments import get_all_investments
+from storage.prices import load_prices_from_csv, get_prices, price_db_path
+
+def write_csv(path, text):
+    path.write_text(text)
+    return str(path)
+
+def holding(name, investment_type, details):
+    return {'name': name, 'type': investment_type, 'date': '2024-01-02', 'details': {'purchase_date': '2024-01-02', **details}}
+
+def test_later_prices_win_and_bad_rows_are_reported(tmp_path):
+    load_prices_from_csv([write_csv(tmp_path / 'a.csv', 'symbol,price,date\nRVA,10,2024-03-01\nRVB,5,2024-03-01\n')])
+    load_prices_from_csv([write_csv(tmp_path / 'b.csv', 'symbol,price,date\nRVA,12,2024-03-02\nRVB,4,2024-02-01\n')])
+    prices = get_prices(['RVA', 'RVB'])
+    assert prices['RVA']['price'] == 12 and prices['RVB']['price'] == 5
+    with pytest.raises(ValueError, match='c.csv:3'):
+        load_prices_from_csv([write_csv(tmp_path / 'c.csv', 'symbol,price\nRVA,1\nRVB,-2\n')])
+
+def test_revaluation_updates_matching_holdings_across_users(client, auth, tmp_path):
+    first, second = 4001, 4002
+    client.post('/api/investments', json=holding('ACME', 'Stocks', {'purchase_price': 10, 'quantity': 5, 'current_price': 10, 'symbol': 'RVX'}), headers=auth(first))
+    client.post('/api/investments', json=holding('Coins', 'Gold', {'purchase_price': 50, 'weight': 2, 'current_market_value': 100, 'symbol': 'RVG'}), headers=auth(second))
+    client.post('/api/investments', json=holding('Other', 'Stocks', {'purchase_price': 10, 'quantity': 1, 'current_price': 10}), headers=auth(second))
+    load_prices_from_csv([write_csv(tmp_path / 'p.csv', 'symbol,price\nRVX,14\nRVG,60\n')])
+
+    updated, users, failures = revalue_all_users([first, second], price_db_path(), workers=2)
+    assert (updated, users, failures) == (2, 2, {})
+    assert get_all_investments(first)[0]['details']['current_price'] == 14
+    by_name = {investment['name']: investment['details'] for investment in get_all_investments(second)}
+    # Gold is priced per unit of weight
+    assert by_name['Coins']['current_market_value'] == 120
+    assert by_name['Other']['current_price'] == 10
+    # Nothing changes on a second run
+    assert revalue_all_users([first, second], price_db_path(), workers=2)[0] == 0
@@ -0,0 +1,31 @@
+# main-backend/tests/test_summary.py
+
+def test_summary_totals_for_a_month(client, auth, user_id):
+    headers = auth(user_id)
+    client.post('/api/income', json={'name': 'Salary', 'amount': 1200, 'term': 'monthly', 'date': '2026-01-01'}, headers=headers)
+    for category, amount, day in [('Food', 100, '2026-03-02'), ('Rent', 500, '2026-03-01'), ('Food', 70, '2026-04-02')]:
+        client.post('/api/expenses', json={'category': category, 'amount': amount, 'date': day}, headers=headers)
+    client.post('/api/budgets', json={'categories': {'Food': 150, 'Rent': 500}}, headers=headers)
+
+    summary = client.get('/api/summary?month=2026-03', headers=headers).get_json()
+    assert summary['month'] == '2026-03'
+    assert summary['cash_flow'] == {'monthly_income': 1200, 'expenses': 600, 'goal_allocations': 0, 'net': 600}
+    assert summary['budget']['variance'] == 50
+    assert summary['budget']['by_category'] == {'Food': 50, 'Rent': 0}
+    assert summary['debt'] == {'outstanding': 0, 'count': 0}
+    assert summary['goals']['progress_percentage'] is None
+
+    assert client.get('/api/summary?month=2026-04', headers=headers).get_json()['cash_flow']['expenses'] == 70
+    assert client.get('/api/summary?month=March', headers=headers).status_code == 400
+
+def test_summary_etag_follows_the_data_version(client, auth, user_id):
+    headers = auth(user_id)
+    client.post('/api/expenses', json={'category': 'Food', 'amount': 10, 'date': '2026-03-02'}, headers=headers)
+    first = client.get('/api/summary?month=2026-03', headers=headers)
+    etag = first.headers['ETag']
+    assert client.get('/api/summary?month=2026-03', headers={**headers, 'If-None-Match': etag}).status_code == 304
+
+    client.post('/api/expenses', json={'category': 'Food', 'amount': 15, 'date': '2026-03-03'}, headers=headers)
+    refreshed = client.get('/api/summary?month=2026-03', headers={**headers, 'If-None-Match': etag})
+    assert refreshed.status_code == 200 and refreshed.headers['ETag'] != etag
+    assert refreshed.get_json()['cash_flow']['expenses'] == 25
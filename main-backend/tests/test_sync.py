@@ -0,0 +1,45 @@
+# main-backend/tests/test_sync.py
+INCOME = {'name': 'Salary', 'amount': 5000, 'term': 'monthly', 'date': '2024-01-01'}
+GOAL = {'name': 'House', 'target_amount': 100000, 'current_amount': 0, 'target_date': '2030-01-01'}
+
+def sync(client, headers, since, limit=None):
+    url = f'/api/sync?since={since}' + (f'&limit={limit}' if limit else '')
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_changes_since_a_version_carry_rows_and_deletes(client, auth, user_id):
+    headers = auth(user_id)
+    first = client.post('/api/income', json=INCOME, headers=headers).get_json()
+    baseline = sync(client, headers, 0)
+    assert [row['id'] for row in baseline['changes']['income']['upserted']] == [first['id']]
+
+    second = client.post('/api/income', json={**INCOME, 'name': 'Bonus'}, headers=headers).get_json()
+    client.post('/api/goals', json=GOAL, headers=headers)
+    assert client.delete(f"/api/income/{first['id']}", headers=headers).status_code == 200
+
+    delta = sync(client, headers, baseline['version'])
+    assert delta['has_more'] is False and delta['version'] > baseline['version']
+    assert delta['changes']['income'] == {'upserted': [second], 'deleted': [first['id']]}
+    # JSON columns come back decoded
+    assert delta['changes']['goals']['upserted'][0]['allocations'] == []
+    # Nothing new since the latest version
+    assert sync(client, headers, delta['version'])['changes'] == {}
+
+def test_paging_walks_every_change_once(client, auth, user_id):
+    headers = auth(user_id)
+    created = [client.post('/api/income', json={**INCOME, 'name': f'Income {i}'}, headers=headers).get_json()['id'] for i in range(5)]
+    seen, since, pages = [], 0, 0
+    while True:
+        page = sync(client, headers, since, limit=2)
+        seen += [row['id'] for row in page['changes'].get('income', {}).get('upserted', [])]
+        since, pages = page['version'], pages + 1
+        if not page['has_more']:
+            break
+    assert seen == created and pages == 3
+
+def test_since_ahead_of_the_data_is_rejected(client, auth, user_id):
+    headers = auth(user_id)
+    client.post('/api/income', json=INCOME, headers=headers)
+    assert client.get('/api/sync?since=999', headers=headers).status_code == 400
+    assert client.get('/api/sync?since=0&limit=0', headers=headers).status_code == 400
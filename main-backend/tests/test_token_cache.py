@@ -0,0 +1,46 @@
+# main-backend/tests/test_token_cache.py
+import time
+import jwt
+import middleware
+from middleware import TokenCache, JWT_SECRET
+from conftest import make_token
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(middleware.time, 'monotonic', lambda: now[0])
+    cache = TokenCache(max_size=2, ttl=60)
+    cache.put('a', {'user_id': 1})
+    cache.put('b', {'user_id': 2})
+    assert cache.get('a') == {'user_id': 1}
+    cache.put('c', {'user_id': 3})
+    # 'b' was least recently used
+    assert cache.get('b') is None and cache.get('a') is not None
+    now[0] += 61
+    assert cache.get('a') is None
+    assert cache.stats()['evictions'] == 1 and cache.stats()['size'] == 1
+
+def test_entries_never_outlive_the_token(monkeypatch):
+    cache = TokenCache(max_size=10, ttl=300)
+    cache.put('expired', {'user_id': 1, 'exp': int(time.time()) - 1})
+    assert cache.get('expired') is None
+
+def test_requests_reuse_verified_claims(client, auth, user_id, monkeypatch):
+    decodes = []
+    decode = jwt.decode
+    monkeypatch.setattr(middleware.jwt, 'decode', lambda *args, **kwargs: decodes.append(1) or decode(*args, **kwargs))
+    headers = auth(user_id)
+    for _ in range(3):
+        assert client.get('/api/income', headers=headers).status_code == 200
+    assert len(decodes) == 1
+
+def test_role_and_status_checks(client, auth, user_id):
+    assert client.get('/api/income', headers={'Authorization': 'Bearer not-a-token'}).status_code == 401
+    assert client.get('/api/income').status_code == 401
+    # Role-restricted endpoints need the role and an approved account
+    assert client.get(f'/api/cfa/users/{user_id}/financials', headers=auth(user_id)).status_code == 403
+    pending = make_token(user_id + 1, role='CFA', status='pending')
+    assert client.get(f'/api/cfa/users/{user_id}/financials', headers={'Authorization': f'Bearer {pending}'}).status_code == 403
+    assert client.get(f'/api/cfa/users/{user_id}/financials', headers=auth(user_id + 1, role='CFA')).status_code == 200
+    # An expired token is refused even though it verified before
+    expired = jwt.encode({'user_id': user_id, 'role': 'user', 'status': 'approved', 'exp': int(time.time()) - 5}, JWT_SECRET, algorithm='HS256')
+    assert client.get('/api/income', headers={'Authorization': f'Bearer {expired}'}).status_code == 401
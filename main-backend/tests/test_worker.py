@@ -0,0 +1,36 @@
+# main-backend/tests/test_worker.py
+import os
+import signal
+import pytest
+import app as app_module
+import storage.portfolio as portfolio
+from middleware import token_cache
+from utils.events import change_broker
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_worker_starts_with_fresh_state():
+    token_cache.put('digest', {'user_id': 1})
+    subscription = change_broker.subscribe(1, 0)
+    portfolio.summary_cache[1] = (0, {})
+    # Fork while other threads hold the locks, as can happen in a threaded master
+    with token_cache.lock, change_broker.lock, portfolio.summary_cache_lock:
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            # A lock inherited in the held state would hang the child; fail instead
+            signal.alarm(10)
+            try:
+                app_module.init_worker()
+                token_cache.put('other', {'user_id': 2})
+                fresh = (
+                    token_cache.get('digest') is None and token_cache.stats()['size'] == 1
+                    and not change_broker.has_subscribers(1)
+                    and portfolio.summary_cache == {}
+                )
+                with portfolio.summary_cache_lock:
+                    status = 0 if fresh else 2
+            finally:
+                os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    change_broker.unsubscribe(subscription)
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,101 @@
+# main-backend/utils/access_log.py
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from flask import g, request
+from .db import db_time
+
+# Fraction of successful requests written to the access log; errors are always logged
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv('ACCESS_LOG_SAMPLE_RATE', '1.0'))
+# DEBUG_LOGGING=1 turns on debug records, including request/response headers
+DEBUG_LOGGING = os.getenv('DEBUG_LOGGING', '').lower() in ('1', 'true', 'yes')
+
+access_logger = logging.getLogger('access')
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        else:
+            entry['message'] = record.getMessage()
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+log_listener = None
+
+def configure_logging():
+    """
+    Route all logging through a queue so request threads never block on stdout; a single
+    background thread formats records as JSON lines and writes them.
+    """
+    global log_listener
+    if log_listener is not None:
+        return
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    log_listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    root.setLevel(logging.DEBUG if DEBUG_LOGGING else logging.INFO)
+
+def restart_logging():
+    # For forked worker processes: the listener thread doesn't survive fork, so start a new one
+    global log_listener
+    log_listener = None
+    configure_logging()
+
+def init_access_log(app):
+    configure_logging()
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        # Kept in the request's environ rather than g, which batch sub-requests share
+        request.environ['db_time_token'] = db_time.set([0.0])
+        if DEBUG_LOGGING:
+            access_logger.debug('request', extra={'fields': {'method': request.method, 'path': request.path, 'headers': dict(request.headers)}})
+
+    @app.after_request
+    def log_request(response):
+        if 'request_started' not in g:
+            return response
+        if response.status_code < 400 and random.random() >= ACCESS_LOG_SAMPLE_RATE:
+            return response
+        access_logger.info('request', extra={'fields': {
+            'method': request.method,
+            # The route template (e.g. /api/debts/<int:id>) groups requests; the path is only a fallback
+            'route': request.url_rule.rule if request.url_rule else request.path,
+            'status': response.status_code,
+            'latency_ms': round((time.perf_counter() - g.request_started) * 1000, 2),
+            'db_ms': round(db_time.get()[0] * 1000, 2),
+            # None for streamed responses
+            'bytes': response.content_length,
+            'bytes_saved': g.get('bytes_saved', 0),
+            'user_id': getattr(request, 'user_id', None)
+        }})
+        if DEBUG_LOGGING:
+            access_logger.debug('response', extra={'fields': {'headers': dict(response.headers)}})
+        return response
+
+    @app.teardown_request
+    def reset_db_timer(exc):
+        token = request.environ.pop('db_time_token', None)
+        if token is not None:
+            db_time.reset(token)
@@ -0,0 +1,247 @@
+# main-backend/utils/admission.py
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import jsonify, request
+from .db import get_shared_db_path
+
+# Token buckets as (tokens per second, burst). Each user has a read and a write bucket, and
+# all users together draw from a global read and write bucket. A rate of 0 disables the bucket.
+ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', '1').lower() in ('1', 'true', 'yes')
+USER_READ_LIMIT = (float(os.getenv('ADMISSION_USER_READ_RATE', '20')), float(os.getenv('ADMISSION_USER_READ_BURST', '40')))
+USER_WRITE_LIMIT = (float(os.getenv('ADMISSION_USER_WRITE_RATE', '5')), float(os.getenv('ADMISSION_USER_WRITE_BURST', '10')))
+GLOBAL_READ_LIMIT = (float(os.getenv('ADMISSION_GLOBAL_READ_RATE', '200')), float(os.getenv('ADMISSION_GLOBAL_READ_BURST', '400')))
+GLOBAL_WRITE_LIMIT = (float(os.getenv('ADMISSION_GLOBAL_WRITE_RATE', '50')), float(os.getenv('ADMISSION_GLOBAL_WRITE_BURST', '100')))
+# Requests that would have to wait longer than this for tokens get 429 instead of queueing
+ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', '0.5'))
+# 'memory' keeps buckets in this process; 'file' shares them between workers through a SQLite file
+ADMISSION_BACKEND = os.getenv('ADMISSION_BACKEND', 'memory')
+ADMISSION_DB_NAME = 'admission.db'
+# Seconds to wait for another worker's lock on the bucket file before failing open
+ADMISSION_DB_TIMEOUT = float(os.getenv('ADMISSION_DB_TIMEOUT', '0.05'))
+
+# GETs that also write (balance accruals), so they are charged to the write budget
+WRITING_READ_ENDPOINTS = {'debts.get_debts'}
+
+def take(state, rate, burst, cost, now):
+    """
+    Refill (tokens, updated) to now and take cost tokens, letting the balance go negative.
+    Returns the new state and the seconds until the balance is back to zero.
+    """
+    tokens, updated = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + (now - updated) * rate) - cost
+    return (tokens, now), max(0.0, -tokens / rate)
+
+class MemoryBuckets:
+    # Bucket states for this process only; with N workers each limit is effectively N times higher
+    max_buckets = 100000
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.states = {}
+
+    def reserve(self, buckets, cost, max_wait):
+        """
+        Take cost tokens from every (name, rate, burst) bucket, or from none of them if that
+        would mean waiting more than max_wait. Returns (admitted, seconds to wait).
+        """
+        with self.lock:
+            now = time.monotonic()
+            taken = {}
+            wait = 0.0
+            for name, rate, burst in buckets:
+                taken[name], bucket_wait = take(self.states.get(name), rate, burst, cost, now)
+                wait = max(wait, bucket_wait)
+            if wait > max_wait:
+                return False, wait
+            self.states.update(taken)
+            if len(self.states) > self.max_buckets:
+                self.prune(now)
+            return True, wait
+
+    def prune(self, now):
+        # Forget buckets that have refilled completely; a missing bucket starts full anyway
+        for name, (tokens, updated) in list(self.states.items()):
+            rate, burst = limit_for(name)
+            if tokens + (now - updated) * rate >= burst:
+                del self.states[name]
+
+class FileBuckets:
+    # Bucket states in a shared SQLite database, so every worker on the host draws from the same buckets
+    def __init__(self, db_name=ADMISSION_DB_NAME, timeout=ADMISSION_DB_TIMEOUT):
+        self.db_path = get_shared_db_path(db_name)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.conn = None
+        self.pid = None
+        conn = self.connection()
+        conn.execute('CREATE TABLE IF NOT EXISTS admission_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+        conn.commit()
+        # Don't hand this connection down to forked workers; each opens its own on first use
+        conn.close()
+        self.conn = None
+
+    def reset(self):
+        # In a forked worker: never use the parent's connection or a lock it may have held
+        self.lock = threading.Lock()
+        self.conn = None
+        self.pid = None
+
+    def connection(self):
+        # One connection per process, opened lazily and again in a forked child
+        if self.conn is None or self.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+            try:
+                conn.row_factory = sqlite3.Row
+                # Bucket state is disposable, so trade durability for short write locks
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=OFF')
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self.conn, self.pid = conn, os.getpid()
+        return self.conn
+
+    def reserve(self, buckets, cost, max_wait):
+        with self.lock:
+            conn = self.connection()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                now = time.time()
+                names = [name for name, _, _ in buckets]
+                placeholders = ', '.join('?' for _ in names)
+                states = {row['name']: (row['tokens'], row['updated']) for row in conn.execute(
+                    f'SELECT name, tokens, updated FROM admission_buckets WHERE name IN ({placeholders})', names
+                )}
+                taken = {}
+                wait = 0.0
+                for name, rate, burst in buckets:
+                    taken[name], bucket_wait = take(states.get(name), rate, burst, cost, now)
+                    wait = max(wait, bucket_wait)
+                if wait > max_wait:
+                    conn.rollback()
+                    return False, wait
+                conn.executemany(
+                    'INSERT OR REPLACE INTO admission_buckets (name, tokens, updated) VALUES (?, ?, ?)',
+                    [(name, tokens, updated) for name, (tokens, updated) in taken.items()]
+                )
+                conn.commit()
+                return True, wait
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+
+def limit_for(name):
+    scope, kind = name.split(':')[0], name.split(':')[-1]
+    if scope == 'global':
+        return GLOBAL_READ_LIMIT if kind == 'read' else GLOBAL_WRITE_LIMIT
+    return USER_READ_LIMIT if kind == 'read' else USER_WRITE_LIMIT
+
+class AdmissionStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.counters = {kind: {'admitted': 0, 'queued': 0, 'rejected': 0, 'wait_seconds': 0.0} for kind in ('read', 'write')}
+
+    def record(self, kind, admitted, wait):
+        with self.lock:
+            counters = self.counters[kind]
+            if not admitted:
+                counters['rejected'] += 1
+                return
+            counters['admitted'] += 1
+            if wait > 0:
+                counters['queued'] += 1
+                counters['wait_seconds'] += wait
+
+    def snapshot(self):
+        with self.lock:
+            counters = {kind: dict(values, wait_seconds=round(values['wait_seconds'], 3)) for kind, values in self.counters.items()}
+        return {
+            'enabled': ADMISSION_CONTROL,
+            'backend': ADMISSION_BACKEND,
+            'max_wait_seconds': ADMISSION_MAX_WAIT,
+            'limits': {
+                'user_read': USER_READ_LIMIT,
+                'user_write': USER_WRITE_LIMIT,
+                'global_read': GLOBAL_READ_LIMIT,
+                'global_write': GLOBAL_WRITE_LIMIT
+            },
+            **counters
+        }
+
+admission_stats = AdmissionStats()
+# Bucket backend chosen by init_admission (None while admission control is off)
+admission_backend = None
+
+def request_kind():
+    if request.method in ('GET', 'HEAD') and request.endpoint not in WRITING_READ_ENDPOINTS:
+        return 'read'
+    return 'write'
+
+def request_cost():
+    # A batch is charged one token per sub-request
+    if request.endpoint != 'batch.run_batch':
+        return 1
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and isinstance(data.get('requests'), list):
+        return max(1, len(data['requests']))
+    return 1
+
+def reset_admission():
+    # For forked worker processes: per-process buckets and counters start over
+    if admission_backend is not None:
+        admission_backend.reset()
+    admission_stats.reset()
+
+def init_admission(app):
+    global admission_backend
+    if not ADMISSION_CONTROL:
+        return
+    backend = admission_backend = FileBuckets() if ADMISSION_BACKEND == 'file' else MemoryBuckets()
+    # Imported here: middleware imports the storage layer, which utils modules otherwise don't
+    from middleware import resolve_claims
+
+    @app.before_request
+    def admit_request():
+        if request.method == 'OPTIONS' or request.endpoint is None:
+            return None
+        kind = request_kind()
+        claims, _ = resolve_claims()
+        # Unauthenticated requests only draw from the global bucket; the view answers them with 401
+        names = [f'global:{kind}'] + ([f"user:{claims['user_id']}:{kind}"] if claims else [])
+        buckets = [(name, *limit_for(name)) for name in names]
+        buckets = [bucket for bucket in buckets if bucket[1] > 0]
+        if not buckets:
+            return None
+
+        cost = request_cost()
+        burst = min(burst for _, _, burst in buckets)
+        if cost > burst:
+            # No amount of waiting admits this batch; retrying can't help, so it isn't a 429
+            admission_stats.record(kind, False, 0.0)
+            response = jsonify({'error': f'A batch may contain at most {int(burst)} {kind} requests under the current rate limits'})
+            response.status_code = 413
+            return response
+        try:
+            admitted, wait = backend.reserve(buckets, cost, ADMISSION_MAX_WAIT)
+        except sqlite3.OperationalError:
+            # Shared bucket file busy or unavailable: fail open rather than reject traffic
+            return None
+        admission_stats.record(kind, admitted, wait)
+        if not admitted:
+            response = jsonify({'error': 'Too many requests, retry later'})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+            return response
+        if wait > 0:
+            time.sleep(wait)
+        return None
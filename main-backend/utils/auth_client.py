@@ -0,0 +1,30 @@
+# main-backend/utils/auth_client.py
+import json
+import os
+import urllib.parse
+import urllib.request
+
+AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://localhost:5001')
+AUTH_SERVICE_TIMEOUT = float(os.getenv('AUTH_SERVICE_TIMEOUT', '5'))
+
+class AuthServiceError(Exception):
+    pass
+
+def fetch_users(authorization, role='user', limit=None, offset=0):
+    """
+    Fetch a page of users from auth-service, forwarding the caller's Authorization header.
+    Returns (users, total).
+    """
+    params = {'role': role, 'offset': offset}
+    if limit is not None:
+        params['limit'] = limit
+    req = urllib.request.Request(
+        f"{AUTH_SERVICE_URL}/users?{urllib.parse.urlencode(params)}",
+        headers={'Authorization': authorization}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=AUTH_SERVICE_TIMEOUT) as response:
+            payload = json.loads(response.read())
+    except Exception as e:
+        raise AuthServiceError(f"Could not fetch users from auth-service: {e}")
+    return payload['users'], payload['total']
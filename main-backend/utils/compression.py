@@ -0,0 +1,119 @@
+# main-backend/utils/compression.py
+import os
+import threading
+import zlib
+from flask import g, request
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip is offered without it
+    brotli = None
+
+# Buffered responses smaller than this are sent as-is; compressing them costs more than it saves
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+
+# Compressible content types and their (gzip level, brotli quality)
+COMPRESSION_LEVELS = {
+    'application/json': (6, 5),
+    'application/x-ndjson': (5, 4),
+    'text/csv': (6, 5),
+    'text/html': (6, 5),
+    'text/plain': (6, 5)
+}
+
+class CompressionStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def record(self, bytes_in, bytes_out):
+        with self.lock:
+            self.responses += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'responses': self.responses,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'bytes_saved': self.bytes_in - self.bytes_out
+            }
+
+compression_stats = CompressionStats()
+
+def choose_encoding():
+    offered = (['br'] if brotli else []) + ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+def new_compressor(encoding, levels):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=levels[1])
+        return compressor.process, compressor.flush, compressor.finish
+    # wbits=31 writes a gzip header and trailer
+    compressor = zlib.compressobj(levels[0], zlib.DEFLATED, 31)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+def compress_stream(chunks, encoding, levels):
+    # Flush after every chunk so streamed responses keep arriving incrementally
+    compress, flush, finish = new_compressor(encoding, levels)
+    bytes_in = 0
+    bytes_out = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            bytes_in += len(chunk)
+            compressed = compress(chunk) + flush()
+            bytes_out += len(compressed)
+            if compressed:
+                yield compressed
+        tail = finish()
+        bytes_out += len(tail)
+        yield tail
+    finally:
+        compression_stats.record(bytes_in, bytes_out)
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def init_compression(app):
+    @app.after_request
+    def compress_response(response):
+        response.vary.add('Accept-Encoding')
+        levels = COMPRESSION_LEVELS.get(response.mimetype)
+        if (levels is None or request.method == 'HEAD' or response.status_code < 200
+                or response.status_code in (204, 304) or 'Content-Encoding' in response.headers):
+            return response
+        encoding = choose_encoding()
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, levels)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < COMPRESSION_MIN_SIZE:
+                return response
+            compress, _, finish = new_compressor(encoding, levels)
+            compressed = compress(data) + finish()
+            if len(compressed) >= len(data):
+                return response
+            response.set_data(compressed)
+            saved = len(data) - len(compressed)
+            response.headers['X-Bytes-Saved'] = str(saved)
+            g.bytes_saved = saved
+            compression_stats.record(len(data), len(compressed))
+
+        response.headers['Content-Encoding'] = encoding
+        # The compressed body is a different representation of the same data
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
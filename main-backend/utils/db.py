@@ -1,9 +1,17 @@
 # main-backend/utils/db.py
+import contextvars
 import sqlite3
+from contextlib import contextmanager
 import os
+import re
+import time
+from .events import change_broker
 #from storage.resources import initialize_db  # Import initialize_db from resources
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Where user databases (db_root/user_<user_id>/finance.db) and shared databases live; each node
+# of a multi-node deployment points this at its own directory (see router/)
+db_root = os.getenv('MAIN_BACKEND_DB_DIR', os.path.join(project_root, 'db'))
 
 def get_db_path(user_id, db_name='finance.db'):
     if user_id is None:
@@ -11,15 +19,146 @@ def get_db_path(user_id, db_name='finance.db'):
     return os.path.join('storage', f'user_{user_id}_{db_name}')
 
 
+def get_user_db_path(user_id):
+    # Absolute path: main-backend/db/user_<user_id>/finance.db by default
+    return os.path.join(db_root, f'user_{user_id}', 'finance.db')
+
+def user_db_exists(user_id):
+    return os.path.exists(get_user_db_path(user_id))
+
+def user_db_mtime(user_id):
+    # Last modification of the user's database, including writes still in the WAL
+    path = get_user_db_path(user_id)
+    mtimes = [os.path.getmtime(p) for p in (path, path + '-wal') if os.path.exists(p)]
+    return max(mtimes) if mtimes else None
+
+# Seconds spent in SQLite by the current request, as a one-item list; None outside requests
+db_time = contextvars.ContextVar('db_time', default=None)
+
+def timed(method):
+    def wrapper(self, *args):
+        spent = db_time.get()
+        if spent is None:
+            return method(self, *args)
+        start = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            spent[0] += time.perf_counter() - start
+    return wrapper
+
+class TimedCursor(sqlite3.Cursor):
+    execute = timed(sqlite3.Cursor.execute)
+    executemany = timed(sqlite3.Cursor.executemany)
+    fetchone = timed(sqlite3.Cursor.fetchone)
+    fetchmany = timed(sqlite3.Cursor.fetchmany)
+    fetchall = timed(sqlite3.Cursor.fetchall)
+
+# Connection that get_db_connection hands out for its user in the current context; see shared_connection
+active_shared_connection = contextvars.ContextVar('active_shared_connection', default=None)
+
+def get_active_shared_connection(user_id):
+    shared = active_shared_connection.get()
+    return shared if shared is not None and shared.user_id == user_id else None
+
+class TrackedConnection(sqlite3.Connection):
+    # Counts query time towards the current request's db_time and, for user databases,
+    # publishes each commit's row changes to live subscribers (see utils.events).
+    # A shared connection ignores close(); an atomic one also ignores commit() until the end.
+    user_id = None
+    shared = False
+    atomic = False
+    timed_commit = timed(sqlite3.Connection.commit)
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    def close(self):
+        if not self.shared:
+            super().close()
+
+    def commit(self):
+        if self.atomic:
+            return
+        self.timed_commit()
+        if self.user_id is not None and change_broker.has_subscribers(self.user_id):
+            change_broker.publish_committed(self, self.user_id)
+
 def get_db_connection(user_id):
-    # Construct the absolute path: main-backend/db/user_<user_id>/finance.db
-    db_dir = os.path.join(project_root, 'db', f'user_{user_id}')
-    db_path = os.path.join(db_dir, 'finance.db')
-    os.makedirs(db_dir, exist_ok=True)
-    conn = sqlite3.connect(db_path)
+    shared = get_active_shared_connection(user_id)
+    if shared is not None:
+        return shared
+    db_path = get_user_db_path(user_id)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, factory=TrackedConnection)
+    conn.user_id = user_id
     conn.row_factory = sqlite3.Row
     return conn
 
+@contextmanager
+def shared_connection(user_id, atomic=False):
+    """
+    Serve every get_db_connection(user_id) inside the block from one connection, closed when
+    the block exits. With atomic=True the connection's commits are held back and the block's
+    writes commit together when it exits normally; they roll back if it raises or if the
+    caller rolls back.
+    """
+    conn = get_db_connection(user_id)
+    conn.shared = True
+    conn.atomic = atomic
+    token = active_shared_connection.set(conn)
+    try:
+        yield conn
+        if atomic:
+            conn.atomic = False
+            conn.commit()
+    finally:
+        active_shared_connection.reset(token)
+        conn.shared = False
+        conn.atomic = False
+        conn.rollback()
+        conn.close()
+
+def get_shared_db_path(db_name):
+    # Shared (not per-user) databases live next to the user directories: main-backend/db/<db_name>
+    os.makedirs(db_root, exist_ok=True)
+    return os.path.join(db_root, db_name)
+
+def get_shared_db_connection(db_name):
+    conn = sqlite3.connect(get_shared_db_path(db_name), factory=TrackedConnection)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def fetch_dicts(conn, sql, parameters=()):
+    """
+    Run a query and return its rows as plain dicts built once from the row tuples, skipping the
+    sqlite3.Row + dict(row) copy (dict(row) looks every column up by name). Used for listings
+    that go straight to the JSON encoder.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, parameters)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def list_user_ids():
+    # Every user with a database directory: main-backend/db/user_<user_id>/finance.db
+    # (user 0 is the dummy database used for admin/CFA-wide calls, not a real user)
+    if not os.path.isdir(db_root):
+        return []
+    user_ids = []
+    for entry in os.listdir(db_root):
+        match = re.fullmatch(r'user_(\d+)', entry)
+        if match and int(match.group(1)) > 0 and os.path.exists(os.path.join(db_root, entry, 'finance.db')):
+            user_ids.append(int(match.group(1)))
+    return sorted(user_ids)
+
 #def get_db_connection(user_id):
 #    # Construct the absolute path: main-backend/db/user_<user_id>/finance.db
 #    db_dir = os.path.join(project_root, 'db', f'user_{user_id}')
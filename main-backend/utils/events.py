@@ -0,0 +1,87 @@
+# main-backend/utils/events.py
+import queue
+import sqlite3
+import threading
+
+# Events a slow subscriber may fall behind by before it has to catch up from change_log
+SUBSCRIBER_BUFFER_SIZE = 256
+
+def read_changes(conn, after_seq):
+    """
+    change_log entries after after_seq, oldest first, as compact change events.
+    """
+    cursor = conn.execute(
+        'SELECT seq, table_name, row_id, operation FROM change_log WHERE seq > ? ORDER BY seq', (after_seq,)
+    )
+    return [{'seq': seq, 'table': table, 'id': row_id, 'op': operation} for seq, table, row_id, operation in cursor.fetchall()]
+
+class Subscription:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.events = queue.Queue(maxsize=SUBSCRIBER_BUFFER_SIZE)
+        # Set when events were dropped because the buffer was full
+        self.overflowed = False
+
+class ChangeBroker:
+    """
+    In-process pub/sub of committed row changes, per user. Only users with an open
+    subscription cost anything at commit time.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Drop every subscription (in a forked worker they belong to the parent's connections)
+        self.subscriptions = {}
+        self.published_seq = {}
+        self.lock = threading.Lock()
+        self.publish_locks = {}
+
+    def subscribe(self, user_id, current_seq):
+        subscription = Subscription(user_id)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+            self.publish_locks.setdefault(user_id, threading.Lock())
+            self.published_seq[user_id] = max(self.published_seq.get(user_id, 0), current_seq)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscriptions[subscription.user_id]
+                    del self.published_seq[subscription.user_id]
+                    del self.publish_locks[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        return user_id in self.subscriptions
+
+    def publish_committed(self, conn, user_id):
+        # Called after a commit on a user's connection: fan out whatever change_log gained
+        with self.lock:
+            publish_lock = self.publish_locks.get(user_id)
+        if publish_lock is None:
+            return
+        with publish_lock:
+            try:
+                events = read_changes(conn, self.published_seq.get(user_id, 0))
+            except sqlite3.OperationalError:
+                return
+            if not events:
+                return
+            with self.lock:
+                if user_id in self.published_seq:
+                    self.published_seq[user_id] = events[-1]['seq']
+                subscribers = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscribers:
+            for event in events:
+                try:
+                    subscription.events.put_nowait(event)
+                except queue.Full:
+                    subscription.overflowed = True
+                    break
+
+change_broker = ChangeBroker()
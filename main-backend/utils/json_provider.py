@@ -0,0 +1,80 @@
+# main-backend/utils/json_provider.py
+import dataclasses
+import json
+import sqlite3
+from flask import Response, current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+# Items per chunk when streaming a JSON array
+STREAM_CHUNK_SIZE = 500
+
+def encode_default(obj):
+    # Types neither encoder handles natively
+    if isinstance(obj, sqlite3.Row):
+        # Fallback for rows passed in as-is; listings are fetched as dicts (utils.db.fetch_dicts)
+        return dict(zip(obj.keys(), obj))
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, 'tolist'):  # numpy arrays and scalars
+        return obj.tolist()
+    return DefaultJSONProvider.default(obj)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson when it is installed, else the standard library.
+    Also serialises sqlite3.Row, dataclasses and numpy values. Output matches the default
+    provider: keys sorted when sort_keys is set, dates as HTTP dates.
+    """
+
+    def options(self):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps_bytes(self, obj):
+        if orjson is None:
+            return json.dumps(obj, default=encode_default, sort_keys=self.sort_keys, ensure_ascii=self.ensure_ascii).encode()
+        return orjson.dumps(obj, default=encode_default, option=self.options())
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('default', encode_default)
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Same call convention as jsonify, but encodes straight to bytes
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+    def stream_array(self, items, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Yield a JSON array chunk by chunk, so large lists are never held as one encoded string.
+        """
+        yield b'['
+        chunk = []
+        first = True
+        for item in items:
+            chunk.append(self.dumps_bytes(item))
+            if len(chunk) >= chunk_size:
+                yield (b'' if first else b',') + b','.join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield (b'' if first else b',') + b','.join(chunk)
+        yield b']\n'
+
+def stream_json_array(items):
+    # Requires the app to use FastJSONProvider
+    return Response(current_app.json.stream_array(items), mimetype=current_app.json.mimetype)
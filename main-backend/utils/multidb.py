@@ -0,0 +1,89 @@
+# main-backend/utils/multidb.py
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .db import get_user_db_path, user_db_exists
+
+def attach_limit():
+    # Most SQLite builds allow 10 attached databases (SQLITE_MAX_ATTACHED); ask the library
+    conn = sqlite3.connect(':memory:')
+    try:
+        return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    except AttributeError:
+        return 10
+    finally:
+        conn.close()
+
+def batch_user_ids(user_ids, batch_size=None):
+    """
+    Split user ids into batches small enough to ATTACH to a single connection.
+    Duplicates and users without a database are dropped.
+    """
+    batch_size = min(batch_size or attach_limit(), attach_limit())
+    user_ids = [user_id for user_id in dict.fromkeys(user_ids) if user_db_exists(user_id)]
+    return [user_ids[i:i + batch_size] for i in range(0, len(user_ids), batch_size)]
+
+def build_union_query(template, user_ids, outer=None):
+    # {db} is the attached schema name and {user_id} the owning user, substituted per database
+    parts = [template.format(db=f'u{i}', user_id=int(user_id)) for i, user_id in enumerate(user_ids)]
+    query = '\nUNION ALL\n'.join(parts)
+    return outer.format(rows=query) if outer else query
+
+def iter_batch(template, user_ids, params=None, outer=None):
+    """
+    ATTACH one batch of user databases read-only to an in-memory connection and stream the
+    rows of the UNION ALL of template over all of them.
+    """
+    conn = sqlite3.connect(':memory:', uri=True)
+    try:
+        for i, user_id in enumerate(user_ids):
+            conn.execute(f'ATTACH DATABASE ? AS u{i}', (f'file:{get_user_db_path(user_id)}?mode=ro',))
+        cursor = conn.execute(build_union_query(template, user_ids, outer), params or {})
+        yield [column[0] for column in cursor.description]
+        yield from cursor
+    finally:
+        conn.close()
+
+def run_batch(template, user_ids, params=None, outer=None):
+    # Worker-process entry point: the rows have to be pickled back, so materialise them
+    rows = iter_batch(template, user_ids, params, outer)
+    return next(rows), list(rows)
+
+def query_users(template, user_ids, params=None, outer=None, batch_size=None, workers=None):
+    """
+    Run one SELECT across many user databases with a handful of SQL passes instead of one
+    connection per user.
+
+    template is a plain SELECT (no ORDER BY/LIMIT) that names tables as {db}.<table> and may
+    use {user_id} as a literal for the owning user; params are named (:name) parameters shared
+    by every database. If outer is given it wraps each batch's UNION ALL as {rows}, e.g. to
+    pre-aggregate per batch ('SELECT category, SUM(amount) FROM ({rows}) GROUP BY category');
+    results from different batches are then partial and must be merged by the caller.
+
+    Batches run in-process when workers is 1 (or there is a single batch), otherwise on a
+    process pool. Yields the column names first, then every row as a tuple. Raises
+    sqlite3.Error if the template doesn't fit some database's schema.
+    """
+    batches = batch_user_ids(user_ids, batch_size)
+    if not batches:
+        return
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(batches) == 1:
+        for index, batch in enumerate(batches):
+            rows = iter_batch(template, batch, params, outer)
+            columns = next(rows)
+            if index == 0:
+                yield columns
+            yield from rows
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+        futures = [pool.submit(run_batch, template, batch, params, outer) for batch in batches]
+        columns_sent = False
+        for future in as_completed(futures):
+            columns, rows = future.result()
+            if not columns_sent:
+                yield columns
+                columns_sent = True
+            yield from rows
@@ -0,0 +1,33 @@
+# main-backend/utils/parallel.py
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+# SQLite releases the GIL while it reads, so a small thread pool overlaps per-user database I/O
+DEFAULT_USER_WORKERS = min(16, (os.cpu_count() or 1) * 4)
+
+def map_users(func, user_ids, max_workers=None):
+    """
+    Run func(user_id) for every user on a bounded thread pool.
+    Yields (user_id, result, error) in completion order; error is None on success.
+    At most max_workers calls are in flight, and the next user is only submitted when one
+    finishes, so memory stays flat however many users there are (user_ids may be an iterator).
+    Closing the generator early waits only for the calls in flight.
+    """
+    max_workers = max_workers or DEFAULT_USER_WORKERS
+    remaining = iter(user_ids)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = {pool.submit(func, user_id): user_id for user_id in islice(remaining, max_workers)}
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                user_id = in_flight.pop(future)
+                # Refill before handing the result over so the pool keeps working meanwhile
+                for next_user_id in islice(remaining, 1):
+                    in_flight[pool.submit(func, next_user_id)] = next_user_id
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield user_id, None, e
+                    continue
+                yield user_id, result, None
@@ -0,0 +1,117 @@
+# main-backend/utils/sketches.py
+import math
+import numpy as np
+
+class QuantileSketch:
+    """
+    Mergeable quantile summary (a merging t-digest). Keeps at most about `compression`
+    weighted centroids however many values are added, with the finest resolution near the
+    tails. Sketches built over disjoint inputs can be merged and then queried as one.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.buffer = []
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        value = float(value)
+        if not math.isfinite(value):
+            return
+        self.buffer.append(value)
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= self.compression * 5:
+            self.compress()
+
+    def merge(self, other):
+        other.compress()
+        self.compress()
+        self.means = np.concatenate([self.means, other.means])
+        self.weights = np.concatenate([self.weights, other.weights])
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress(force=True)
+        return self
+
+    def scale(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def scale_inverse(self, k):
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def compress(self, force=False):
+        if not self.buffer and not force:
+            return
+        means = np.concatenate([self.means, np.asarray(self.buffer, dtype=np.float64)])
+        weights = np.concatenate([self.weights, np.ones(len(self.buffer))])
+        self.buffer = []
+        if not len(means):
+            return
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+        total_weight = weights.sum()
+
+        merged_means = []
+        merged_weights = []
+        current_mean = means[0]
+        current_weight = weights[0]
+        q_start = 0.0
+        q_limit = self.scale_inverse(self.scale(q_start) + 1)
+        for mean, weight in zip(means[1:], weights[1:]):
+            if q_start + (current_weight + weight) / total_weight <= q_limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                merged_means.append(current_mean)
+                merged_weights.append(current_weight)
+                q_start += current_weight / total_weight
+                q_limit = self.scale_inverse(self.scale(q_start) + 1)
+                current_mean = mean
+                current_weight = weight
+        merged_means.append(current_mean)
+        merged_weights.append(current_weight)
+        self.means = np.array(merged_means)
+        self.weights = np.array(merged_weights)
+
+    def quantile(self, q):
+        """
+        Estimated value at quantile q (0..1), or None when the sketch is empty.
+        """
+        self.compress()
+        if not self.count:
+            return None
+        if len(self.means) == 1:
+            return float(self.means[0])
+        # Each centroid's mean sits at the middle of its weight; interpolate between centroids
+        target = q * self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        if target <= centers[0]:
+            return float(self.min + (self.means[0] - self.min) * target / centers[0]) if centers[0] > 0 else self.min
+        if target >= centers[-1]:
+            tail = self.weights.sum() - centers[-1]
+            return float(self.means[-1] + (self.max - self.means[-1]) * (target - centers[-1]) / tail) if tail > 0 else self.max
+        return float(np.interp(target, centers, self.means))
+
+    def summary(self, percentiles=(10, 25, 50, 75, 90)):
+        if not self.count:
+            return {'count': 0}
+        result = {
+            'count': self.count,
+            'mean': round(self.total / self.count, 2),
+            'min': round(self.min, 2),
+            'max': round(self.max, 2)
+        }
+        for percentile in percentiles:
+            result[f'p{percentile}'] = round(self.quantile(percentile / 100), 2)
+        return result
@@ -1,5 +1,5 @@
 # recommendation-service/app.py
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
 
 app = Flask(__name__)
@@ -0,0 +1,93 @@
+# router/app.py
+import http.client
+import logging
+import os
+import re
+from urllib.parse import urlsplit
+import jwt
+from flask import Flask, Response, jsonify, request
+from ring import HashRing, load_nodes
+
+logger = logging.getLogger(__name__)
+
+# main-backend nodes as name=url pairs, e.g. node1=http://10.0.0.1:5000,node2=http://10.0.0.2:5000
+NODES = load_nodes()
+ring = HashRing(list(NODES))
+# Requests that name no user (missing token, cross-user admin views) go here
+DEFAULT_NODE = os.getenv('ROUTER_DEFAULT_NODE', next(iter(NODES)))
+UPSTREAM_TIMEOUT = float(os.getenv('ROUTER_UPSTREAM_TIMEOUT', '60'))
+
+# Paths that act on another user's data (a CFA writing advisories, CFA/admin views of one
+# user) are routed by that user
+PATH_USER_PATTERNS = [
+    re.compile(r'^/api/advisories/user/(\d+)'),
+    re.compile(r'^/api/(?:cfa|admin)/users/(\d+)')
+]
+
+# Hop-by-hop headers are per connection and never forwarded
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailer', 'transfer-encoding', 'upgrade'}
+
+app = Flask(__name__)
+
+def routing_user_id():
+    for pattern in PATH_USER_PATTERNS:
+        match = pattern.match(request.path)
+        if match:
+            return int(match.group(1))
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) != 2:
+        return None
+    try:
+        # Only picks the node; the node verifies the signature, so a forged token gets nowhere
+        claims = jwt.decode(parts[1], options={'verify_signature': False})
+        return int(claims['user_id'])
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        return None
+
+def forward(node):
+    target = urlsplit(NODES[node])
+    conn_class = http.client.HTTPSConnection if target.scheme == 'https' else http.client.HTTPConnection
+    conn = conn_class(target.hostname, target.port, timeout=UPSTREAM_TIMEOUT)
+    headers = {name: value for name, value in request.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() != 'host'}
+    headers['X-Forwarded-For'] = ', '.join(filter(None, [request.headers.get('X-Forwarded-For'), request.remote_addr]))
+    headers['X-Forwarded-Host'] = request.host
+    path = request.full_path if request.query_string else request.path
+    conn.request(request.method, path, body=request.get_data(), headers=headers)
+    upstream = conn.getresponse()
+
+    def body():
+        # read1 returns what has arrived, so streamed responses (SSE, NDJSON) stay incremental
+        try:
+            while True:
+                chunk = upstream.read1(65536)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            conn.close()
+
+    response = Response(body(), status=upstream.status)
+    response.headers.clear()
+    for name, value in upstream.getheaders():
+        if name.lower() not in HOP_BY_HOP_HEADERS:
+            response.headers.add(name, value)
+    response.headers['X-Routed-To'] = node
+    return response
+
+@app.route('/', defaults={'path': ''}, methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'HEAD'])
+@app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'HEAD'])
+def route(path):
+    user_id = routing_user_id()
+    node = ring.node_for(user_id) if user_id is not None else DEFAULT_NODE
+    try:
+        return forward(node)
+    except (OSError, http.client.HTTPException) as e:
+        logger.warning(f"Node {node} unreachable for {request.method} {request.path}: {e}")
+        return jsonify({'error': f'Upstream node {node} is unavailable'}), 502
+
+@app.route('/router/nodes', methods=['GET'])
+def get_nodes():
+    return jsonify({'nodes': NODES, 'default_node': DEFAULT_NODE}), 200
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=8000, debug=True)
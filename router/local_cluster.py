@@ -0,0 +1,58 @@
+# router/local_cluster.py
+"""
+Run a local cluster for trying out user-affinity routing: several main-backend nodes, each
+with its own data directory, behind the router. Stop it with Ctrl-C.
+
+Usage (from the repository root):
+    python router/local_cluster.py --nodes 3 --data-root /tmp/finance-cluster
+Then send requests to http://127.0.0.1:8000; the X-Routed-To response header names the node.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def main():
+    parser = argparse.ArgumentParser(description="Start main-backend nodes behind the user-affinity router.")
+    parser.add_argument('--nodes', type=int, default=2, help="Number of main-backend nodes (default: 2)")
+    parser.add_argument('--data-root', required=True, help="Directory holding one data directory per node")
+    parser.add_argument('--base-port', type=int, default=5100, help="Node n listens on base-port + n (default: 5100)")
+    parser.add_argument('--router-port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help="serve.py workers per node (default: 1)")
+    args = parser.parse_args()
+
+    # Stop the cluster on SIGTERM as on Ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    serve = os.path.join(ROOT, 'serve.py')
+    nodes = {f'node{n}': args.base_port + n for n in range(1, args.nodes + 1)}
+    processes = []
+    for node, port in nodes.items():
+        data_dir = os.path.join(os.path.abspath(args.data_root), node)
+        os.makedirs(data_dir, exist_ok=True)
+        env = dict(os.environ, MAIN_BACKEND_DB_DIR=data_dir)
+        processes.append(subprocess.Popen([sys.executable, serve, 'main-backend', '--host', '127.0.0.1', '--port', str(port), '--workers', str(args.workers)], env=env))
+        print(f"{node}: http://127.0.0.1:{port}, data in {data_dir}")
+
+    router_nodes = ','.join(f'{node}=http://127.0.0.1:{port}' for node, port in nodes.items())
+    env = dict(os.environ, ROUTER_NODES=router_nodes)
+    processes.append(subprocess.Popen([sys.executable, serve, 'router', '--host', '127.0.0.1', '--port', str(args.router_port), '--workers', str(args.workers)], env=env))
+    print(f"router: http://127.0.0.1:{args.router_port} (ROUTER_NODES={router_nodes})")
+
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        for process in processes:
+            process.wait()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# router/rebalance.py
+"""
+Move user databases to the nodes that own them after the node set changes.
+
+Each node keeps its users under its own data directory (MAIN_BACKEND_DB_DIR on that node):
+<data dir>/user_<id>/. Given the node names before and after the change, this finds every user
+whose owner changed and moves their directory (database, WAL and all) to the new owner.
+Run it while the router is stopped or still on the old node list, then start the router with
+the new ROUTER_NODES. Data directories must be reachable from this host (local or mounted).
+
+Usage:
+    python router/rebalance.py --old node1 --new node1,node2 \
+        --data-dir node1=main-backend/db --data-dir node2=/srv/node2/db [--dry-run]
+"""
+import argparse
+import os
+import re
+import shutil
+import sqlite3
+import sys
+from ring import HashRing
+
+def list_users(data_dir):
+    if not os.path.isdir(data_dir):
+        return []
+    return sorted(int(match.group(1)) for match in (re.fullmatch(r'user_(\d+)', entry) for entry in os.listdir(data_dir)) if match)
+
+def checkpoint(user_dir):
+    # Fold the WAL into the database so the copy on the new node is complete on its own
+    db_path = os.path.join(user_dir, 'finance.db')
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        finally:
+            conn.close()
+
+def plan_moves(old_ring, new_ring, data_dirs):
+    """
+    (user_id, from_node, to_node) for every user stored on a node that no longer owns them.
+    Users are looked up where they actually are, so a partly finished rebalance can be rerun.
+    """
+    moves = []
+    for node in old_ring.nodes:
+        for user_id in list_users(data_dirs[node]):
+            owner = new_ring.node_for(user_id)
+            if owner != node:
+                moves.append((user_id, node, owner))
+    return moves
+
+def main():
+    parser = argparse.ArgumentParser(description="Move user databases to their owners after nodes join or leave.")
+    parser.add_argument('--old', required=True, help="Comma-separated node names before the change")
+    parser.add_argument('--new', required=True, help="Comma-separated node names after the change")
+    parser.add_argument('--data-dir', action='append', default=[], metavar='NAME=PATH', help="A node's data directory (repeat for every node)")
+    parser.add_argument('--dry-run', action='store_true', help="Print the moves without making them")
+    args = parser.parse_args()
+
+    old_nodes = [node for node in args.old.split(',') if node]
+    new_nodes = [node for node in args.new.split(',') if node]
+    data_dirs = dict(entry.split('=', 1) for entry in args.data_dir)
+    missing = [node for node in set(old_nodes) | set(new_nodes) if node not in data_dirs]
+    if missing:
+        parser.error(f"--data-dir needed for: {', '.join(sorted(missing))}")
+
+    moves = plan_moves(HashRing(old_nodes), HashRing(new_nodes), data_dirs)
+    total = sum(len(list_users(data_dirs[node])) for node in set(old_nodes))
+    print(f"{len(moves)} of {total} users change node")
+    # A user directory on both nodes means two diverging copies (e.g. the new owner already
+    # served the user); which one to keep is not ours to guess, so nothing is moved
+    conflicts = [(user_id, os.path.join(data_dirs[target], f'user_{user_id}')) for user_id, _, target in moves if os.path.exists(os.path.join(data_dirs[target], f'user_{user_id}'))]
+    for user_id, target_dir in conflicts:
+        print(f"user {user_id}: conflict, {target_dir} already exists")
+    if conflicts:
+        sys.exit(f"{len(conflicts)} users exist on both nodes; resolve them (keep one copy) and rerun. Nothing was moved.")
+    for user_id, source, target in moves:
+        source_dir = os.path.join(data_dirs[source], f'user_{user_id}')
+        target_dir = os.path.join(data_dirs[target], f'user_{user_id}')
+        print(f"user {user_id}: {source} -> {target}")
+        if args.dry_run:
+            continue
+        checkpoint(source_dir)
+        os.makedirs(data_dirs[target], exist_ok=True)
+        shutil.move(source_dir, target_dir)
+    if not args.dry_run:
+        print("Done. Restart the router with the new node list, then run `python -m jobs.rebuild_advisory_index` on each node.")
+
+if __name__ == '__main__':
+    main()
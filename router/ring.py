@@ -0,0 +1,45 @@
+# router/ring.py
+import bisect
+import hashlib
+import os
+
+# Points each node gets on the ring; more points spread users more evenly. At 128 one of three
+# nodes could own over 40% of the ring; 1024 keeps every node within a few percent of its share
+RING_REPLICAS = 1024
+
+def ring_hash(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+class HashRing:
+    """
+    Consistent hash ring of node names. A user belongs to the first node point clockwise from
+    the hash of their id, so adding or removing a node only moves the users on that node's arcs.
+    Nodes are placed by name, not address, so a node can change host without moving data.
+    """
+
+    def __init__(self, nodes, replicas=RING_REPLICAS):
+        if not nodes:
+            raise ValueError("A ring needs at least one node")
+        self.nodes = sorted(nodes)
+        points = sorted((ring_hash(f'{node}#{i}'), node) for node in self.nodes for i in range(replicas))
+        self.hashes = [point for point, _ in points]
+        self.owners = [node for _, node in points]
+
+    def node_for(self, user_id):
+        index = bisect.bisect(self.hashes, ring_hash(f'user:{user_id}'))
+        return self.owners[index % len(self.owners)]
+
+def parse_nodes(value):
+    """
+    Parse 'name=url,name=url' (as in ROUTER_NODES) into an ordered {name: url} dict.
+    """
+    nodes = {}
+    for entry in filter(None, (part.strip() for part in (value or '').split(','))):
+        name, sep, url = entry.partition('=')
+        if not sep or not name or not url:
+            raise ValueError(f"Invalid node '{entry}': expected name=url")
+        nodes[name.strip()] = url.strip().rstrip('/')
+    return nodes
+
+def load_nodes():
+    return parse_nodes(os.getenv('ROUTER_NODES', 'node1=http://127.0.0.1:5000'))
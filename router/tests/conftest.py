@@ -0,0 +1,10 @@
+# router/tests/conftest.py
+"""
+Router tests. Run from router: python -m pytest -q tests
+"""
+import os
+import sys
+
+# Configure before app reads its node list at import
+os.environ['ROUTER_NODES'] = 'node1=http://127.0.0.1:5101,node2=http://127.0.0.1:5102,node3=http://127.0.0.1:5103'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,59 @@
+# router/tests/test_ring.py
+import os
+from collections import Counter
+import jwt
+import pytest
+from ring import HashRing, parse_nodes
+from rebalance import plan_moves
+import app as router
+
+USERS = range(1, 20001)
+
+def test_users_spread_evenly_and_stably():
+    ring = HashRing(['node1', 'node2', 'node3'])
+    owners = Counter(ring.node_for(user_id) for user_id in USERS)
+    assert set(owners) == {'node1', 'node2', 'node3'}
+    assert max(owners.values()) / min(owners.values()) < 1.1
+    # Node order doesn't matter; only names do
+    shuffled = HashRing(['node3', 'node1', 'node2'])
+    assert all(shuffled.node_for(user_id) == ring.node_for(user_id) for user_id in USERS)
+
+def test_adding_a_node_only_moves_users_to_it():
+    before, after = HashRing(['node1', 'node2', 'node3']), HashRing(['node1', 'node2', 'node3', 'node4'])
+    moved = [user_id for user_id in USERS if before.node_for(user_id) != after.node_for(user_id)]
+    assert all(after.node_for(user_id) == 'node4' for user_id in moved)
+    assert 0.15 < len(moved) / len(USERS) < 0.35
+
+def test_parse_nodes():
+    assert parse_nodes(' a=http://h:1/ , b=http://h:2 ') == {'a': 'http://h:1', 'b': 'http://h:2'}
+    with pytest.raises(ValueError):
+        parse_nodes('a=http://h:1,b')
+    with pytest.raises(ValueError):
+        HashRing([])
+
+def test_plan_moves_finds_users_whose_owner_changed(tmp_path):
+    data_dirs = {node: str(tmp_path / node) for node in ('node1', 'node2')}
+    for user_id in range(1, 51):
+        os.makedirs(os.path.join(data_dirs['node1'], f'user_{user_id}'))
+    new_ring = HashRing(['node1', 'node2'])
+    moves = plan_moves(HashRing(['node1']), new_ring, data_dirs)
+    assert moves and all(source == 'node1' and target == 'node2' for _, source, target in moves)
+    assert {user_id for user_id, _, _ in moves} == {user_id for user_id in range(1, 51) if new_ring.node_for(user_id) == 'node2'}
+
+@pytest.mark.parametrize('path, headers, expected', [
+    ('/api/income', {'Authorization': 'Bearer ' + jwt.encode({'user_id': 7}, 'any-key', algorithm='HS256')}, 7),
+    # CFA and admin views of one user go to that user's node, not the caller's
+    ('/api/cfa/users/42/financials', {'Authorization': 'Bearer ' + jwt.encode({'user_id': 7}, 'any-key', algorithm='HS256')}, 42),
+    ('/api/admin/users/43/variance/2024-01', {}, 43),
+    ('/api/advisories/user/44', {}, 44),
+    ('/api/income', {'Authorization': 'Bearer garbage'}, None),
+    ('/api/admin/analytics/summary', {}, None)
+])
+def test_routing_user(path, headers, expected):
+    with router.app.test_request_context(path, headers=headers):
+        assert router.routing_user_id() == expected
+
+def test_unreachable_node_gives_502():
+    response = router.app.test_client().get('/api/income', headers={'Authorization': 'Bearer ' + jwt.encode({'user_id': 7}, 'any-key', algorithm='HS256')})
+    assert response.status_code == 502
+    assert router.ring.node_for(7) in response.get_json()['error']
@@ -0,0 +1,192 @@
+# serve.py
+"""
+Production launcher for the platform's Flask services, in place of the single-process
+`python app.py` dev server.
+
+The master process imports the service's app once (so workers share its memory copy-on-write),
+binds the listening socket and forks --workers processes that each serve requests on a pool of
+--threads threads. After the fork each worker calls the app module's init_worker(), if it
+defines one, to set up per-process state (threads, pools, caches). Workers are replaced when
+they exit, including after --max-requests requests. SIGTERM/SIGINT stop the workers gracefully:
+they finish in-flight requests and are killed after --graceful-timeout seconds.
+
+Usage (from the repository root):
+    python serve.py main-backend --workers 4 --threads 8
+    python serve.py auth-service --port 5001 --max-requests 10000
+"""
+import argparse
+import importlib
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Service directory -> port it listens on in development (see each app.py)
+SERVICES = {
+    'main-backend': 5000,
+    'auth-service': 5001,
+    'ai-backend': 6000,
+    'recommendation-service': 7000,
+    'router': 8000
+}
+
+class RequestHandler(WSGIRequestHandler):
+    # Idle keep-alive connections are closed after this many seconds, freeing their thread
+    timeout = 5
+    access_log = False
+
+    def log_request(self, code='-', size='-'):
+        if self.access_log:
+            super().log_request(code, size)
+
+class WorkerServer(BaseWSGIServer):
+    """
+    WSGI server for one worker: requests run on a fixed pool of threads, and the worker stops
+    accepting while all of them are busy so other workers pick up new connections.
+    """
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, sock, app, threads, max_requests):
+        host, port = sock.getsockname()[:2]
+        super().__init__(host, port, self.count_requests(app), handler=RequestHandler, fd=sock.fileno())
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+        self.slots = threading.Semaphore(threads)
+        self.max_requests = max_requests
+        self.handled = 0
+        self.handled_lock = threading.Lock()
+        self.stopping = False
+
+    def count_requests(self, app):
+        def counted(environ, start_response):
+            with self.handled_lock:
+                self.handled += 1
+                recycle = self.max_requests and self.handled >= self.max_requests and not self.stopping
+            if recycle:
+                self.stop()
+            return app(environ, start_response)
+        return counted
+
+    def stop(self):
+        # shutdown() waits for serve_forever to return, so it can't run on the serving thread
+        self.stopping = True
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def process_request(self, request, client_address):
+        self.slots.acquire()
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+def run_worker(module, sock, args):
+    # Drop the master's handlers; the master forwards SIGTERM for Ctrl-C
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGALRM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    init_worker = getattr(module, 'init_worker', None)
+    if init_worker is not None:
+        init_worker()
+
+    max_requests = args.max_requests + random.randint(0, args.max_requests_jitter) if args.max_requests else 0
+    server = WorkerServer(sock, module.app, args.threads, max_requests)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    # Stops accepting (and closes the listening socket) once stop() is called
+    server.serve_forever()
+    # Let in-flight requests finish
+    server.pool.shutdown(wait=True)
+
+def spawn_worker(module, sock, args):
+    pid = os.fork()
+    if pid == 0:
+        # Exits the worker through SystemExit so its atexit handlers (e.g. log flushing) run
+        run_worker(module, sock, args)
+        sys.exit(0)
+    return pid
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a platform service with preforked, threaded workers.")
+    parser.add_argument('service', choices=sorted(SERVICES), help="Service directory to serve")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, help="Defaults to the service's development port")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_WORKERS', os.cpu_count() or 1)), help="Worker processes (default: CPU count)")
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '8')), help="Request threads per worker (default: 8)")
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('WEB_MAX_REQUESTS', '10000')), help="Replace a worker after this many requests; 0 never (default: 10000)")
+    parser.add_argument('--max-requests-jitter', type=int, default=1000, help="Random extra requests per worker so they don't all restart at once (default: 1000)")
+    parser.add_argument('--graceful-timeout', type=int, default=30, help="Seconds workers get to finish requests on shutdown (default: 30)")
+    parser.add_argument('--keepalive', type=int, default=5, help="Seconds an idle keep-alive connection stays open (default: 5)")
+    parser.add_argument('--backlog', type=int, default=2048, help="Listen queue length (default: 2048)")
+    parser.add_argument('--access-log', action='store_true', help="Print a line per request (main-backend has its own JSON access log)")
+    args = parser.parse_args()
+    if args.workers < 1 or args.threads < 1:
+        parser.error("--workers and --threads must be at least 1")
+
+    # Services import their modules relative to their own directory and keep databases under it
+    service_dir = os.path.join(ROOT, args.service)
+    os.chdir(service_dir)
+    sys.path.insert(0, service_dir)
+    module = importlib.import_module('app')
+    RequestHandler.timeout = args.keepalive
+    RequestHandler.access_log = args.access_log
+
+    port = args.port or SERVICES[args.service]
+    sock = socket.create_server((args.host, port), backlog=args.backlog)
+    sock.set_inheritable(True)
+    print(f"Serving {args.service} on http://{args.host}:{port} with {args.workers} workers x {args.threads} threads")
+
+    workers = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        for pid in list(workers):
+            os.kill(pid, signal.SIGTERM)
+        signal.alarm(args.graceful_timeout)
+
+    def kill_remaining(signum, frame):
+        for pid in list(workers):
+            print(f"Worker {pid} did not stop within {args.graceful_timeout}s; killing it")
+            os.kill(pid, signal.SIGKILL)
+
+    def start_worker():
+        workers[spawn_worker(module, sock, args)] = time.monotonic()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGALRM, kill_remaining)
+    for _ in range(args.workers):
+        start_worker()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = workers.pop(pid, None)
+        if stopping or started is None:
+            continue
+        if status != 0 and time.monotonic() - started < 1:
+            # Failing at startup: don't fork in a tight loop
+            time.sleep(1)
+        start_worker()
+    sock.close()
+    print(f"Stopped {args.service}")
+
+if __name__ == '__main__':
+    main()